@@ -0,0 +1,221 @@
+"""
+Size-bounded eviction of repos from the postgres cache.
+
+Every (cache_func, repo_id) pair that's read from the cache has its last
+access time recorded in 'cache_access'. When the estimated size of the
+cached data exceeds CACHE_DISK_BUDGET_GB, the least recently used pairs
+are removed from their table, along with their bookkeeping, until the
+cache fits in the budget again. A removed pair is simply re-queried from
+Augur the next time it's requested.
+
+The size of a pair is estimated from its row counts, in its table and in
+the table's rollups, and the average row size of each of those tables.
+The row counts are recorded in 'cache_bookkeeping' when the pair is
+cached or refreshed, so estimating the size of the cache doesn't scan
+the cache tables. Deleted rows aren't returned to the operating system
+until the table is vacuumed, but their space is reused by later writes,
+so keeping the live data within the budget keeps the disk usage bounded.
+"""
+import time
+import logging
+import threading
+from psycopg2 import sql as pg_sql
+
+# requires relative import syntax "import .cx_common" because
+# other files importing cache_eviction need to know how to resolve
+# .cx_common- interpreter is invoked at a higher level, so relative
+# import required.
+from .cx_common import env_cache_disk_budget_gb
+from .cx_pool import cache_connection
+from .cache_rollups import delete_rollups
+
+# access times are only rewritten once they're this old, so that visualizations polling
+# the cache don't write a row every poll. Each process also remembers the pairs that it
+# touched, and doesn't send them to Postgres again until they're this old.
+ACCESS_RESOLUTION_SECONDS = 300
+
+# pairs that each process remembers touching, beyond which those older than ACCESS_RESOLUTION_SECONDS are forgotten.
+TOUCHED_MAX_PAIRS = 100000
+
+# pairs that were accessed or cached this recently are never evicted, so that
+# repos being viewed right now aren't evicted to make room for each other.
+EVICTION_GRACE = "15 minutes"
+
+# arbitrary key of the advisory lock that keeps evictions from running concurrently.
+EVICTION_LOCK_KEY = 8008
+
+# (cache_func, repo_id) -> time.monotonic() that this process last recorded an access to it.
+_touched: dict[tuple[str, int], float] = {}
+_touched_lock = threading.Lock()
+
+
+def touch(cache_cur, func_name: str, repolist: list[int]) -> None:
+    """
+    Records that the cached {func_name} data of the repos in {repolist} was just used.
+
+    Args:
+        cache_cur (psycopg2.extensions.cursor): cursor of the caller's cache transaction
+        func_name (str): cache table that was read
+        repolist (list[int]): repos whose rows were read
+    """
+    touch_pairs(cache_cur, [(func_name, repo_id) for repo_id in repolist])
+
+
+def touch_pairs(cache_cur, pairs: list[tuple[str, int]]) -> None:
+    """
+    Records that the cached data of each (cache_func, repo_id) pair in {pairs} was just used.
+    Pairs that this process already recorded in the last ACCESS_RESOLUTION_SECONDS are skipped.
+
+    Args:
+        cache_cur (psycopg2.extensions.cursor): cursor of the caller's cache transaction
+        pairs (list[tuple[str, int]]): (cache_func, repo_id) pairs that were read
+    """
+    now = time.monotonic()
+    with _touched_lock:
+        pairs = [
+            pair
+            for pair in dict.fromkeys(pairs)
+            if now - _touched.get(pair, -ACCESS_RESOLUTION_SECONDS) >= ACCESS_RESOLUTION_SECONDS
+        ]
+        for pair in pairs:
+            _touched[pair] = now
+        if len(_touched) > TOUCHED_MAX_PAIRS:
+            for pair, touched_at in list(_touched.items()):
+                if now - touched_at >= ACCESS_RESOLUTION_SECONDS:
+                    del _touched[pair]
+
+    if not pairs:
+        return
+
+    cache_cur.execute(
+        f"""
+        INSERT INTO cache_access (cache_func, repo_id)
+        SELECT * FROM unnest(%s::text[], %s::bigint[])
+        ON CONFLICT (cache_func, repo_id) DO UPDATE SET last_access = now()
+        WHERE cache_access.last_access < now() - interval '{ACCESS_RESOLUTION_SECONDS} seconds'
+        """,
+        ([func for func, _ in pairs], [repo_id for _, repo_id in pairs]),
+    )
+
+
+def cache_usage(cache_cur) -> tuple[float, list[tuple]]:
+    """
+    Estimates the size of each cached (cache_func, repo_id) pair.
+
+    Args:
+        cache_cur (psycopg2.extensions.cursor): cursor of a cache transaction
+
+    Returns:
+        tuple: total estimated bytes, and a list of
+            (cache_func, repo_id, estimated bytes, evictable) sorted least recently used first.
+    """
+    # row counts of each pair in its table and the table's rollups, as recorded when it was cached.
+    cache_cur.execute(
+        f"""
+        SELECT
+            cb.cache_func,
+            cb.repo_id,
+            COALESCE(cb.n_rows, 0),
+            COALESCE(cb.rollup_rows, '{{}}'::jsonb),
+            COALESCE(ca.last_access, cb.ts_cached) < now() - interval '{EVICTION_GRACE}' AS evictable
+        FROM cache_bookkeeping cb
+        LEFT JOIN cache_access ca
+            ON ca.cache_func = cb.cache_func AND ca.repo_id = cb.repo_id
+        WHERE to_regclass(quote_ident(cb.cache_func)) IS NOT NULL
+        ORDER BY COALESCE(ca.last_access, cb.ts_cached)
+        """
+    )
+    counts = cache_cur.fetchall()
+    if not counts:
+        return 0.0, []
+
+    tables = set()
+    for func, _, _, rollup_rows, _ in counts:
+        tables.add(func)
+        tables.update(rollup_rows)
+
+    # average row size, including indexes and not yet vacuumed rows.
+    cache_cur.execute(
+        """
+        SELECT relname, pg_total_relation_size(relid)::float8 / GREATEST(n_live_tup + n_dead_tup, 1)
+        FROM pg_stat_user_tables
+        WHERE relname = ANY(%s)
+        """,
+        (list(tables),),
+    )
+    row_bytes = dict(cache_cur.fetchall())
+
+    pairs = [
+        (
+            func,
+            repo_id,
+            n_rows * row_bytes.get(func, 0.0)
+            + sum(n * row_bytes.get(rollup, 0.0) for rollup, n in rollup_rows.items()),
+            evictable,
+        )
+        for func, repo_id, n_rows, rollup_rows, evictable in counts
+    ]
+
+    return sum(b for _, _, b, _ in pairs), pairs
+
+
+def evict_to_budget(budget_gb: float = env_cache_disk_budget_gb) -> int:
+    """
+    Evicts least recently used (cache_func, repo_id) pairs until the
+    estimated size of the cache is within {budget_gb}.
+
+    Rows, rollups, bookkeeping, watermarks, and access times of all evicted pairs
+    are deleted in a single transaction. If another process is already
+    evicting, returns without doing anything.
+
+    Args:
+        budget_gb (float, optional): size budget in GB. Defaults to CACHE_DISK_BUDGET_GB, 0 disables eviction.
+
+    Returns:
+        int: number of pairs evicted
+    """
+    if budget_gb <= 0:
+        return 0
+
+    budget = budget_gb * 1024**3
+    with cache_connection() as cache_conn:
+        with cache_conn.cursor() as cache_cur:
+            cache_cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (EVICTION_LOCK_KEY,))
+            if not cache_cur.fetchone()[0]:
+                return 0
+
+            total, pairs = cache_usage(cache_cur)
+            if total <= budget:
+                return 0
+
+            # least recently used first.
+            evicted: dict[str, list[int]] = {}
+            for func, repo_id, pair_bytes, evictable in pairs:
+                if total <= budget:
+                    break
+                if not evictable:
+                    continue
+                evicted.setdefault(func, []).append(repo_id)
+                total -= pair_bytes
+
+            for func, repos in evicted.items():
+                cache_cur.execute(
+                    pg_sql.SQL("DELETE FROM {tbl} WHERE repo_id = ANY(%s::bigint[])").format(
+                        tbl=pg_sql.Identifier(func)
+                    ),
+                    (repos,),
+                )
+                delete_rollups(cache_cur, func, repos)
+                for bookkeeping_table in ("cache_bookkeeping", "cache_watermarks", "cache_access"):
+                    cache_cur.execute(
+                        pg_sql.SQL("DELETE FROM {tbl} WHERE cache_func = %s AND repo_id = ANY(%s::bigint[])").format(
+                            tbl=pg_sql.Identifier(bookkeeping_table)
+                        ),
+                        (func, repos),
+                    )
+                logging.warning(f"CACHE EVICTION - {func} - EVICTED {len(repos)} REPOS")
+
+    n_evicted = sum(len(repos) for repos in evicted.values())
+    if total > budget:
+        logging.warning(f"CACHE EVICTION - OVER BUDGET AFTER EVICTING {n_evicted} PAIRS - {total / 1024**3:.2f} GB")
+    return n_evicted
@@ -20,18 +20,109 @@ typically have available.
 We're not experts in the field of ORMs and DB drivers, and would be
 happy to be proven wrong about the apparent performance tradeoff.
 """
+import csv
+import heapq
+import io
+import json
 import logging
+import os
+import select
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from uuid import uuid4
 import psycopg2 as pg
 from psycopg2.extras import execute_values
 from psycopg2 import sql as pg_sql
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 
 # requires relative import syntax "import .cx_common" because
 # other files importing cache_facade need to know how to resolve
 # .cx_common- interpreter is invoked at a higher level, so relative
 # import required.
-from .cx_common import db_cx_string, env_augur_schema, cache_cx_string
+from .cx_common import (
+    db_cx_string,
+    env_augur_schema,
+    env_cache_ingest_mode,
+    env_cache_ingest_shards,
+    env_cache_ingest_workers,
+    env_cache_refresh_interval_hours,
+    env_cache_refresh_lookback_days,
+    env_cache_full_refresh_days,
+)
+from .cx_pool import cache_connection, pool_stats
+from .cache_eviction import touch, touch_pairs, evict_to_budget
+from .frame_lru import local_frames
+from .cache_rollups import ROLLUP_SOURCES, rebuild_rollups
+
+# postgres type OIDs, from pg_catalog.pg_type, and the arrow types that
+# cache reads of those columns are decoded as. Other types are read as strings.
+PG_ARROW_TYPES = {
+    16: pa.bool_(),  # bool
+    20: pa.int64(),  # bigint
+    21: pa.int64(),  # smallint
+    23: pa.int64(),  # int
+    700: pa.float64(),  # float4
+    701: pa.float64(),  # float8
+    1700: pa.float64(),  # numeric
+    1114: pa.timestamp("us"),  # timestamp
+    1184: pa.timestamp("us", tz="UTC"),  # timestamptz
+    1082: pa.date32(),  # date
+}
+
+# target size of each in-memory CSV buffer written with COPY, and the
+# bounds on the number of rows fetched from Augur to fill it.
+COPY_BUFFER_BYTES = 8 * 1024 * 1024
+COPY_MIN_BATCH_ROWS = 1000
+COPY_MAX_BATCH_ROWS = 100000
+
+# bytes of COPY output that reads buffer before writing them to the pipe that they're decoded from.
+COPY_PIPE_BYTES = 1024 * 1024
+
+# unquoted field that COPY reads as NULL.
+COPY_NULL = "\\N"
+
+# channel that cache_query_results notifies, with the name of the cache table as
+# the payload, when it commits newly cached repos. see wait_for_cached.
+CACHE_READY_CHANNEL = "cache_ready"
+
+# wait_for_cached re-checks the bookkeeping at least this often, in case a
+# notification was missed, e.g. because the cache connection was reset.
+WAIT_RECHECK_SECONDS = 5
+
+# column of each cache table that delta refreshes are keyed on. Rows of a
+# repo at or after its watermark (less CACHE_REFRESH_LOOKBACK_DAYS) are
+# replaced by a refresh. Tables mapped to None are snapshots of the repo's
+# current state, so all of a repo's rows are replaced.
+CACHE_WATERMARKS = {
+    "commits_query": "author_timestamp",
+    "issues_query": "created_at",
+    "prs_query": "created_at",
+    "affiliation_query": "created_at",
+    "contributors_query": "created_at",
+    "issue_assignee_query": "created_at",
+    "pr_assignee_query": "created_at",
+    "repo_languages_query": None,
+    "package_version_query": None,
+    "repo_releases_query": "release_published_at",
+    "ossf_score_query": None,
+    "repo_info_query": None,
+    "pr_response_query": "pr_created_at",
+}
+
+# column of each cache table whose rows change after they're created, that's NULL until the row stops
+# changing, e.g. closed_at of issues. Refreshes also replace every row created since the repo's oldest
+# row that's still open, since e.g. an issue that's closed, or a PR that's merged, keeps its created_at.
+CACHE_OPEN_ROWS = {
+    "issues_query": "closed_at",
+    "prs_query": "closed_at",
+    "issue_assignee_query": "closed_at",
+    "pr_assignee_query": "closed_at",
+    "pr_response_query": "pr_closed_at",
+}
 
 
 def cache_query_results(
@@ -42,20 +133,31 @@ def cache_query_results(
     bookkeeping_data: tuple[dict],
     server_pagination=2000,
     client_pagination=2000,
+    ingest_mode: str = env_cache_ingest_mode,
 ) -> None:
     """Runs {query} against primary database specified by {db_connection_string} with variables {vars}.
     Retrieves results from db with paginations {server_pagination} and {client_pagination}.
 
+    With ingest_mode="copy" (default), rows are streamed into the cache table with COPY FROM STDIN
+    through an in-memory CSV buffer. {client_pagination} is then only the size of the first batch;
+    later batches are sized so that each buffer is about COPY_BUFFER_BYTES.
+    With ingest_mode="insert", rows are written with INSERT ... VALUES in batches of {client_pagination}.
+
     Args:
-        db_connection_string (str): _description_
-        query (str): _description_
-        vars (tuple(tuple)): _description_
-        target_table (str): _description_
-        bookkeeping_data (tuple(dict)): _description_
-        server_pagination (int, optional): _description_. Defaults to 2000.
-        client_pagination (int, optional): _description_. Defaults to 2000.
+        db_connection_string (str): connection string of the primary (Augur) database
+        query (str): sql query to run against the primary database
+        vars (tuple(tuple)): variables to inject into {query}
+        target_table (str): cache table that results are written to
+        bookkeeping_data (tuple(dict)): (cache_func, repo_id) records written to cache_bookkeeping, along with
+            the number of rows cached for the repo in {target_table} and in each of its rollups
+        server_pagination (int, optional): rows per round-trip when iterating the server cursor. Defaults to 2000.
+        client_pagination (int, optional): rows fetched per batch. Defaults to 2000.
+        ingest_mode (str, optional): "copy" or "insert". Defaults to CACHE_INGEST_MODE env var, or "copy".
     """
     logging.warning(f"{target_table} -- CQR CACHE_QUERY_RESULTS BEGIN")
+    if ingest_mode not in ("copy", "insert"):
+        raise ValueError(f"Unknown ingest_mode: {ingest_mode}")
+
     with pg.connect(
         db_connection_string,
         options=f"-c search_path={env_augur_schema}",
@@ -71,44 +173,46 @@ def cache_query_results(
 
             logging.warning(f"{target_table} -- CQR STARTING TRANSACTION")
             # connect to cache
-            with pg.connect(cache_cx_string) as cache_conn:
-                logging.warning(f"{target_table} -- CQR COMPOSING SQL")
-                # compose SQL w/ table name
-                # ref: https://www.psycopg.org/docs/sql.html
-                composed_query = pg_sql.SQL(
-                    "INSERT INTO {tbl_name} VALUES %s ON CONFLICT DO NOTHING".format(tbl_name=target_table)
-                ).as_string(cache_conn)
-
-                # iterate through pages of rows from server.
-                logging.warning(f"{target_table} -- CQR FETCHING AND STORING ROWS")
-                while rows := augur_cur.fetchmany(client_pagination):
-                    if not rows:
-                        # we're out of rows
-                        break
-
-                    # write available rows to cache.
-                    with cache_conn.cursor() as cache_cur:
-                        execute_values(
-                            cur=cache_cur,
-                            sql=composed_query,
-                            argslist=rows,
-                            page_size=client_pagination,
-                        )
+            with cache_connection() as cache_conn:
+                logging.warning(f"{target_table} -- CQR FETCHING AND STORING ROWS ({ingest_mode.upper()})")
+                repo_column = _repo_column(cache_conn, target_table)
+                if ingest_mode == "copy":
+                    repo_rows = _copy_rows(augur_cur, cache_conn, target_table, client_pagination, repo_column)
+                else:
+                    repo_rows = _insert_rows(augur_cur, cache_conn, target_table, client_pagination, repo_column)
 
                 # after all data has successfully been written to cache from the primary db,
                 # insert record of existence for each (cache_func, repo_id) pair.
                 logging.warning(f"{target_table} -- CQR UPDATING BOOKKEEPING")
                 with cache_conn.cursor() as cache_cur:
+                    # rollups are visible as soon as the bookkeeping says their source rows are.
+                    rollup_rows = rebuild_rollups(cache_cur, target_table, {d["repo_id"] for d in bookkeeping_data})
+
+                    # rows that are cached again are added to the ones already cached,
+                    # since cache tables don't have unique constraints to skip them.
                     execute_values(
                         cur=cache_cur,
                         sql="""
-                        INSERT INTO cache_bookkeeping (cache_func, repo_id)
+                        INSERT INTO cache_bookkeeping (cache_func, repo_id, n_rows, rollup_rows)
                         VALUES %s
+                        ON CONFLICT (cache_func, repo_id) DO UPDATE
+                        SET n_rows = COALESCE(cache_bookkeeping.n_rows, 0) + EXCLUDED.n_rows,
+                            rollup_rows = EXCLUDED.rollup_rows
                         """,
-                        template="(%(cache_func)s, %(repo_id)s)",
-                        argslist=bookkeeping_data,
+                        template="(%(cache_func)s, %(repo_id)s, %(n_rows)s, %(rollup_rows)s::jsonb)",
+                        argslist=[
+                            dict(
+                                d,
+                                n_rows=repo_rows.get(d["repo_id"], 0),
+                                rollup_rows=_rollup_rows_json(rollup_rows, d["repo_id"]),
+                            )
+                            for d in bookkeeping_data
+                        ],
                     )
 
+                    # wake up wait_for_cached callers once this transaction commits.
+                    cache_cur.execute("SELECT pg_notify(%s, %s)", (CACHE_READY_CHANNEL, target_table))
+
                 logging.warning(f"{target_table} -- CQR COMMITTING TRANSACTION")
                 # TODO: end of context block, on success, should commit. On failure, should rollback. Need to write test for this.
 
@@ -116,6 +220,111 @@ def cache_query_results(
         logging.warning(f"{target_table} -- CQR SUCCESS")
 
 
+def _repo_column(cache_conn, target_table: str) -> int:
+    """
+    (private)
+    Position of the repo_id column of {target_table}, which rows are written to in order.
+    """
+    with cache_conn.cursor() as cache_cur:
+        cache_cur.execute(pg_sql.SQL("SELECT * FROM {tbl} LIMIT 0").format(tbl=pg_sql.Identifier(target_table)))
+        return [desc.name for desc in cache_cur.description].index("repo_id")
+
+
+def _rollup_rows_json(rollup_rows: dict[str, dict[int, int]], repo_id: int) -> str:
+    """
+    (private)
+    Number of rows of {repo_id} in each rollup, as the JSON object stored in cache_bookkeeping.rollup_rows.
+    """
+    return json.dumps({rollup: repo_counts.get(repo_id, 0) for rollup, repo_counts in rollup_rows.items()})
+
+
+def _insert_rows(augur_cur, cache_conn, target_table: str, client_pagination: int, repo_column: int) -> Counter:
+    """
+    (private)
+    Writes all rows of {augur_cur} to {target_table} with
+    INSERT ... VALUES statements, {client_pagination} rows at a time.
+
+    Returns the number of rows written per repo_id, the value of column {repo_column}.
+    """
+    # compose SQL w/ table name
+    # ref: https://www.psycopg.org/docs/sql.html
+    composed_query = (
+        pg_sql.SQL("INSERT INTO {tbl_name} VALUES %s ON CONFLICT DO NOTHING")
+        .format(tbl_name=pg_sql.Identifier(target_table))
+        .as_string(cache_conn)
+    )
+
+    # iterate through pages of rows from server.
+    repo_rows = Counter()
+    while rows := augur_cur.fetchmany(client_pagination):
+        # write available rows to cache.
+        with cache_conn.cursor() as cache_cur:
+            execute_values(
+                cur=cache_cur,
+                sql=composed_query,
+                argslist=rows,
+                page_size=client_pagination,
+            )
+        repo_rows.update(row[repo_column] for row in rows)
+
+    return repo_rows
+
+
+def _copy_rows(augur_cur, cache_conn, target_table: str, client_pagination: int, repo_column: int) -> Counter:
+    """
+    (private)
+    Writes all rows of {augur_cur} to {target_table} with COPY FROM STDIN.
+    Returns the number of rows written per repo_id, the value of column {repo_column}.
+
+    Each batch of rows is serialized to CSV in an in-memory buffer and
+    piped to Postgres. The size of the next batch is chosen from the average
+    encoded row width of the last one, so that narrow tables are written in
+    large batches and wide tables don't build oversized buffers.
+
+    Note: a text value that is exactly COPY_NULL is stored as NULL.
+
+    Note: COPY has no equivalent of ON CONFLICT DO NOTHING, but the cache
+    tables don't define unique constraints, so there are no conflicts to skip.
+    """
+    composed_query = pg_sql.SQL("COPY {tbl_name} FROM STDIN WITH (FORMAT csv, NULL {null})").format(
+        tbl_name=pg_sql.Identifier(target_table),
+        null=pg_sql.Literal(COPY_NULL),
+    )
+
+    batch_size = client_pagination
+    repo_rows = Counter()
+    while rows := augur_cur.fetchmany(batch_size):
+        buffer = io.StringIO()
+
+        # None has to be written as the unquoted NULL marker- the csv module would
+        # otherwise write it as an empty field, which COPY reads as an empty string.
+        csv.writer(buffer).writerows(tuple(COPY_NULL if v is None else v for v in row) for row in rows)
+        buffer_bytes = buffer.tell()
+        buffer.seek(0)
+
+        with cache_conn.cursor() as cache_cur:
+            cache_cur.copy_expert(sql=composed_query, file=buffer)
+            # COPY's row count is of the whole batch, which can hold rows of several repos.
+            repo_rows.update(row[repo_column] for row in rows)
+            if cache_cur.rowcount not in (-1, len(rows)):
+                logging.warning(f"{target_table} -- CQR COPIED {cache_cur.rowcount} OF {len(rows)} ROWS")
+
+        batch_size = _next_batch_size(buffer_bytes, len(rows))
+
+    logging.warning(f"{target_table} -- CQR COPIED {sum(repo_rows.values())} ROWS")
+    return repo_rows
+
+
+def _next_batch_size(buffer_bytes: int, n_rows: int) -> int:
+    """
+    (private)
+    Number of rows that should fill a COPY buffer of about
+    COPY_BUFFER_BYTES, given the size of the last batch.
+    """
+    bytes_per_row = max(buffer_bytes / n_rows, 1)
+    return int(min(max(COPY_BUFFER_BYTES / bytes_per_row, COPY_MIN_BATCH_ROWS), COPY_MAX_BATCH_ROWS))
+
+
 def get_uncached(func_name: str, repolist: list[int]) -> list[int]:  # or None
     """
     Checks bookkeeping data to find, for a given querying function, which
@@ -123,38 +332,255 @@ def get_uncached(func_name: str, repolist: list[int]) -> list[int]:  # or None
 
     Returns a list of repos that AREN'T resident in cache.
     """
-    with pg.connect(cache_cx_string) as cache_conn:
+    return get_uncached_many({func_name: repolist})[func_name]
+
+
+def get_uncached_many(func_repos: dict[str, list[int]], include_stale: bool = False) -> dict[str, list[int]]:
+    """
+    Batch version of get_uncached: for each querying function in {func_repos},
+    finds which of its repos aren't resident in cache, in a single query.
+
+    Args:
+        func_repos (dict[str, list[int]]): {func_name: repolist} of each function to check
+        include_stale (bool, optional): also count cached repos that are due for a
+            delta refresh (see get_stale) as missing. Defaults to False.
+
+    Returns:
+        dict[str, list[int]]: {func_name: repos that AREN'T resident in cache}
+    """
+    status = _cache_status(func_repos)
+    if include_stale:
+        return {func: uncached + stale for func, (uncached, stale) in status.items()}
+    return {func: uncached for func, (uncached, _) in status.items()}
+
+
+def wait_for_cached(func_name: str, repolist: list[int], timeout: float = None) -> bool:
+    """
+    Blocks until the {func_name} data of every repo in {repolist} is resident in cache.
+
+    Args:
+        func_name (str): literal name of querying function
+        repolist (list[int]): repos to wait for
+        timeout (float, optional): seconds to wait for. Defaults to waiting indefinitely.
+
+    Returns:
+        bool: True if the data is available, False if {timeout} elapsed first.
+    """
+    return wait_for_cached_many({func_name: repolist}, timeout=timeout)
+
+
+def wait_for_cached_many(func_repos: dict[str, list[int]], timeout: float = None) -> bool:
+    """
+    Blocks until, for each querying function in {func_repos}, the data of
+    all of its repos is resident in cache.
+
+    Rather than polling the bookkeeping, listens on CACHE_READY_CHANNEL, which
+    cache_query_results notifies when it commits new repos for a function, and
+    re-checks the bookkeeping only when one of {func_repos} is notified (or every
+    WAIT_RECHECK_SECONDS, in case a notification was missed).
+
+    Args:
+        func_repos (dict[str, list[int]]): {func_name: repolist} of each function to wait for
+        timeout (float, optional): seconds to wait for. Defaults to waiting indefinitely.
+
+    Returns:
+        bool: True if the data is available, False if {timeout} elapsed first.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    with cache_connection() as cache_conn:
         with cache_conn.cursor() as cache_cur:
-            composed_query = pg_sql.SQL(
-                """
-                SELECT cb.repo_id
-                FROM cache_bookkeeping cb
-                WHERE cb.cache_func = '{cache_func_name}' AND cb.repo_id in %s
-                """.format(
-                    cache_func_name=func_name
-                )
-            ).as_string(cache_conn)
+            # listen before checking, so that a commit between the check and
+            # the wait still wakes this caller up.
+            cache_cur.execute(pg_sql.SQL("LISTEN {}").format(pg_sql.Identifier(CACHE_READY_CHANNEL)))
+            cache_conn.commit()
+
+            try:
+                waiting = False
+                while True:
+                    missing = {
+                        f: uncached for f, (uncached, _) in _lookup_status(cache_cur, func_repos).items() if uncached
+                    }
+                    # notifications are only delivered between transactions.
+                    cache_conn.commit()
+                    if not missing:
+                        return True
+
+                    if not waiting:
+                        logging.warning(f"{', '.join(missing)} - WAITING ON DATA TO BECOME AVAILABLE")
+                        waiting = True
+
+                    # sleep until one of the functions being waited on is notified.
+                    notified = False
+                    while not notified:
+                        wait = WAIT_RECHECK_SECONDS
+                        if deadline is not None:
+                            wait = min(wait, deadline - time.monotonic())
+                            if wait <= 0:
+                                logging.warning(f"{', '.join(missing)} - TIMED OUT WAITING ON DATA")
+                                return False
+
+                        if select.select([cache_conn], [], [], wait) == ([], [], []):
+                            break
+                        cache_conn.poll()
+                        notified = any(n.payload in missing for n in cache_conn.notifies)
+                        cache_conn.notifies.clear()
+            finally:
+                # the connection goes back to the pool, so stop listening.
+                if not cache_conn.closed:
+                    cache_conn.rollback()
+                    cache_cur.execute(pg_sql.SQL("UNLISTEN {}").format(pg_sql.Identifier(CACHE_READY_CHANNEL)))
+                    cache_conn.commit()
+                    cache_conn.notifies.clear()
+
+
+def get_stale(func_name: str, repolist: list[int]) -> list[int]:
+    """
+    Of the repos in {repolist} that are cached for {func_name}, finds those
+    that haven't been cached or refreshed in the last CACHE_REFRESH_INTERVAL_HOURS.
+
+    Returns an empty list if the table isn't in CACHE_WATERMARKS or refreshes
+    are disabled (CACHE_REFRESH_INTERVAL_HOURS=0).
+    """
+    return _cache_status({func_name: repolist})[func_name][1]
+
 
-            # exec query
-            cache_cur.execute(query=composed_query, vars=(tuple(repolist),))
+def cache_version(func_repos: dict[str, list[int]]) -> str:  # or None
+    """
+    Identifies the current contents of the cache for each querying function in
+    {func_repos} and its repos. The version changes whenever any of the
+    (cache_func, repo_id) pairs is cached, refreshed, or evicted, so it can be
+    part of the key of anything derived from the cached data.
+
+    Args:
+        func_repos (dict[str, list[int]]): {func_name: repolist} of each function
+
+    Returns:
+        str | None: version hash, or None if any of the pairs isn't cached.
+    """
+    with cache_connection() as cache_conn:
+        with cache_conn.cursor() as cache_cur:
+            return _lookup_version(cache_cur, func_repos)
+
+
+def _lookup_version(cache_cur, func_repos: dict[str, list[int]]) -> str:  # or None
+    """
+    (private)
+    cache_version, in the caller's cache transaction.
+    """
+    funcs, repos = [], []
+    for func_name, repolist in func_repos.items():
+        for repo_id in set(repolist):
+            funcs.append(func_name)
+            repos.append(repo_id)
+
+    if not funcs:
+        return None
+
+    cache_cur.execute(
+        """
+        SELECT
+            bool_and(cb.repo_id IS NOT NULL),
+            md5(string_agg(
+                concat_ws(':', req.cache_func, req.repo_id, cb.ts_cached, cw.refreshed_at),
+                ','
+                ORDER BY req.cache_func, req.repo_id
+            ))
+        FROM unnest(%s::text[], %s::bigint[]) AS req(cache_func, repo_id)
+        LEFT JOIN cache_bookkeeping cb
+            ON cb.cache_func = req.cache_func AND cb.repo_id = req.repo_id
+        LEFT JOIN cache_watermarks cw
+            ON cw.cache_func = req.cache_func AND cw.repo_id = req.repo_id
+        """,
+        (funcs, repos),
+    )
+    all_cached, version = cache_cur.fetchone()
+
+    return version if all_cached else None
 
-            # get list of cached repos
-            already_cached: list[tuple] = cache_cur.fetchall()
 
-            # process list of single-value tuples to get list of values.
-            # looks like: [(val1,), (val2,), ...]
-            already_cached: set[int] = set([v[0] for v in already_cached])
+def _cache_status(func_repos: dict[str, list[int]]) -> dict[str, tuple[list[int], list[int]]]:
+    """
+    (private)
+    Looks up every (cache_func, repo_id) pair in {func_repos} in the bookkeeping
+    with one query on its primary key, and records the cached pairs as used.
+
+    Returns:
+        dict: {func_name: (repos that aren't cached, cached repos due for a delta refresh)}
+    """
+    with cache_connection() as cache_conn:
+        with cache_conn.cursor() as cache_cur:
+            return _lookup_status(cache_cur, func_repos)
+
+
+def _lookup_status(cache_cur, func_repos: dict[str, list[int]]) -> dict[str, tuple[list[int], list[int]]]:
+    """
+    (private)
+    _cache_status, in the transaction of {cache_cur}.
+    """
+    funcs, repos = [], []
+    for func_name, repolist in func_repos.items():
+        for repo_id in set(repolist):
+            funcs.append(func_name)
+            repos.append(repo_id)
+
+    status = {func_name: ([], []) for func_name in func_repos}
+    if not funcs:
+        return status
+
+    refreshable = [f for f in func_repos if f in CACHE_WATERMARKS] if env_cache_refresh_interval_hours > 0 else []
 
-            # repos that are already cached will be removed from repolist set,
-            # leaving uncached remaining.
-            not_cached: list[int] = list(set(repolist) - already_cached)
+    cache_cur.execute(
+        """
+        SELECT
+            req.cache_func,
+            req.repo_id,
+            cb.repo_id IS NOT NULL AS cached,
+            cb.repo_id IS NOT NULL
+                AND req.cache_func = ANY(%(refreshable)s::text[])
+                AND COALESCE(cw.refreshed_at, cb.ts_cached) < now() - %(interval)s * interval '1 hour'
+                AS stale
+        FROM unnest(%(funcs)s::text[], %(repos)s::bigint[]) AS req(cache_func, repo_id)
+        LEFT JOIN cache_bookkeeping cb
+            ON cb.cache_func = req.cache_func AND cb.repo_id = req.repo_id
+        LEFT JOIN cache_watermarks cw
+            ON cw.cache_func = req.cache_func AND cw.repo_id = req.repo_id
+        """,
+        {
+            "funcs": funcs,
+            "repos": repos,
+            "refreshable": refreshable,
+            "interval": env_cache_refresh_interval_hours,
+        },
+    )
 
-            return not_cached
+    cached = []
+    for func_name, repo_id, is_cached, is_stale in cache_cur.fetchall():
+        if not is_cached:
+            status[func_name][0].append(repo_id)
+            continue
+        cached.append((func_name, repo_id))
+        if is_stale:
+            status[func_name][1].append(repo_id)
+
+    # cached repos count as used while visualizations wait on the rest.
+    touch_pairs(cache_cur, cached)
+
+    return status
 
 
 def caching_wrapper(func_name: str, query: str, repolist: list[int], n_repolist_uses=1) -> None:
     """Combines steps of (1) identifying which repos aren't already cached and
-    (2) querying + caching repos those repos.
+    (2) querying + caching repos those repos, then (3) refreshing cached repos
+    that are due for a delta refresh.
+
+    Uncached repos are split into up to CACHE_INGEST_SHARDS shards of roughly equal
+    estimated size, which are queried and cached concurrently by CACHE_INGEST_WORKERS threads.
+    Each shard is committed (rows and bookkeeping) on its own, so repos in small shards
+    become available to readers without waiting for the largest repos.
+
+    Cached repos that haven't been refreshed in CACHE_REFRESH_INTERVAL_HOURS only have
+    their rows since their watermark re-queried, see refresh_query_results.
 
     Args:
         func_name (str): literal name of querying function for bookkeeping
@@ -171,27 +597,35 @@ def caching_wrapper(func_name: str, query: str, repolist: list[int], n_repolist_
     """
     try:
         # STEP 1: Which repos need to be queried for?
-        #           some might already be in cache.
-        uncached_repos: list[int] | None = get_uncached(func_name=func_name, repolist=repolist)
-        if not uncached_repos:
+        #           some might already be in cache, and of those
+        #           some might be due for a delta refresh.
+        uncached_repos, stale_repos = _cache_status({func_name: repolist})[func_name]
+        if not uncached_repos and not stale_repos:
             logging.warning(f"{func_name} COLLECTION - ALL REQUESTED REPOS IN CACHE")
             return 0
-        else:
+
+        # STEP 2: Query for and cache new repos
+        if uncached_repos:
             logging.warning(f"{func_name} COLLECTION - CACHING {len(uncached_repos)} NEW REPOS")
+            _cache_repos(func_name, query, uncached_repos, n_repolist_uses)
+
+            # make room for the new repos by evicting the least recently used ones.
+            try:
+                evict_to_budget()
+            except Exception as e:
+                logging.warning(f"{func_name} COLLECTION - CACHE EVICTION FAILED: {e}")
+
+        # STEP 3: Query for rows of cached repos since their watermarks
+        if stale_repos:
+            logging.warning(f"{func_name} COLLECTION - REFRESHING {len(stale_repos)} CACHED REPOS")
+            refresh_query_results(
+                db_connection_string=db_cx_string,
+                query=query,
+                vars=tuple([tuple(stale_repos) for _ in range(n_repolist_uses)]),
+                target_table=func_name,
+                repolist=stale_repos,
+            )
 
-            # inject the repolist multiple times because the SQL uses it more
-            # than once and the wildcard %s are ordered.
-            uncached_repos: tuple[tuple] = tuple([tuple(uncached_repos) for _ in range(n_repolist_uses)])
-
-        # STEP 2: Query for those repos
-        logging.warning(f"{func_name} COLLECTION - EXECUTING CACHING QUERY")
-        cache_query_results(
-            db_connection_string=db_cx_string,
-            query=query,
-            vars=uncached_repos,
-            target_table=func_name,
-            bookkeeping_data=tuple({"cache_func": func_name, "repo_id": r} for r in repolist),
-        )
     except Exception as e:
         logging.critical(f"{func_name}_POSTGRES ERROR: {e}")
 
@@ -199,9 +633,325 @@ def caching_wrapper(func_name: str, query: str, repolist: list[int], n_repolist_
         raise Exception(e)
 
 
+def _cache_repos(func_name: str, query: str, uncached_repos: list[int], n_repolist_uses: int) -> None:
+    """
+    (private)
+    Splits {uncached_repos} into shards of similar size and
+    queries and caches each shard in its own transaction.
+    """
+    n_shards = min(len(uncached_repos), env_cache_ingest_shards)
+    if n_shards > 1:
+        shards = _shard_repos(_estimate_repo_costs(uncached_repos), n_shards)
+    else:
+        shards = [uncached_repos]
+
+    logging.warning(f"{func_name} COLLECTION - EXECUTING CACHING QUERY IN {len(shards)} SHARD(S)")
+    if len(shards) == 1:
+        _cache_shard(func_name, query, shards[0], n_repolist_uses)
+        return
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=env_cache_ingest_workers) as pool:
+        futures = [pool.submit(_cache_shard, func_name, query, shard, n_repolist_uses) for shard in shards]
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                errors.append(future.exception())
+
+    logging.warning(f"{func_name} COLLECTION - CACHE POOL {pool_stats()}")
+
+    if errors:
+        # shards that succeeded stay committed, so a retry only re-queries the failed ones.
+        raise Exception(f"{len(errors)}/{len(shards)} SHARDS FAILED: {errors[0]}")
+
+
+def _cache_shard(func_name: str, query: str, shard: list[int], n_repolist_uses: int) -> None:
+    """
+    (private)
+    Queries and caches the repos in {shard} in a single transaction.
+    """
+    # inject the repolist multiple times because the SQL uses it more
+    # than once and the wildcard %s are ordered.
+    shard_vars: tuple[tuple] = tuple([tuple(shard) for _ in range(n_repolist_uses)])
+
+    cache_query_results(
+        db_connection_string=db_cx_string,
+        query=query,
+        vars=shard_vars,
+        target_table=func_name,
+        bookkeeping_data=tuple({"cache_func": func_name, "repo_id": r} for r in shard),
+    )
+
+
+def _estimate_repo_costs(repolist: list[int]) -> dict[int, int]:
+    """
+    (private)
+    Estimates the relative ingest cost of each repo from the most recent
+    commit, issue, and pull request counts that Augur has recorded for it.
+
+    Repos without counts, or all repos if the lookup fails, get a cost of 1.
+    """
+    costs = {r: 1 for r in repolist}
+    try:
+        with pg.connect(db_cx_string, options=f"-c search_path={env_augur_schema}") as augur_conn:
+            with augur_conn.cursor() as augur_cur:
+                augur_cur.execute(
+                    """
+                    SELECT DISTINCT ON (ri.repo_id)
+                        ri.repo_id,
+                        COALESCE(ri.commit_count, 0) + COALESCE(ri.issues_count, 0) + COALESCE(ri.pull_request_count, 0)
+                    FROM repo_info ri
+                    WHERE ri.repo_id IN %s
+                    ORDER BY ri.repo_id, ri.data_collection_date DESC
+                    """,
+                    (tuple(repolist),),
+                )
+                for repo_id, cost in augur_cur.fetchall():
+                    costs[repo_id] = max(int(cost), 1)
+    except Exception as e:
+        logging.warning(f"COULDN'T ESTIMATE REPO SIZES, SHARDING BY REPO COUNT: {e}")
+
+    return costs
+
+
+def _shard_repos(costs: dict[int, int], n_shards: int) -> list[list[int]]:
+    """
+    (private)
+    Splits repos into {n_shards} groups of similar total cost by
+    assigning the most expensive remaining repo to the cheapest shard.
+
+    Shards are returned cheapest-first so that small repos are
+    submitted, and thus cached, before large ones.
+    """
+    # (total cost, shard index, repos) - index breaks ties so lists are never compared.
+    heap = [(0, i, []) for i in range(n_shards)]
+    for repo_id in sorted(costs, key=costs.get, reverse=True):
+        total, i, repos = heapq.heappop(heap)
+        repos.append(repo_id)
+        heapq.heappush(heap, (total + costs[repo_id], i, repos))
+
+    return [repos for _, _, repos in sorted(heap) if repos]
+
+
+def refresh_query_results(
+    db_connection_string: str,
+    query: str,
+    vars: tuple[tuple],
+    target_table: str,
+    repolist: list[int],
+    server_pagination=2000,
+    client_pagination=2000,
+    ingest_mode: str = env_cache_ingest_mode,
+) -> None:
+    """Brings the cached rows of {repolist} in {target_table} up to date without re-ingesting them.
+
+    Each (table, repo) pair has a watermark in cache_watermarks: the latest value of the table's
+    CACHE_WATERMARKS column for that repo. The rows of each repo at or after its watermark, less
+    CACHE_REFRESH_LOOKBACK_DAYS, are deleted and pulled again from Augur with {query}, so rows that
+    Augur collected late or that changed within the lookback are picked up, and a refresh can be
+    re-run without duplicating rows. Tables in CACHE_OPEN_ROWS also have every row since the repo's
+    oldest open row replaced, so that rows that were closed or merged since are picked up.
+    Snapshot tables (None in CACHE_WATERMARKS) have all of each repo's rows replaced.
+
+    Any other change, e.g. a row deleted from Augur or reopened, is picked up by a full re-ingest: pairs
+    that were last fully ingested more than CACHE_FULL_REFRESH_DAYS ago have all of their rows replaced.
+
+    The watermark is advanced, and the delete, insert and watermark update are committed together.
+
+    Args:
+        db_connection_string (str): connection string of the primary (Augur) database
+        query (str): the sql query that {target_table} was cached with
+        vars (tuple(tuple)): variables to inject into {query}, restricting it to {repolist}
+        target_table (str): cache table to refresh
+        repolist (list[int]): repos to refresh
+        server_pagination (int, optional): rows per round-trip when iterating the server cursor. Defaults to 2000.
+        client_pagination (int, optional): rows fetched per batch. Defaults to 2000.
+        ingest_mode (str, optional): "copy" or "insert". Defaults to CACHE_INGEST_MODE env var, or "copy".
+    """
+    logging.warning(f"{target_table} -- RQR REFRESH_QUERY_RESULTS BEGIN")
+    if ingest_mode not in ("copy", "insert"):
+        raise ValueError(f"Unknown ingest_mode: {ingest_mode}")
+
+    column = CACHE_WATERMARKS[target_table]
+    table_id = pg_sql.Identifier(target_table)
+    max_watermark = (
+        pg_sql.SQL("(SELECT max(t.{col}) FROM {tbl} t WHERE t.repo_id = r.repo_id)").format(
+            col=pg_sql.Identifier(column), tbl=table_id
+        )
+        if column
+        else pg_sql.SQL("NULL::timestamptz")
+    )
+
+    with cache_connection() as cache_conn:
+        with cache_conn.cursor() as cache_cur:
+            # repos refreshed for the first time start from the latest cached row.
+            cache_cur.execute(
+                pg_sql.SQL(
+                    """
+                    INSERT INTO cache_watermarks (cache_func, repo_id, watermark)
+                    SELECT %s, r.repo_id, {max_watermark}
+                    FROM unnest(%s::bigint[]) AS r(repo_id)
+                    ON CONFLICT (cache_func, repo_id) DO NOTHING
+                    """
+                ).format(max_watermark=max_watermark),
+                (target_table, list(repolist)),
+            )
+
+            open_since = (
+                pg_sql.SQL(
+                    "(SELECT min(t.{col}) FROM {tbl} t WHERE t.repo_id = cw.repo_id AND t.{open_col} IS NULL)"
+                ).format(
+                    col=pg_sql.Identifier(column),
+                    tbl=table_id,
+                    open_col=pg_sql.Identifier(CACHE_OPEN_ROWS[target_table]),
+                )
+                if column and target_table in CACHE_OPEN_ROWS
+                else pg_sql.SQL("NULL::timestamptz")
+            )
+
+            # lock the watermarks so concurrent refreshes of a repo run one after the other.
+            # a NULL start replaces all of the repo's rows. LEAST ignores NULLs.
+            cache_cur.execute(
+                pg_sql.SQL(
+                    """
+                    SELECT
+                        cw.repo_id,
+                        full_refresh,
+                        CASE WHEN full_refresh THEN NULL
+                            ELSE LEAST(cw.watermark - %(lookback)s * interval '1 day', {open_since}) END
+                    FROM cache_watermarks cw
+                    JOIN cache_bookkeeping cb
+                        ON cb.cache_func = cw.cache_func AND cb.repo_id = cw.repo_id,
+                    LATERAL (
+                        SELECT %(full_days)s > 0 AND cb.ts_cached < now() - %(full_days)s * interval '1 day'
+                    ) f(full_refresh)
+                    WHERE cw.cache_func = %(table)s AND cw.repo_id = ANY(%(repos)s::bigint[])
+                    FOR UPDATE OF cw
+                    """
+                ).format(open_since=open_since),
+                {
+                    "lookback": env_cache_refresh_lookback_days,
+                    "full_days": env_cache_full_refresh_days,
+                    "table": target_table,
+                    "repos": list(repolist),
+                },
+            )
+            refresh = cache_cur.fetchall()
+            repo_ids = [repo_id for repo_id, _, _ in refresh]
+            full_refresh = [full for _, full, _ in refresh]
+            since_ts = [since for _, _, since in refresh]
+            if any(full_refresh):
+                logging.warning(f"{target_table} -- RQR FULLY REPLACING {sum(full_refresh)} REPOS")
+
+            # column names of the cache table, which the query's columns are written to in order.
+            cache_cur.execute(pg_sql.SQL("SELECT * FROM {tbl} LIMIT 0").format(tbl=table_id))
+            columns = pg_sql.SQL(", ").join([pg_sql.Identifier(desc.name) for desc in cache_cur.description])
+            repo_column = [desc.name for desc in cache_cur.description].index("repo_id")
+
+            if column:
+                delta_query = pg_sql.SQL(
+                    """
+                    SELECT q.*
+                    FROM ({query}
+                    ) AS q({columns})
+                    JOIN unnest(%s::bigint[], %s::timestamptz[]) AS w(repo_id, since)
+                        ON q.repo_id = w.repo_id
+                    WHERE w.since IS NULL OR q.{col} >= w.since
+                    """
+                ).format(query=pg_sql.SQL(query), columns=columns, col=pg_sql.Identifier(column))
+                delta_vars = tuple(vars) + (repo_ids, since_ts)
+                delete = pg_sql.SQL(
+                    """
+                    DELETE FROM {tbl} t
+                    USING unnest(%s::bigint[], %s::timestamptz[]) AS w(repo_id, since)
+                    WHERE t.repo_id = w.repo_id AND (w.since IS NULL OR t.{col} >= w.since)
+                    """
+                ).format(tbl=table_id, col=pg_sql.Identifier(column))
+                delete_vars = (repo_ids, since_ts)
+            else:
+                delta_query = pg_sql.SQL(query)
+                delta_vars = vars
+                delete = pg_sql.SQL("DELETE FROM {tbl} t WHERE t.repo_id = ANY(%s::bigint[])").format(tbl=table_id)
+                delete_vars = (repo_ids,)
+
+            # deleted rows are counted per repo to keep the bookkeeping's row counts current.
+            cache_cur.execute(
+                pg_sql.SQL(
+                    """
+                    WITH deleted AS ({delete} RETURNING t.repo_id)
+                    SELECT repo_id, count(*) FROM deleted GROUP BY repo_id
+                    """
+                ).format(delete=delete),
+                delete_vars,
+            )
+            deleted_rows = dict(cache_cur.fetchall())
+            logging.warning(f"{target_table} -- RQR REPLACING {sum(deleted_rows.values())} CACHED ROWS")
+
+            # naive Augur timestamps are compared to the watermarks as UTC,
+            # which is how the cache interpreted them when they were ingested.
+            with pg.connect(
+                db_connection_string,
+                options=f"-c search_path={env_augur_schema} -c timezone=UTC",
+            ) as augur_conn:
+                with augur_conn.cursor(name=f"{target_table}-{uuid4()}") as augur_cur:
+                    augur_cur.itersize = server_pagination
+
+                    logging.warning(f"{target_table} -- RQR EXECUTING DELTA QUERY")
+                    augur_cur.execute(delta_query.as_string(augur_conn), delta_vars)
+
+                    logging.warning(f"{target_table} -- RQR FETCHING AND STORING ROWS ({ingest_mode.upper()})")
+                    if ingest_mode == "copy":
+                        repo_rows = _copy_rows(augur_cur, cache_conn, target_table, client_pagination, repo_column)
+                    else:
+                        repo_rows = _insert_rows(augur_cur, cache_conn, target_table, client_pagination, repo_column)
+
+            rollup_rows = rebuild_rollups(cache_cur, target_table, repo_ids)
+
+            cache_cur.execute(
+                """
+                UPDATE cache_bookkeeping cb
+                SET n_rows = GREATEST(COALESCE(cb.n_rows, 0) + d.added, 0),
+                    rollup_rows = d.rollup_rows::jsonb,
+                    ts_cached = CASE WHEN d.full_refresh THEN now() ELSE cb.ts_cached END
+                FROM unnest(%s::bigint[], %s::bigint[], %s::text[], %s::boolean[])
+                    AS d(repo_id, added, rollup_rows, full_refresh)
+                WHERE cb.cache_func = %s AND cb.repo_id = d.repo_id
+                """,
+                (
+                    repo_ids,
+                    [repo_rows.get(r, 0) - deleted_rows.get(r, 0) for r in repo_ids],
+                    [_rollup_rows_json(rollup_rows, r) for r in repo_ids],
+                    full_refresh,
+                    target_table,
+                ),
+            )
+
+            logging.warning(f"{target_table} -- RQR ADVANCING WATERMARKS")
+            cache_cur.execute(
+                pg_sql.SQL(
+                    """
+                    UPDATE cache_watermarks cw
+                    SET watermark = m.watermark, refreshed_at = now()
+                    FROM (
+                        SELECT r.repo_id, {max_watermark} AS watermark
+                        FROM unnest(%s::bigint[]) AS r(repo_id)
+                    ) m
+                    WHERE cw.cache_func = %s AND cw.repo_id = m.repo_id
+                    """
+                ).format(max_watermark=max_watermark),
+                (repo_ids, target_table),
+            )
+
+    logging.warning(f"{target_table} -- RQR SUCCESS")
+
+
 def retrieve_from_cache(
     tablename: str,
     repolist: list[int],
+    columns: list[str] = None,
+    time_column: str = None,
+    start=None,
+    end=None,
+    filters: dict = None,
 ) -> pd.DataFrame:
     """
     For a given table in cache, get all results
@@ -209,28 +959,177 @@ def retrieve_from_cache(
 
     Results are retrieved by a DataFrame, so column names
     may need to be overridden by calling function.
+
+    Rows are streamed out of Postgres with COPY TO STDOUT and decoded
+    straight into typed Arrow columns, rather than materializing a
+    Python tuple per row. The CSV is decoded into Arrow record batches
+    as it arrives (see _copy_to_table), so it's never held in memory
+    as a whole, and each column of the batches is released as soon as
+    it's converted to pandas. Column dtypes follow the cache table's types:
+    'timestamptz' columns are returned as datetime64[ns, UTC],
+    so calling functions don't need to parse them.
+
+    Projection and filtering are pushed down to Postgres so that
+    visualizations only transfer the rows and columns they use.
+
+    Frames are also kept in this process's memory (see frame_lru), so
+    reading the same rows again, e.g. after a control of a visualization
+    changes, only costs a version lookup until the cached data changes.
+
+    {tablename} can also be a rollup of a cache table (see cache_rollups).
+    Its access and version are those of the table it's derived from.
+
+    Args:
+        tablename (str): cache table to read from
+        repolist (list[int]): repo_ids to get results for
+        columns (list[str], optional): columns to return. Defaults to all columns.
+        time_column (str, optional): timestamp column that {start} and {end} apply to.
+        start (str | datetime, optional): inclusive lower bound on {time_column}.
+        end (str | datetime, optional): exclusive upper bound on {time_column}.
+        filters (dict, optional): {column: value} pairs that rows must equal.
+
+    Returns:
+        pd.DataFrame: matching rows
     """
 
+    if (start is not None or end is not None) and time_column is None:
+        raise ValueError("retrieve_from_cache: time_column is required with start or end")
+
+    if columns:
+        select_list = pg_sql.SQL(", ").join([pg_sql.Identifier("t", c) for c in columns])
+    else:
+        select_list = pg_sql.SQL("*")
+
+    # repo_ids are passed as one array rather than a tuple of literals.
+    conditions = [pg_sql.SQL("t.repo_id = ANY(%s::bigint[])")]
+    params = [list(repolist)]
+    if start is not None:
+        conditions.append(pg_sql.SQL("{col} >= %s").format(col=pg_sql.Identifier("t", time_column)))
+        params.append(start)
+    if end is not None:
+        conditions.append(pg_sql.SQL("{col} < %s").format(col=pg_sql.Identifier("t", time_column)))
+        params.append(end)
+    for col, val in (filters or {}).items():
+        conditions.append(pg_sql.SQL("{col} = %s").format(col=pg_sql.Identifier("t", col)))
+        params.append(val)
+
+    source_table = ROLLUP_SOURCES.get(tablename, tablename)
+    frame_key = (
+        tablename,
+        tuple(sorted(set(repolist))),
+        tuple(columns) if columns else None,
+        time_column,
+        start,
+        end,
+        tuple(sorted((filters or {}).items())),
+    )
+
     # GET ALL DATA FROM POSTGRES CACHE
     df = None
-    with pg.connect(cache_cx_string) as cache_conn:
+    with cache_connection() as cache_conn:
         with cache_conn.cursor() as cache_cur:
-            cache_cur.execute(
-                """
-                SELECT *
-                FROM {tablename} t
-                WHERE t.repo_id IN %s;
-                """.format(
-                    tablename=tablename
+            touch(cache_cur, source_table, repolist)
+
+            version = _lookup_version(cache_cur, {source_table: repolist})
+            if version is not None:
+                df = local_frames.get(frame_key, version)
+                if df is not None:
+                    logging.warning(f"{tablename} - DATA LOADED FROM MEMORY - {df.shape} rows,cols")
+                    return df
+
+            # COPY can't take bind parameters, so they're inlined here.
+            select_query = cache_cur.mogrify(
+                pg_sql.SQL(
+                    """
+                    SELECT {select_list}
+                    FROM {tablename} t
+                    WHERE {conditions}
+                    """
+                ).format(
+                    select_list=select_list,
+                    tablename=pg_sql.Identifier(tablename),
+                    conditions=pg_sql.SQL(" AND ").join(conditions),
                 ),
-                (tuple(repolist),),
+                params,
+            ).decode()
+
+            # get column names and types without reading any rows
+            cache_cur.execute(f"{select_query} LIMIT 0")
+            schema = pa.schema(
+                [(desc.name, PG_ARROW_TYPES.get(desc.type_code, pa.string())) for desc in cache_cur.description]
             )
 
             logging.warning(f"{tablename} - LOADING DATA FROM CACHE")
-            df = pd.DataFrame(
-                cache_cur.fetchall(),
-                # get df column names from the database columns
-                columns=[desc[0] for desc in cache_cur.description],
+            table = _copy_to_table(
+                cache_cur,
+                pg_sql.SQL("COPY ({select}) TO STDOUT WITH (FORMAT csv, NULL {null})").format(
+                    select=pg_sql.SQL(select_query),
+                    null=pg_sql.Literal(COPY_NULL),
+                ),
+                schema,
             )
-            logging.warning(f"{tablename} - DATA LOADED - {df.shape} rows,cols")
-            return df
+
+    # the table holds the only references to its batches, so each column is freed once it's converted.
+    df = table.to_pandas(self_destruct=True, split_blocks=True, coerce_temporal_nanoseconds=True)
+    del table
+    logging.warning(f"{tablename} - DATA LOADED - {df.shape} rows,cols")
+
+    if version is not None:
+        local_frames.put(frame_key, version, df)
+    return df
+
+
+def _copy_to_table(cache_cur, copy_query: pg_sql.Composable, schema: pa.Schema) -> pa.Table:
+    """
+    (private)
+    Runs {copy_query}, a COPY ... TO STDOUT WITH (FORMAT csv, NULL COPY_NULL),
+    and decodes its output into an Arrow table with the column names and types in {schema}.
+
+    The output is written to a pipe that pyarrow's streaming CSV reader decodes
+    into record batches on another thread, as the output arrives. If it can't be
+    decoded, the rest of the output is still read so that the COPY completes
+    and the connection can be reused, and the error is raised afterwards.
+    """
+    read_fd, write_fd = os.pipe()
+    decoded = {"batches": [], "error": None}
+
+    def decode():
+        with os.fdopen(read_fd, "rb") as pipe:
+            try:
+                # pyarrow can't read an empty CSV file.
+                if not pipe.peek(1):
+                    return
+                reader = pa_csv.open_csv(
+                    pipe,
+                    read_options=pa_csv.ReadOptions(column_names=schema.names),
+                    # text values can hold newlines, which Postgres quotes.
+                    parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+                    convert_options=pa_csv.ConvertOptions(
+                        column_types=schema,
+                        null_values=[COPY_NULL],
+                        strings_can_be_null=True,
+                        # Postgres quotes text values that are exactly COPY_NULL.
+                        quoted_strings_can_be_null=False,
+                        true_values=["t"],
+                        false_values=["f"],
+                    ),
+                )
+                for batch in reader:
+                    decoded["batches"].append(batch)
+            except Exception as e:
+                decoded["error"] = e
+                while pipe.read(COPY_PIPE_BYTES):
+                    pass
+
+    decoder = threading.Thread(target=decode, daemon=True)
+    decoder.start()
+    try:
+        with os.fdopen(write_fd, "wb", buffering=COPY_PIPE_BYTES) as pipe:
+            cache_cur.copy_expert(sql=copy_query, file=pipe)
+    finally:
+        decoder.join()
+
+    if decoded["error"] is not None:
+        raise decoded["error"]
+
+    return pa.Table.from_batches(decoded.pop("batches"), schema=schema)
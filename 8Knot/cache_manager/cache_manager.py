@@ -63,7 +63,7 @@ class CacheManager:
         Args:
         -----
             func (function): Function that worker picks up to run as job.
-            repo (str): Argument to function. Repo data downloaded for.
+            repo (int | list[int]): Argument to function. Repo(s) data downloaded for.
 
         Returns:
         --------
@@ -78,7 +78,10 @@ class CacheManager:
         # use the called function's name
         hashfunc.update(bytes(func.__name__, "utf-8"))
 
-        # and the repo list we're passing to it
+        # and the repo list we're passing to it, in a canonical order
+        # so that the same set of repos always hashes the same way.
+        if isinstance(repo, (list, tuple, set)):
+            repo = sorted(set(repo))
         hashfunc.update(bytes(str(repo), "utf-8"))
         # grab the hex hash that's been generated.
         h = hashfunc.hexdigest()
@@ -0,0 +1,130 @@
+"""
+Per-repo aggregates of cache tables, maintained when rows are cached.
+
+Some visualizations only need counts per repo per day, or per hour and
+weekday, but would otherwise read every raw row of a table and count
+them in pandas. Others need a table's packed columns (e.g. comma-joined
+ids) as one row per value, and would otherwise split them in pandas on
+every render. Each rollup table in ROLLUPS is derived from one cache
+table with a query over the rows of a repo, and is rebuilt for a repo
+in the same transaction that caches, refreshes, or evicts that repo's
+rows. A rollup is therefore cached exactly when its source table is, and
+readers wait on, and are versioned by, the source table's bookkeeping.
+
+Rollup tables are created in db_init. Every rollup query selects
+repo_id first, and restricts itself to the repos in %(repos)s.
+"""
+import logging
+from psycopg2 import sql as pg_sql
+
+# doesn't use relative imports so that db_init, which is run as a script,
+# can import this file as a neighbor.
+
+# source cache table -> {rollup table: query that computes the rollup's rows}
+ROLLUPS = {
+    "commits_query": {
+        # distinct commits per repo per author date.
+        # author_date is Augur's 'YYYY-MM-DD' string, rows where it isn't a date are left out.
+        # git doesn't validate dates, so it's only cast once its year and month are valid (CASE, unlike
+        # WHERE, guarantees the order), and dates whose day overflows their month, e.g. 2021-02-30, are dropped.
+        "commits_daily_rollup": """
+            SELECT repo_id, day, count(DISTINCT commit_hash) AS commits
+            FROM (
+                SELECT
+                    repo_id,
+                    commit_hash,
+                    author_date,
+                    CASE WHEN author_date ~ '^\\d{4}-(0[1-9]|1[0-2])-(0[1-9]|[12]\\d|3[01])'
+                        AND left(author_date, 4) <> '0000'
+                    THEN (left(author_date, 7) || '-01')::date + (substr(author_date, 9, 2)::int - 1)
+                    END AS day
+                FROM commits_query
+                WHERE repo_id = ANY(%(repos)s::bigint[])
+            ) c
+            WHERE to_char(day, 'YYYY-MM-DD') = left(author_date, 10)
+            GROUP BY repo_id, day
+        """,
+        # authoring and committing events per repo per UTC weekday and hour.
+        # authoring isn't counted separately when it's the same event as committing.
+        "commits_activity_rollup": """
+            SELECT
+                repo_id,
+                extract(isodow FROM ts AT TIME ZONE 'UTC')::smallint AS weekday,
+                extract(hour FROM ts AT TIME ZONE 'UTC')::smallint AS hour,
+                count(*) AS events
+            FROM (
+                SELECT repo_id, NULLIF(author_timestamp, committer_timestamp) AS ts
+                FROM commits_query
+                WHERE repo_id = ANY(%(repos)s::bigint[])
+                UNION ALL
+                SELECT repo_id, committer_timestamp AS ts
+                FROM commits_query
+                WHERE repo_id = ANY(%(repos)s::bigint[])
+            ) events
+            WHERE ts IS NOT NULL
+            GROUP BY 1, 2, 3
+        """,
+    },
+    "cntrb_per_file_query": {
+        # a row per (file, contributor) and per (file, reviewer) rather than comma-separated ids per file.
+        "cntrb_per_file_edges": """
+            SELECT repo_id, file_path, unnest(string_to_array(cntrb_ids, ',')) AS cntrb_id, false AS reviewer
+            FROM cntrb_per_file_query
+            WHERE repo_id = ANY(%(repos)s::bigint[])
+            UNION
+            SELECT repo_id, file_path, unnest(string_to_array(reviewer_ids, ',')) AS cntrb_id, true AS reviewer
+            FROM cntrb_per_file_query
+            WHERE repo_id = ANY(%(repos)s::bigint[])
+        """,
+    },
+}
+
+# rollup table -> source cache table
+ROLLUP_SOURCES = {rollup: source for source, rollups in ROLLUPS.items() for rollup in rollups}
+
+
+def rebuild_rollups(cache_cur, source_table: str, repolist: list[int]) -> dict[str, dict[int, int]]:
+    """
+    Recomputes the rows of each rollup of {source_table} for the repos in {repolist}.
+
+    Args:
+        cache_cur (psycopg2.extensions.cursor): cursor of the caller's cache transaction
+        source_table (str): cache table whose rows changed
+        repolist (list[int]): repos whose rows changed
+
+    Returns:
+        dict: rollup table -> {repo_id: number of rows}, for the repos that have any rows in the rollup
+    """
+    repos = list(repolist)
+    rollup_rows = {}
+    for rollup, query in ROLLUPS.get(source_table, {}).items():
+        cache_cur.execute(
+            pg_sql.SQL("DELETE FROM {tbl} WHERE repo_id = ANY(%s::bigint[])").format(tbl=pg_sql.Identifier(rollup)),
+            (repos,),
+        )
+        # rows are counted per repo as they're inserted, for the cache's size estimate (see cache_eviction).
+        cache_cur.execute(
+            pg_sql.SQL("WITH inserted AS (INSERT INTO {tbl} ").format(tbl=pg_sql.Identifier(rollup))
+            + pg_sql.SQL(query)
+            + pg_sql.SQL(" RETURNING repo_id) SELECT repo_id, count(*) FROM inserted GROUP BY repo_id"),
+            {"repos": repos},
+        )
+        rollup_rows[rollup] = dict(cache_cur.fetchall())
+        logging.warning(f"{rollup} - REBUILT {sum(rollup_rows[rollup].values())} ROWS FOR {len(repos)} REPOS")
+    return rollup_rows
+
+
+def delete_rollups(cache_cur, source_table: str, repolist: list[int]) -> None:
+    """
+    Deletes the rows of each rollup of {source_table} for the repos in {repolist}.
+
+    Args:
+        cache_cur (psycopg2.extensions.cursor): cursor of the caller's cache transaction
+        source_table (str): cache table whose rows were deleted
+        repolist (list[int]): repos whose rows were deleted
+    """
+    for rollup in ROLLUPS.get(source_table, {}):
+        cache_cur.execute(
+            pg_sql.SQL("DELETE FROM {tbl} WHERE repo_id = ANY(%s::bigint[])").format(tbl=pg_sql.Identifier(rollup)),
+            (list(repolist),),
+        )
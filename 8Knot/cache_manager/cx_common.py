@@ -4,6 +4,7 @@ Connection Common file - accessing environment variables
 import os
 import logging
 import time
+import redis
 
 # credentials to access database from environment
 try:
@@ -27,6 +28,45 @@ env_password = os.getenv("POSTGRES_PASSWORD", "password")
 env_port = os.getenv("CACHE_PORT", "5432")
 env_schema = os.getenv("CACHE_SCHEMA", "augur_data")
 
+# how query results are written to the cache: "copy" (COPY FROM STDIN) or "insert" (INSERT ... VALUES)
+env_cache_ingest_mode = os.getenv("CACHE_INGEST_MODE", "copy").lower()
+
+# uncached repos are split into up to this many shards per query, each cached in its own transaction,
+# by a pool of this many threads. CACHE_INGEST_SHARDS=1 sends all repos to Augur in one query.
+env_cache_ingest_shards = int(os.getenv("CACHE_INGEST_SHARDS", "8"))
+env_cache_ingest_workers = int(os.getenv("CACHE_INGEST_WORKERS", "4"))
+
+# bounds on the number of cache connections each process keeps open in its pool.
+# Caching threads each hold one for the length of a shard, so the max should
+# be at least CACHE_INGEST_WORKERS.
+env_cache_pool_min_conn = int(os.getenv("CACHE_POOL_MIN_CONN", "1"))
+env_cache_pool_max_conn = int(os.getenv("CACHE_POOL_MAX_CONN", "8"))
+
+# cached repos are delta-refreshed from Augur once they're older than CACHE_REFRESH_INTERVAL_HOURS
+# (0 disables refreshes). Rows from CACHE_REFRESH_LOOKBACK_DAYS before a repo's watermark are
+# re-queried too, to pick up rows that Augur collected late.
+env_cache_refresh_interval_hours = float(os.getenv("CACHE_REFRESH_INTERVAL_HOURS", "24"))
+env_cache_refresh_lookback_days = float(os.getenv("CACHE_REFRESH_LOOKBACK_DAYS", "30"))
+
+# refreshes replace all of a repo's rows once they were last fully ingested more than
+# CACHE_FULL_REFRESH_DAYS ago, to pick up changes that delta refreshes don't (0 disables).
+env_cache_full_refresh_days = float(os.getenv("CACHE_FULL_REFRESH_DAYS", "7"))
+
+# estimated size that cached data is kept within by evicting the least recently used repos
+# after new repos are cached. 0 (default) disables eviction.
+env_cache_disk_budget_gb = float(os.getenv("CACHE_DISK_BUDGET_GB", "0"))
+
+# seconds that rendered visualizations are kept in the Redis figure cache. 0 disables the figure cache.
+env_figure_cache_ttl = int(os.getenv("FIGURE_CACHE_TTL", "3600"))
+
+
+# client of the Redis cache that the figure, frame, company cluster and home metric caches share.
+# it connects lazily, from its own connection pool, the first time it's used.
+redis_cache = redis.StrictRedis(
+    host=os.getenv("REDIS_SERVICE_HOST", "redis-cache"),
+    port=os.getenv("REDIS_SERVICE_PORT", "6379"),
+    password=os.getenv("REDIS_PASSWORD", ""),
+)
 
 # purely initial startup string
 # psycopg2 connection string for cache pg instance, initialization only
@@ -47,3 +87,16 @@ db_cx_string = "dbname={} user={} password={} host={} port={}".format(
     env_augur_host,
     env_augur_port,
 )
+
+# seconds that preprocessed frames shared by several visualizations are kept in Redis. 0 disables the frame cache.
+env_frame_cache_ttl = int(os.getenv("FRAME_CACHE_TTL", "3600"))
+
+# MB of DataFrames that each worker process keeps in memory between callbacks. 0 disables the in-process frame cache.
+env_frame_memory_budget_mb = float(os.getenv("FRAME_MEMORY_BUDGET_MB", "256"))
+
+# seconds that the metric cards of the home page are cached in Redis for each repo set. 0 disables the cache.
+env_home_metrics_ttl = int(os.getenv("HOME_METRICS_TTL", "3600"))
+
+# seconds that the clusters of company names on the affiliation page are memoized in Redis for.
+# They only depend on the names, not on the cached data, so they can be kept long. 0 disables the memo.
+env_company_clusters_ttl = int(os.getenv("COMPANY_CLUSTERS_TTL", "86400"))
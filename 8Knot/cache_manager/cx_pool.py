@@ -0,0 +1,155 @@
+"""
+Process-wide pool of connections to the postgres cache.
+
+Visualization callbacks poll the cache bookkeeping twice a second while
+they wait for data, so opening a fresh connection for every call means
+a TCP handshake and authentication per poll. Connections are instead
+borrowed from a pool that lives for the lifetime of the process.
+
+Celery prefork children inherit the parent's memory, including any
+pool it had opened. A connection can't be shared across processes,
+so the pool is keyed on the PID that created it and each child lazily
+opens its own.
+"""
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from psycopg2.pool import ThreadedConnectionPool
+
+# requires relative import syntax "import .cx_common" because
+# other files importing cx_pool need to know how to resolve
+# .cx_common- interpreter is invoked at a higher level, so relative
+# import required.
+from .cx_common import cache_cx_string, env_cache_pool_min_conn, env_cache_pool_max_conn
+
+_lock = threading.Lock()
+_pool: ThreadedConnectionPool = None
+_pool_pid: int = None
+_slots: threading.BoundedSemaphore = None
+_stats: dict = None
+
+# pools inherited from a parent process. Their connections belong to the
+# parent, and closing them here would end the parent's sessions, so they're
+# kept referenced rather than closed or garbage collected.
+_inherited_pools: list = []
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    """
+    (private)
+    Returns this process's pool, creating it on first use in each process.
+    """
+    global _pool, _pool_pid, _slots, _stats
+
+    pid = os.getpid()
+    if _pool_pid == pid:
+        return _pool
+
+    with _lock:
+        if _pool_pid != pid:
+            if _pool is not None:
+                _inherited_pools.append(_pool)
+
+            logging.warning(
+                f"CACHE POOL - OPENING POOL FOR PID {pid} ({env_cache_pool_min_conn}-{env_cache_pool_max_conn} CONNECTIONS)"
+            )
+            _pool = ThreadedConnectionPool(env_cache_pool_min_conn, env_cache_pool_max_conn, cache_cx_string)
+            _slots = threading.BoundedSemaphore(env_cache_pool_max_conn)
+            # the pool opens min_conn connections up front, and they start out idle.
+            _stats = {
+                "open": env_cache_pool_min_conn,
+                "idle": env_cache_pool_min_conn,
+                "checkouts": 0,
+                "waits": 0,
+                "discarded": 0,
+                "in_use": 0,
+                "peak_in_use": 0,
+            }
+            _pool_pid = pid
+
+    return _pool
+
+
+@contextmanager
+def cache_connection():
+    """
+    Borrows a connection to the cache from the pool.
+
+    Behaves like "with pg.connect(cache_cx_string) as conn": the
+    transaction is committed if the block succeeds and rolled back if
+    it raises. The connection is then returned to the pool rather than
+    closed. If all connections are in use, waits for one to be returned.
+
+    Yields:
+        psycopg2.extensions.connection: connection to the cache
+    """
+    pool = _get_pool()
+    slots, stats = _slots, _stats
+
+    if not slots.acquire(blocking=False):
+        with _lock:
+            stats["waits"] += 1
+        slots.acquire()
+
+    # the pool serializes getconn and putconn on its own lock, so holding ours
+    # around them too keeps the open and idle counts in step with the pool.
+    with _lock:
+        try:
+            conn = pool.getconn()
+        except Exception:
+            slots.release()
+            raise
+
+        # the pool hands out an idle connection if it has one, and otherwise opens a new one.
+        if stats["idle"] > 0:
+            stats["idle"] -= 1
+        else:
+            stats["open"] += 1
+        stats["checkouts"] += 1
+        stats["in_use"] += 1
+        stats["peak_in_use"] = max(stats["peak_in_use"], stats["in_use"])
+
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        # connections that were broken, e.g. by a cache restart, aren't reused.
+        broken = conn.closed != 0
+        with _lock:
+            pool.putconn(conn, close=broken)
+
+            # the pool keeps up to min_conn healthy connections idle and closes the rest.
+            stats["in_use"] -= 1
+            if broken:
+                stats["discarded"] += 1
+                stats["open"] -= 1
+            elif stats["idle"] < env_cache_pool_min_conn:
+                stats["idle"] += 1
+            else:
+                stats["open"] -= 1
+        slots.release()
+
+
+def pool_stats() -> dict:
+    """
+    Utilization of this process's cache connection pool.
+
+    Returns:
+        dict: pid, configured min/max connections, connections currently
+            open (idle + in use), and counters of checkouts, checkouts that
+            had to wait for a free connection, broken connections discarded,
+            and the most connections in use at once.
+    """
+    _get_pool()
+    with _lock:
+        return {
+            "pid": _pool_pid,
+            "min_conn": env_cache_pool_min_conn,
+            "max_conn": env_cache_pool_max_conn,
+            **_stats,
+        }
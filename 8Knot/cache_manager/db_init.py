@@ -52,21 +52,124 @@ Here's a list of types that postgres defines:
 https://www.postgresql.org/docs/current/datatype.html
 
 Generally, 'int' is good for integers,
+'bigint' is good for Augur's id columns (repo_id, pull_request_id, ...),
 'float4' is good for normal floats,
 'float8' is good for larger precision floats,
+'timestamptz' is best for timestamps,
 'text' is best for text strings.
     - why we aren't using 'varchar':
     https://wiki.postgresql.org/wiki/Don%27t_Do_This#Don.27t_use_varchar.28n.29_by_default
+
+Timestamps should be stored as 'timestamptz' rather than 'text' so that
+retrieve_from_cache hands visualizations datetime64 columns directly.
+The augur_cache database's timezone is set to UTC, so the (UTC) timestamps
+our queries return from Augur are stored without shifting.
+
+Finally, if the table is read with a 'WHERE repo_id IN ...' filter (all of
+them are), add an entry for it in CACHE_INDEXES below so that reads don't
+require a sequential scan of the whole table.
 """
 
 import logging
 import sys
 import psycopg2 as pg
+from psycopg2 import sql as pg_sql
 import time
 
 # doesn't use relative import syntax "import .cx_common" because
 # cx_common is a neighbor of script, thus is available in PYTHON_PATH
 from cx_common import init_cx_string, cache_cx_string
+from cache_rollups import ROLLUPS, rebuild_rollups
+
+# (table, timestamp column) for each cache table.
+# tables are indexed on (repo_id, <timestamp column>) when they have
+# a primary timestamp column, otherwise on (repo_id) alone.
+CACHE_INDEXES = [
+    ("commits_query", "author_timestamp"),
+    ("issues_query", "created_at"),
+    ("prs_query", "created_at"),
+    ("affiliation_query", "created_at"),
+    ("contributors_query", "created_at"),
+    ("issue_assignee_query", "created_at"),
+    ("pr_assignee_query", "created_at"),
+    ("repo_languages_query", None),
+    ("package_version_query", None),
+    ("repo_releases_query", "release_published_at"),
+    ("ossf_score_query", None),
+    ("repo_info_query", None),
+    ("pr_response_query", "pr_created_at"),
+]
+
+# columns that older versions of this file created as 'text', 'int' or 'timestamp'.
+# tables that already exist in the cache are converted in-place to
+# these types on startup, see _migrate_column_types.
+COLUMN_TYPE_MIGRATIONS = {
+    "commits_query": {
+        "repo_id": "bigint",
+        "author_timestamp": "timestamptz",
+        "committer_timestamp": "timestamptz",
+    },
+    "issues_query": {
+        "created_at": "timestamptz",
+        "closed_at": "timestamptz",
+    },
+    "prs_query": {
+        "repo_id": "bigint",
+        "pull_request_id": "bigint",
+        "pr_src_number": "bigint",
+        "created_at": "timestamptz",
+        "closed_at": "timestamptz",
+        "merged_at": "timestamptz",
+    },
+    "affiliation_query": {
+        "created_at": "timestamptz",
+        "repo_id": "bigint",
+    },
+    "contributors_query": {
+        "repo_id": "bigint",
+        "created_at": "timestamptz",
+    },
+    "issue_assignee_query": {
+        "repo_id": "bigint",
+        "created_at": "timestamptz",
+        "closed_at": "timestamptz",
+        "assign_date": "timestamptz",
+    },
+    "pr_assignee_query": {
+        "pull_request_id": "bigint",
+        "repo_id": "bigint",
+        "created_at": "timestamptz",
+        "closed_at": "timestamptz",
+        "assign_date": "timestamptz",
+    },
+    "repo_languages_query": {"repo_id": "bigint"},
+    "package_version_query": {"repo_id": "bigint"},
+    "repo_releases_query": {
+        "repo_id": "bigint",
+        "release_created_at": "timestamptz",
+        "release_published_at": "timestamptz",
+        "release_updated_at": "timestamptz",
+    },
+    "ossf_score_query": {"repo_id": "bigint"},
+    "repo_info_query": {"repo_id": "bigint"},
+    "pr_response_query": {
+        "pull_request_id": "bigint",
+        "repo_id": "bigint",
+        "msg_timestamp": "timestamptz",
+        "pr_created_at": "timestamptz",
+        "pr_closed_at": "timestamptz",
+    },
+    "cache_bookkeeping": {
+        "repo_id": "bigint",
+        "ts_cached": "timestamptz",
+    },
+}
+
+# names that information_schema.columns.data_type reports for the types above.
+_INFORMATION_SCHEMA_TYPES = {
+    "bigint": "bigint",
+    "timestamptz": "timestamp with time zone",
+}
 
 
 def _connect_with_retry(connection_string, max_retries=5, retry_delay=3):
@@ -128,6 +231,10 @@ def _create_application_database() -> None:
         logging.warning("CREATING augur_cache DATABASE")
         cur.execute("CREATE DATABASE augur_cache")
 
+    # timestamps from Augur are UTC but arrive without a timezone. New sessions
+    # on augur_cache interpret them as UTC when they're written to timestamptz columns.
+    cur.execute("ALTER DATABASE augur_cache SET timezone TO 'UTC'")
+
     conn.commit()
     cur.close()
     conn.close()
@@ -140,24 +247,30 @@ def _create_application_tables() -> None:
     Tables created:
         - commits
         - cache_bookkeeping
+        - cache_watermarks
+        - cache_access
+        - rollups of cache tables, see cache_rollups.py
     """
-    # TODO: timestamps being stored as strings- don't need to do that anymore.
 
     # connect to application database
     conn = _connect_with_retry(cache_cx_string)
 
     with conn.cursor() as cur:
+        # ALTER DATABASE ... SET timezone only applies to new sessions,
+        # so set it explicitly for any text->timestamptz migrations below.
+        cur.execute("SET TIME ZONE 'UTC'")
+
         # create tables if they don't already exist.
         # TODO: id->repo_id, commits->commit_id
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS commits_query(
-                repo_id int,
+                repo_id bigint,
                 commit_hash text, -- this is the commit hash, so it's base64 hash.
                 author_email text,
-                author_date text,
-                author_timestamp text,
-                committer_timestamp text)
+                author_date text, -- varchar 'YYYY-MM-DD' in Augur, kept as-is.
+                author_timestamp timestamptz,
+                committer_timestamp timestamptz)
             """
         )
         logging.warning("CREATED commits TABLE")
@@ -172,8 +285,8 @@ def _create_application_tables() -> None:
                 gh_issue bigint,
                 reporter_id text,
                 issue_closer text,
-                created_at text,
-                closed_at text
+                created_at timestamptz,
+                closed_at timestamptz
             )
             """
         )
@@ -182,14 +295,14 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS prs_query(
-                repo_id int,
+                repo_id bigint,
                 repo_name text,
-                pull_request_id int,
-                pr_src_number int,
+                pull_request_id bigint,
+                pr_src_number bigint,
                 cntrb_id text,
-                created_at text,
-                closed_at text,
-                merged_at text
+                created_at timestamptz,
+                closed_at timestamptz,
+                merged_at timestamptz
             )
             """
         )
@@ -199,8 +312,8 @@ def _create_application_tables() -> None:
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS affiliation_query(
                 cntrb_id text,
-                created_at text,
-                repo_id int,
+                created_at timestamptz,
+                repo_id bigint,
                 login text,
                 action text,
                 rank int,
@@ -214,10 +327,10 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS contributors_query(
-                repo_id int,
+                repo_id bigint,
                 repo_name text,
                 cntrb_id text,
-                created_at text,
+                created_at timestamptz,
                 login text,
                 action text,
                 rank int
@@ -230,10 +343,10 @@ def _create_application_tables() -> None:
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS issue_assignee_query(
                 issue_id text,
-                repo_id int,
-                created_at text,
-                closed_at text,
-                assign_date text,
+                repo_id bigint,
+                created_at timestamptz,
+                closed_at timestamptz,
+                assign_date timestamptz,
                 assignment_action text,
                 assignee text
             )
@@ -244,11 +357,11 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS pr_assignee_query(
-                pull_request_id int,
-                repo_id int,
-                created_at text,
-                closed_at text,
-                assign_date text,
+                pull_request_id bigint,
+                repo_id bigint,
+                created_at timestamptz,
+                closed_at timestamptz,
+                assign_date timestamptz,
                 assignment_action text,
                 assignee text
             )
@@ -297,7 +410,7 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS repo_languages_query(
-                repo_id int,
+                repo_id bigint,
                 programming_language text,
                 code_lines int,
                 files int
@@ -309,7 +422,7 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS package_version_query(
-                repo_id int,
+                repo_id bigint,
                 name text,
                 current_release_date text,
                 latest_release_date text,
@@ -323,11 +436,11 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS repo_releases_query(
-                repo_id int,
+                repo_id bigint,
                 release_name text,
-                release_created_at text,
-                release_published_at text,
-                release_updated_at text
+                release_created_at timestamptz,
+                release_published_at timestamptz,
+                release_updated_at timestamptz
             )
             """
         )
@@ -336,7 +449,7 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS ossf_score_query(
-                repo_id int,
+                repo_id bigint,
                 name text,
                 score float4,
                 data_collection_date timestamp
@@ -348,7 +461,7 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS repo_info_query(
-                repo_id int,
+                repo_id bigint,
                 issues_enabled text,
                 fork_count int,
                 watchers_count int,
@@ -366,35 +479,309 @@ def _create_application_tables() -> None:
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS pr_response_query(
-                pull_request_id int,
-                repo_id int,
+                pull_request_id bigint,
+                repo_id bigint,
                 cntrb_id text,
-                msg_timestamp text,
+                msg_timestamp timestamptz,
                 msg_cntrb_id text,
-                pr_created_at text,
-                pr_closed_at text
+                pr_created_at timestamptz,
+                pr_closed_at timestamptz
             )
             """
         )
         logging.warning("CREATED pr_response_query TABLE")
 
+        # rollups of commits_query, see cache_rollups.py.
+        cur.execute(
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS commits_daily_rollup(
+                repo_id bigint,
+                day date,
+                commits bigint,
+                PRIMARY KEY (repo_id, day)
+            )
+            """
+        )
+        logging.warning("CREATED commits_daily_rollup TABLE")
+
+        cur.execute(
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS commits_activity_rollup(
+                repo_id bigint,
+                weekday smallint, -- ISO weekday, 1 is Monday.
+                hour smallint,
+                events bigint,
+                PRIMARY KEY (repo_id, weekday, hour)
+            )
+            """
+        )
+        logging.warning("CREATED commits_activity_rollup TABLE")
+
+        # rollup of cntrb_per_file_query, see cache_rollups.py.
+        # stays empty while the codebase queries are disabled.
+        cur.execute(
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS cntrb_per_file_edges(
+                repo_id bigint,
+                file_path text,
+                cntrb_id text,
+                reviewer boolean, -- reviewed a PR that changed the file, rather than opened it.
+                PRIMARY KEY (repo_id, file_path, cntrb_id, reviewer)
+            )
+            """
+        )
+        logging.warning("CREATED cntrb_per_file_edges TABLE")
+
         cur.execute(
             """
             CREATE UNLOGGED TABLE IF NOT EXISTS cache_bookkeeping(
                 cache_func text,
-                repo_id int,
-                ts_cached timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+                repo_id bigint,
+                ts_cached timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                n_rows bigint, -- rows of the repo in the cache table, see cache_eviction.py.
+                rollup_rows jsonb, -- rows of the repo in each of the cache table's rollups.
+                PRIMARY KEY (cache_func, repo_id)
             )
             """
         )
         logging.warning("CREATED cache_bookkeeping TABLE")
 
+        # delta refresh high-water mark of each (table, repo) pair,
+        # see cache_facade.refresh_query_results.
+        cur.execute(
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS cache_watermarks(
+                cache_func text,
+                repo_id bigint,
+                watermark timestamptz,
+                refreshed_at timestamptz,
+                PRIMARY KEY (cache_func, repo_id)
+            )
+            """
+        )
+        logging.warning("CREATED cache_watermarks TABLE")
+
+        # last read of each (table, repo) pair, for LRU eviction.
+        # see cache_eviction.py
+        cur.execute(
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS cache_access(
+                cache_func text,
+                repo_id bigint,
+                last_access timestamptz NOT NULL DEFAULT now(),
+                PRIMARY KEY (cache_func, repo_id)
+            )
+            """
+        )
+        logging.warning("CREATED cache_access TABLE")
+
+        # convert tables created by older versions of this file.
+        _migrate_column_types(cur)
+        _add_bookkeeping_key(cur)
+
+        _create_cache_indexes(cur)
+
+        _backfill_rollups(cur)
+        _backfill_row_counts(cur)
+
         # commit changes, all-or-nothing.
         conn.commit()
 
     logging.warning("ALL TABLES COMMITTED SUCCESSFULLY")
 
 
+def _migrate_column_types(cur) -> None:
+    """
+    Converts columns of already-existing cache tables to the types
+    listed in COLUMN_TYPE_MIGRATIONS.
+
+    Columns that already have the target type are skipped, so this
+    is a no-op after the first successful run.
+
+    Args:
+        cur (psycopg2 cursor): cursor in the initialization transaction.
+    """
+    for table, columns in COLUMN_TYPE_MIGRATIONS.items():
+        cur.execute(
+            """
+            SELECT column_name, data_type
+            FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+            """,
+            (table,),
+        )
+        current_types = dict(cur.fetchall())
+
+        for column, target_type in columns.items():
+            if current_types.get(column) in (None, _INFORMATION_SCHEMA_TYPES[target_type]):
+                continue
+
+            logging.warning(f"MIGRATING {table}.{column}: {current_types[column]} -> {target_type}")
+
+            if current_types[column] == "text":
+                # empty strings can't be cast to timestamptz, they're the same as NULL to us.
+                using = pg_sql.SQL("NULLIF({col}, '')::{typ}")
+            else:
+                using = pg_sql.SQL("{col}::{typ}")
+            using = using.format(col=pg_sql.Identifier(column), typ=pg_sql.SQL(target_type))
+            cur.execute(
+                pg_sql.SQL("ALTER TABLE {tbl} ALTER COLUMN {col} TYPE {typ} USING {using}").format(
+                    tbl=pg_sql.Identifier(table),
+                    col=pg_sql.Identifier(column),
+                    typ=pg_sql.SQL(target_type),
+                    using=using,
+                )
+            )
+
+
+def _add_bookkeeping_key(cur) -> None:
+    """
+    Older versions of this file created cache_bookkeeping without a key,
+    so it could hold any number of rows for a (cache_func, repo_id) pair.
+    Removes the duplicates and adds the (cache_func, repo_id) primary key
+    if the table doesn't have one yet.
+
+    Args:
+        cur (psycopg2 cursor): cursor in the initialization transaction.
+    """
+    cur.execute(
+        """
+        SELECT 1
+        FROM pg_constraint
+        WHERE conrelid = 'cache_bookkeeping'::regclass AND contype = 'p'
+        """
+    )
+    if cur.fetchone() is not None:
+        return
+
+    logging.warning("MIGRATING cache_bookkeeping: ADDING (cache_func, repo_id) PRIMARY KEY")
+
+    # keep the earliest record of each pair.
+    cur.execute(
+        """
+        DELETE FROM cache_bookkeeping a
+        USING cache_bookkeeping b
+        WHERE a.cache_func = b.cache_func
+            AND a.repo_id = b.repo_id
+            AND (a.ts_cached, a.ctid) > (b.ts_cached, b.ctid)
+        """
+    )
+    cur.execute("DELETE FROM cache_bookkeeping WHERE cache_func IS NULL OR repo_id IS NULL")
+    cur.execute("ALTER TABLE cache_bookkeeping ADD PRIMARY KEY (cache_func, repo_id)")
+
+
+def _create_cache_indexes(cur) -> None:
+    """
+    Creates the (repo_id) or (repo_id, <timestamp column>) index
+    for each table in CACHE_INDEXES if it doesn't already exist.
+
+    Args:
+        cur (psycopg2 cursor): cursor in the initialization transaction.
+    """
+    for table, ts_column in CACHE_INDEXES:
+        if ts_column is None:
+            columns = [pg_sql.Identifier("repo_id")]
+            index_name = f"{table}_repo_id_idx"
+        else:
+            columns = [pg_sql.Identifier("repo_id"), pg_sql.Identifier(ts_column)]
+            index_name = f"{table}_repo_id_{ts_column}_idx"
+
+        cur.execute(
+            pg_sql.SQL("CREATE INDEX IF NOT EXISTS {idx} ON {tbl} ({cols})").format(
+                idx=pg_sql.Identifier(index_name),
+                tbl=pg_sql.Identifier(table),
+                cols=pg_sql.SQL(", ").join(columns),
+            )
+        )
+        logging.warning(f"CREATED {index_name} INDEX")
+
+
+def _backfill_rollups(cur) -> None:
+    """
+    Builds the rollups of repos that were cached before their rollup
+    tables existed. Repos whose rollups are empty are rebuilt, which is
+    a no-op for repos that have no rows to roll up.
+
+    Args:
+        cur (psycopg2 cursor): cursor in the initialization transaction.
+    """
+    for source, rollups in ROLLUPS.items():
+        repos = set()
+        for rollup in rollups:
+            cur.execute(
+                pg_sql.SQL(
+                    """
+                    SELECT cb.repo_id
+                    FROM cache_bookkeeping cb
+                    WHERE cb.cache_func = %s
+                        AND NOT EXISTS (SELECT 1 FROM {tbl} r WHERE r.repo_id = cb.repo_id)
+                    """
+                ).format(tbl=pg_sql.Identifier(rollup)),
+                (source,),
+            )
+            repos.update(r[0] for r in cur.fetchall())
+
+        if repos:
+            logging.warning(f"BACKFILLING ROLLUPS OF {source} FOR {len(repos)} REPOS")
+            rebuild_rollups(cur, source, repos)
+
+
+def _backfill_row_counts(cur) -> None:
+    """
+    Older versions of this file created cache_bookkeeping without row
+    counts, which cache_facade now records when a repo is cached. Adds the
+    columns if they don't exist yet, and counts the rows of pairs that
+    were cached before, in their table and in each of its rollups (e.g.
+    rollups added since the pair was cached).
+
+    Args:
+        cur (psycopg2 cursor): cursor in the initialization transaction.
+    """
+    cur.execute(
+        """
+        ALTER TABLE cache_bookkeeping
+            ADD COLUMN IF NOT EXISTS n_rows bigint,
+            ADD COLUMN IF NOT EXISTS rollup_rows jsonb
+        """
+    )
+
+    cur.execute(
+        """
+        SELECT DISTINCT cache_func
+        FROM cache_bookkeeping
+        WHERE n_rows IS NULL AND to_regclass(quote_ident(cache_func)) IS NOT NULL
+        """
+    )
+    for (table,) in cur.fetchall():
+        logging.warning(f"BACKFILLING ROW COUNTS OF {table}")
+        cur.execute(
+            pg_sql.SQL(
+                """
+                UPDATE cache_bookkeeping cb
+                SET n_rows = (SELECT count(*) FROM {tbl} t WHERE t.repo_id = cb.repo_id)
+                WHERE cb.cache_func = %s AND cb.n_rows IS NULL
+                """
+            ).format(tbl=pg_sql.Identifier(table)),
+            (table,),
+        )
+
+    for source, rollups in ROLLUPS.items():
+        for rollup in rollups:
+            cur.execute(
+                pg_sql.SQL(
+                    """
+                    UPDATE cache_bookkeeping cb
+                    SET rollup_rows = COALESCE(cb.rollup_rows, '{{}}'::jsonb)
+                        || jsonb_build_object(%s, (SELECT count(*) FROM {tbl} r WHERE r.repo_id = cb.repo_id))
+                    WHERE cb.cache_func = %s AND NOT COALESCE(cb.rollup_rows ? %s, false)
+                    """
+                ).format(tbl=pg_sql.Identifier(rollup)),
+                (rollup, source, rollup),
+            )
+            if cur.rowcount:
+                logging.warning(f"BACKFILLED ROW COUNTS OF {rollup} FOR {cur.rowcount} REPOS")
+
+
 def db_init() -> int:
     try:
         # don't need to check return values- errors propogate as exceptions,
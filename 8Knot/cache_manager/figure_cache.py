@@ -0,0 +1,148 @@
+"""
+Redis cache of the outputs of visualization callbacks.
+
+Visualizations are recomputed from the cached rows every time they're
+rendered, even though popular repo sets are rendered many times a day
+with the same inputs. The outputs of callbacks wrapped with
+@cached_figure are stored in Redis, keyed by:
+
+    - the visualization's id,
+    - the set of repos, regardless of their order,
+    - the values of the callback's other inputs (its controls), and
+    - the version of the cached data the callback reads (see cache_facade.cache_version).
+
+Because the data version is part of the key, outputs are invalidated
+as soon as any of the underlying (cache_func, repo_id) pairs is cached,
+refreshed, or evicted. Entries that aren't read again expire after
+FIGURE_CACHE_TTL seconds.
+"""
+import json
+import pickle
+import hashlib
+import logging
+import functools
+import redis
+import dash
+
+# requires relative import syntax "import .cx_common" because
+# other files importing figure_cache need to know how to resolve
+# .cx_common- interpreter is invoked at a higher level, so relative
+# import required.
+from .cx_common import env_figure_cache_ttl, redis_cache
+from . import cache_facade as cf
+
+# hash of hit and miss counts, with fields "<viz_id>:hits" and "<viz_id>:misses".
+STATS_KEY = "figure_cache:stats"
+
+
+def repo_set_key(repolist: list[int]) -> str:
+    """
+    Hash of a set of repos that doesn't depend on their order or on duplicates.
+
+    Args:
+        repolist (list[int]): repo_ids
+
+    Returns:
+        str: hex digest
+    """
+    canonical = ",".join(str(r) for r in sorted({int(r) for r in repolist}))
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
+def _controls_key(controls: tuple) -> str:
+    """
+    (private)
+    Hash of the values of a callback's inputs, other than its repos.
+    """
+    canonical = json.dumps(controls, sort_keys=True, default=str)
+    return hashlib.md5(canonical.encode("utf-8")).hexdigest()
+
+
+def cached_figure(viz_id: str, tables: list[str], ttl: int = env_figure_cache_ttl):
+    """
+    Decorator that caches the outputs of a visualization callback in Redis.
+
+    The callback's first input must be the list of repos that it reads from
+    each table in {tables}. Outputs that include dash.no_update aren't cached.
+    If Redis is unavailable, the callback is run as if it weren't decorated.
+
+    Args:
+        viz_id (str): id of the visualization, unique across the app
+        tables (list[str]): cache tables that the callback reads
+        ttl (int, optional): seconds before an entry expires. Defaults to FIGURE_CACHE_TTL, 0 disables caching.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(repolist, *controls):
+            if ttl <= 0 or not repolist:
+                return fn(repolist, *controls)
+
+            # the output can only be cached against a version of the data once
+            # the data is cached. The callback's own wait then returns immediately.
+            func_repos = {table: repolist for table in tables}
+            cf.wait_for_cached_many(func_repos)
+            version = cf.cache_version(func_repos)
+            if version is None:
+                return fn(repolist, *controls)
+
+            key = f"figure:{viz_id}:{repo_set_key(repolist)}:{_controls_key(controls)}:{version}"
+            try:
+                cached = redis_cache.get(key)
+            except redis.exceptions.RedisError as e:
+                logging.warning(f"{viz_id} - FIGURE CACHE UNAVAILABLE: {e}")
+                return fn(repolist, *controls)
+
+            if cached is not None:
+                _count(viz_id, "hits")
+                logging.warning(f"{viz_id} - FIGURE CACHE HIT")
+                return pickle.loads(cached)
+
+            _count(viz_id, "misses")
+            output = fn(repolist, *controls)
+
+            if not _has_no_update(output):
+                try:
+                    redis_cache.set(key, pickle.dumps(output), ex=ttl)
+                except redis.exceptions.RedisError as e:
+                    logging.warning(f"{viz_id} - FIGURE CACHE UNAVAILABLE: {e}")
+
+            return output
+
+        return wrapper
+
+    return decorator
+
+
+def _has_no_update(output) -> bool:
+    """
+    (private)
+    Whether a callback's output, or any of its outputs, is dash.no_update.
+    """
+    outputs = output if isinstance(output, (tuple, list)) else [output]
+    return any(isinstance(o, type(dash.no_update)) for o in outputs)
+
+
+def _count(viz_id: str, outcome: str) -> None:
+    """
+    (private)
+    Increments the hit or miss counter of {viz_id}.
+    """
+    try:
+        redis_cache.hincrby(STATS_KEY, f"{viz_id}:{outcome}", 1)
+    except redis.exceptions.RedisError:
+        pass
+
+
+def figure_cache_stats() -> dict:
+    """
+    Hit and miss counts of each cached visualization, across all workers.
+
+    Returns:
+        dict: {viz_id: {"hits": int, "misses": int}}
+    """
+    stats = {}
+    for field, count in redis_cache.hgetall(STATS_KEY).items():
+        viz_id, outcome = field.decode().rsplit(":", 1)
+        stats.setdefault(viz_id, {"hits": 0, "misses": 0})[outcome] = int(count)
+    return stats
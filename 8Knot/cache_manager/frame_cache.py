@@ -0,0 +1,146 @@
+"""
+Redis cache of preprocessed DataFrames that many visualizations share.
+
+Some cache tables, like the contributors table, are read in full by a
+dozen visualization callbacks, each of which then runs the same
+preprocessing on the same rows. retrieve_preprocessed() stores the
+output of that preprocessing once per (table, preprocessing, repo set)
+as Arrow IPC bytes in Redis, so the other callbacks on the page
+deserialize the typed frame instead of reading and cleaning it again.
+
+Entries are keyed by the version of the cached data they were built
+from (see cache_facade.cache_version), so they're invalidated as soon
+as any of the underlying repos is cached, refreshed, or evicted.
+Entries that aren't read again expire after FRAME_CACHE_TTL seconds.
+"""
+import os
+import time
+import logging
+import redis
+import pandas as pd
+import pyarrow as pa
+
+# requires relative import syntax "import .cx_common" because
+# other files importing frame_cache need to know how to resolve
+# .cx_common- interpreter is invoked at a higher level, so relative
+# import required.
+from .cx_common import env_frame_cache_ttl, redis_cache
+from . import cache_facade as cf
+from .figure_cache import repo_set_key
+from .frame_lru import local_frames
+
+# seconds that a callback waits for another process that's already
+# building the same frame before building it itself.
+BUILD_WAIT_SECONDS = 30
+BUILD_POLL_SECONDS = 0.1
+
+
+def retrieve_preprocessed(
+    tablename: str, repolist: list[int], preprocess, ttl: int = env_frame_cache_ttl
+) -> pd.DataFrame:
+    """
+    Gets all rows of {tablename} for the repos in {repolist}, as returned
+    by preprocess(retrieve_from_cache(tablename, repolist)).
+
+    The preprocessed frame is shared through Redis by every caller that
+    passes the same table, preprocessing function, and set of repos.
+    If another process is already building it, waits for that process
+    rather than building it concurrently. If Redis is unavailable, the
+    frame is built as if it weren't cached.
+
+    The data must already be cached, i.e. callers wait for it with
+    cache_facade.wait_for_cached first.
+
+    Args:
+        tablename (str): cache table to read from
+        repolist (list[int]): repo_ids to get results for
+        preprocess (function): takes and returns a DataFrame. Must be a module-level
+            function, because its name is part of the key.
+        ttl (int, optional): seconds before an entry expires. Defaults to FRAME_CACHE_TTL, 0 disables caching.
+
+    Returns:
+        pd.DataFrame: preprocessed rows. Each call returns its own copy.
+    """
+    if ttl <= 0 or not repolist:
+        return _build(tablename, repolist, preprocess)
+
+    version = cf.cache_version({tablename: repolist})
+    if version is None:
+        return _build(tablename, repolist, preprocess)
+
+    key = f"frame:{tablename}:{preprocess.__module__}.{preprocess.__name__}:{repo_set_key(repolist)}:{version}"
+    lock_key = f"{key}:building"
+
+    # frames this process already has don't need to be read from Redis.
+    df = local_frames.get(key, version)
+    if df is not None:
+        return df
+
+    owns_lock = False
+    try:
+        deadline = time.monotonic() + BUILD_WAIT_SECONDS
+        while True:
+            cached = redis_cache.get(key)
+            if cached is not None:
+                logging.warning(f"{tablename} - FRAME CACHE HIT")
+                df = _from_ipc(cached)
+                local_frames.put(key, version, df)
+                return df
+
+            # only one process builds the frame, the others wait for it to be stored.
+            owns_lock = bool(redis_cache.set(lock_key, os.getpid(), nx=True, ex=BUILD_WAIT_SECONDS))
+            if owns_lock:
+                break
+            if time.monotonic() > deadline:
+                logging.warning(f"{tablename} - FRAME CACHE BUILD WAIT TIMED OUT")
+                break
+            time.sleep(BUILD_POLL_SECONDS)
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"{tablename} - FRAME CACHE UNAVAILABLE: {e}")
+        return _build(tablename, repolist, preprocess)
+
+    logging.warning(f"{tablename} - FRAME CACHE MISS")
+    try:
+        df = _build(tablename, repolist, preprocess)
+        try:
+            redis_cache.set(key, _to_ipc(df), ex=ttl)
+        except (redis.exceptions.RedisError, pa.ArrowException) as e:
+            logging.warning(f"{tablename} - FRAME CACHE NOT STORED: {e}")
+        local_frames.put(key, version, df)
+    finally:
+        # waiting processes stop waiting and build the frame themselves if this one failed.
+        if owns_lock:
+            try:
+                redis_cache.delete(lock_key)
+            except redis.exceptions.RedisError:
+                pass
+
+    return df
+
+
+def _build(tablename: str, repolist: list[int], preprocess) -> pd.DataFrame:
+    """
+    (private)
+    Reads {tablename} from the postgres cache and preprocesses it.
+    """
+    return preprocess(cf.retrieve_from_cache(tablename=tablename, repolist=repolist))
+
+
+def _to_ipc(df: pd.DataFrame) -> bytes:
+    """
+    (private)
+    Serializes {df} as an Arrow IPC stream. The index isn't kept.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _from_ipc(data: bytes) -> pd.DataFrame:
+    """
+    (private)
+    Deserializes a DataFrame written by _to_ipc.
+    """
+    return pa.ipc.open_stream(pa.py_buffer(data)).read_all().to_pandas()
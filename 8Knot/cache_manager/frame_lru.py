@@ -0,0 +1,132 @@
+"""
+Per-process LRU cache of DataFrames read from the postgres cache.
+
+Callback workers read and decode the same rows again every time a user
+changes one of a visualization's controls, even though the repos and
+their cached data haven't changed. Frames returned by
+cache_facade.retrieve_from_cache and frame_cache.retrieve_preprocessed
+are kept in the memory of the worker process that read them, up to
+FRAME_MEMORY_BUDGET_MB, and the least recently used frames are dropped
+first.
+
+Entries are stored along with the version of the cached data they were
+read from (see cache_facade.cache_version). An entry whose version no
+longer matches is treated as a miss and replaced, so frames are
+invalidated whenever any of their (cache_func, repo_id) pairs is cached,
+refreshed, or evicted.
+"""
+import logging
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# requires relative import syntax "import .cx_common" because
+# other files importing frame_lru need to know how to resolve
+# .cx_common- interpreter is invoked at a higher level, so relative
+# import required.
+from .cx_common import env_frame_memory_budget_mb
+
+
+class FrameLRU:
+    """
+    Thread-safe LRU cache of DataFrames, bounded by their deep memory usage.
+
+    Frames are copied on the way in and on the way out, so callers
+    can modify the frames they're given without affecting the cache.
+
+    Attributes:
+        budget_bytes : (int) most bytes of frames held at once. 0 disables the cache.
+        _entries : (private) OrderedDict of key -> (version, frame, bytes), least recently used first
+        _lock : (private) threading.Lock guarding _entries and _stats
+        _stats : (private) dict of hit, miss, and eviction counters
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key, version: str) -> pd.DataFrame:  # or None
+        """
+        Gets a copy of the frame stored under {key}, if it was read from {version}.
+
+        Args:
+            key (hashable): identifies the frame
+            version (str): current version of the data the frame is read from
+
+        Returns:
+            pd.DataFrame | None: copy of the frame, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self._stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            frame = entry[1]
+
+        return frame.copy()
+
+    def put(self, key, version: str, frame: pd.DataFrame) -> None:
+        """
+        Stores a copy of {frame} under {key}, evicting the least recently used
+        frames until it fits. Frames larger than the whole budget aren't stored.
+
+        Args:
+            key (hashable): identifies the frame
+            version (str): version of the data the frame was read from
+            frame (pd.DataFrame): frame to store
+        """
+        if self.budget_bytes <= 0:
+            return
+
+        n_bytes = int(frame.memory_usage(deep=True).sum())
+        if n_bytes > self.budget_bytes:
+            logging.warning(f"FRAME LRU - {n_bytes} BYTE FRAME EXCEEDS BUDGET, NOT STORED")
+            return
+
+        frame = frame.copy()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._resident_bytes -= old[2]
+
+            while self._entries and self._resident_bytes + n_bytes > self.budget_bytes:
+                _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+                self._resident_bytes -= evicted_bytes
+                self._stats["evictions"] += 1
+
+            self._entries[key] = (version, frame, n_bytes)
+            self._resident_bytes += n_bytes
+
+    def clear(self) -> None:
+        """
+        Drops all frames. Counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._resident_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Utilization of the cache.
+
+        Returns:
+            dict: counters of hits, misses, and evictions, the number of
+                frames held, and the bytes they use out of the budget.
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "resident_bytes": self._resident_bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+
+# frames of this process. Prefork children start with a copy of their parent's.
+local_frames = FrameLRU(int(env_frame_memory_budget_mb * 1024**2))
@@ -7,6 +7,7 @@ import sqlalchemy as salc
 import os
 import logging
 import sys
+import threading
 import requests
 from sqlalchemy.exc import SQLAlchemyError
 from models import SearchItem
@@ -128,7 +129,7 @@ class AugurManager:
 
         return engine
 
-    def run_query(self, query_string: str) -> pd.DataFrame:
+    def run_query(self, query_string: str, params: dict = None) -> pd.DataFrame:
         """
         Runs SQL query against our Augur database.
 
@@ -136,6 +137,9 @@ class AugurManager:
         -----
             query_string (str): SQL query to run.
 
+            params (dict, optional): values of the query's bind parameters, e.g. {"repo_ids": [...]}
+                for ":repo_ids". Defaults to None.
+
         Returns:
         --------
             pd.DataFrame: Results from SQL query.
@@ -150,7 +154,7 @@ class AugurManager:
 
         try:
             with self.engine.connect() as conn:
-                result_df = pd.read_sql(query, con=conn)
+                result_df = pd.read_sql(query, con=conn, params=params)
         except:
             raise Exception("DB Read Failure")
 
@@ -360,3 +364,46 @@ class AugurManager:
 
         if result.status_code == 200:
             return result.json()
+
+
+_shared_lock = threading.Lock()
+_shared: AugurManager = None
+_shared_pid: int = None
+
+# managers inherited from a parent process. Their engines' connections belong
+# to the parent, so they're kept referenced rather than disposed or garbage collected.
+_inherited: list = []
+
+
+def shared_augur() -> AugurManager:
+    """
+    AugurManager whose engine, and so its pool of connections, is shared
+    by every caller in this process.
+
+    Callbacks that query Augur directly would otherwise create an engine,
+    and open and test a new connection, per call. Like the cache connection
+    pool (see cache_manager.cx_pool), the manager is keyed on the PID that
+    created it, so Celery prefork children each lazily create their own.
+
+    Returns:
+    --------
+        AugurManager: manager with a connected engine.
+    """
+    global _shared, _shared_pid
+
+    pid = os.getpid()
+    if _shared_pid == pid:
+        return _shared
+
+    with _shared_lock:
+        if _shared_pid != pid:
+            if _shared is not None:
+                _inherited.append(_shared)
+
+            logging.warning(f"AUGUR: Creating shared engine for PID {pid}")
+            augur = AugurManager()
+            augur.get_engine()
+            _shared = augur
+            _shared_pid = pid
+
+    return _shared
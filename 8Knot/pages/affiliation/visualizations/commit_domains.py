@@ -13,6 +13,8 @@ from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
+import pages.utils.preprocessing_utils as preproc_utils
 
 PAGE = "affiliation"
 VIZ_ID = "commit-domains"
@@ -139,11 +141,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[cmq.__name__])
 def commit_domains_graph(repolist, num, start_date, end_date):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=cmq.__name__, repolist=repolist):
-        logging.warning(f"COMMITS_OVER_TIME_VIZ - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=cmq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -152,6 +153,9 @@ def commit_domains_graph(repolist, num, start_date, end_date):
     df = cf.retrieve_from_cache(
         tablename=cmq.__name__,
         repolist=repolist,
+        time_column="author_timestamp",
+        start=start_date,
+        end=end_date,
     )
 
     # test if there is data
@@ -160,7 +164,7 @@ def commit_domains_graph(repolist, num, start_date, end_date):
         return nodata_graph
 
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, num, start_date, end_date)
+    df = process_data(df, num)
 
     fig = create_figure(df)
 
@@ -168,32 +172,15 @@ def commit_domains_graph(repolist, num, start_date, end_date):
     return fig
 
 
-def process_data(df: pd.DataFrame, num, start_date, end_date):
+def process_data(df: pd.DataFrame, num):
     # TODO: create docstring
 
-    # convert to datetime objects rather than strings
-    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True)
-
     # order values chronologically by author_timestamp date earliest to latest
     df = df.sort_values(by="author_timestamp", axis=0, ascending=True)
 
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.author_timestamp >= start_date]
-    if end_date is not None:
-        df = df[df.author_timestamp <= end_date]
-
-    # creates list of emails for each contribution and flattens list result
-    emails = df.author_email.tolist()
-
-    # remove any entries not in email format and put all emails in lowercase
-    emails = [x.lower() for x in emails if "@" in x]
-
-    # creates list of email domains from the emails list
-    email_domains = [x[x.rindex("@") + 1 :] for x in emails]
-
-    # creates df of domains and counts
-    df = pd.DataFrame(email_domains, columns=["domains"]).value_counts().to_frame().reset_index()
+    # creates df of domains and counts of the author email of each commit.
+    # domains are only parsed once per distinct email.
+    df = preproc_utils.domain_counts(preproc_utils.email_domains(df.author_email), df.author_email)
 
     df = df.rename(columns={"count": "occurrences"})
 
@@ -10,11 +10,12 @@ import plotly.express as px
 from pages.utils.graph_utils import baby_blue
 from queries.affiliation_query import affiliation_query as aq
 from pages.utils.job_utils import nodata_graph
+from pages.utils.company_utils import company_clusters
 import time
 import datetime as dt
-from rapidfuzz import fuzz
 import app
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "affiliation"
 VIZ_ID = "gh-org-affiliation"
@@ -140,11 +141,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[aq.__name__])
 def gh_org_affiliation_graph(repolist, num, start_date, end_date, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=aq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=aq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -153,6 +153,9 @@ def gh_org_affiliation_graph(repolist, num, start_date, end_date, bot_switch):
     df = cf.retrieve_from_cache(
         tablename=aq.__name__,
         repolist=repolist,
+        time_column="created_at",
+        start=start_date,
+        end=end_date,
     )
     # test if there is data
     if df.empty:
@@ -164,7 +167,7 @@ def gh_org_affiliation_graph(repolist, num, start_date, end_date, bot_switch):
         df = df[~df["cntrb_id"].isin(app.bots_list)]
 
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, num, start_date, end_date)
+    df = process_data(df, num)
 
     fig = create_figure(df)
 
@@ -172,23 +175,14 @@ def gh_org_affiliation_graph(repolist, num, start_date, end_date, bot_switch):
     return fig
 
 
-def process_data(df: pd.DataFrame, num, start_date, end_date):
+def process_data(df: pd.DataFrame, num):
     """Implement your custom data-processing logic in this function.
     The output of this function is the data you intend to create a visualization with,
     requiring no further processing."""
 
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
     # order values chronologically by COLUMN_TO_SORT_BY date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
 
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created_at >= start_date]
-    if end_date is not None:
-        df = df[df.created_at <= end_date]
-
     # intital count of same company name in github profile
     result = df.cntrb_company.value_counts(dropna=False)
 
@@ -199,18 +193,9 @@ def process_data(df: pd.DataFrame, num, start_date, end_date):
     df["company_name"] = df["company_name"].astype(str)
     df = df.rename(columns={"cntrb_company": "orginal_name", "count": "contribution_count"})
 
-    # applies fuzzy matching comparing all rows to each other
-    df["match"] = df.apply(lambda row: fuzzy_match(df, row["company_name"]), axis=1)
-
-    # changes company name to match other fuzzy matches
-    for x in range(0, len(df)):
-        # gets match values for the current row
-        matches = df.iloc[x]["match"]
-        for y in matches:
-            # for each match, change the name to its match and clear out match column as
-            # it will unnecessarily reapply changes
-            df.loc[y, "company_name"] = df.iloc[x]["company_name"]
-            df.loc[y, "match"] = ""
+    # renames each company to the most common name it fuzzy matches.
+    # df is sorted by count, so names are passed from the most to the least common.
+    df["company_name"] = df["company_name"].map(company_clusters(df["company_name"]))
 
     # groups all same name company affiliation and sums the contributions
     df = (
@@ -236,17 +221,6 @@ def process_data(df: pd.DataFrame, num, start_date, end_date):
     return df
 
 
-def fuzzy_match(df, name):
-    """
-    This function compares each row to all of the other values in the company_name column and
-    outputs a list on if there is a fuzzy match between the different rows. This gives the values
-    necessary for the loop to change the company name if there is a match. 70 is the match value
-    threshold for the partial ratio to be considered a match
-    """
-    matches = df.apply(lambda row: (fuzz.partial_ratio(row["company_name"], name, score_cutoff=70) >= 70), axis=1)
-    return [i for i, x in enumerate(matches) if x]
-
-
 def create_figure(df: pd.DataFrame):
     # graph generation
     fig = px.pie(
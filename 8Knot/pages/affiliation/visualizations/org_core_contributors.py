@@ -15,6 +15,9 @@ import time
 import datetime as dt
 import app
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
+from cache_manager.frame_cache import retrieve_preprocessed
+import pages.utils.preprocessing_utils as preproc_utils
 
 PAGE = "affiliation"
 VIZ_ID = "org-core-contributors"
@@ -188,6 +191,7 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[aq.__name__])
 def compay_associated_activity_graph(
     repolist,
     contributions,
@@ -198,9 +202,7 @@ def compay_associated_activity_graph(
     bot_switch,
 ):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=aq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=aq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -209,6 +211,9 @@ def compay_associated_activity_graph(
     df = cf.retrieve_from_cache(
         tablename=aq.__name__,
         repolist=repolist,
+        time_column="created_at",
+        start=start_date,
+        end=end_date,
     )
 
     # test if there is data
@@ -220,8 +225,15 @@ def compay_associated_activity_graph(
     if bot_switch:
         df = df[~df["cntrb_id"].isin(app.bots_list)]
 
+    # domains of the email addresses of every contributor, shared by the affiliation visualizations
+    df_domains = retrieve_preprocessed(
+        tablename=aq.__name__,
+        repolist=repolist,
+        preprocess=preproc_utils.affiliation_email_domains,
+    )
+
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, contributions, contributors, start_date, end_date, email_filter)
+    df = process_data(df, df_domains, contributions, contributors, email_filter)
 
     fig = create_figure(df)
 
@@ -229,19 +241,10 @@ def compay_associated_activity_graph(
     return fig
 
 
-def process_data(df: pd.DataFrame, contributions, contributors, start_date, end_date, email_filter):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
+def process_data(df: pd.DataFrame, df_domains: pd.DataFrame, contributions, contributors, email_filter):
     # order values chronologically by COLUMN_TO_SORT_BY date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
 
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created_at >= start_date]
-    if end_date is not None:
-        df = df[df.created_at <= end_date]
-
     # groups contributions by countributor id and counts, created column now hold the number
     # of contributions for its respective contributor
     df = df.groupby(["cntrb_id", "email_list"], as_index=False)[["created_at"]].count()
@@ -249,17 +252,8 @@ def process_data(df: pd.DataFrame, contributions, contributors, start_date, end_
     # filters out contributors that dont meet the core contribution threshhold
     df = df[df.created_at >= contributions]
 
-    # creates list of unique emails and flattens list result
-    emails = df.email_list.str.split(" , ").explode("email_list").tolist()
-
-    # remove any entries not in email format and flattens list result
-    emails = [x.lower() for x in emails if "@" in x]
-
-    # creates list of email domains from the emails list
-    email_domains = [x[x.rindex("@") + 1 :] for x in emails]
-
-    # creates df of domains and counts
-    df = pd.DataFrame(email_domains, columns=["domains"]).value_counts().to_frame().reset_index()
+    # creates df of domains and counts of the emails of each core contributor
+    df = preproc_utils.domain_counts(df_domains, df.email_list)
 
     df = df.rename(columns={"count": "contributors"})
 
@@ -14,6 +14,9 @@ import time
 import datetime as dt
 import app
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
+from cache_manager.frame_cache import retrieve_preprocessed
+import pages.utils.preprocessing_utils as preproc_utils
 
 PAGE = "affiliation"
 VIZ_ID = "unique-domains"
@@ -139,11 +142,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[aq.__name__])
 def unique_domains_graph(repolist, num, start_date, end_date, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=aq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=aq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -152,6 +154,9 @@ def unique_domains_graph(repolist, num, start_date, end_date, bot_switch):
     df = cf.retrieve_from_cache(
         tablename=aq.__name__,
         repolist=repolist,
+        time_column="created_at",
+        start=start_date,
+        end=end_date,
     )
 
     # test if there is data
@@ -163,8 +168,15 @@ def unique_domains_graph(repolist, num, start_date, end_date, bot_switch):
     if bot_switch:
         df = df[~df["cntrb_id"].isin(app.bots_list)]
 
+    # domains of the email addresses of every contributor, shared by the affiliation visualizations
+    df_domains = retrieve_preprocessed(
+        tablename=aq.__name__,
+        repolist=repolist,
+        preprocess=preproc_utils.affiliation_email_domains,
+    )
+
     # function for all data pre processing, COULD HAVE ADDITIONAL INPUTS AND OUTPUTS
-    df = process_data(df, num, start_date, end_date)
+    df = process_data(df, df_domains, num)
 
     fig = create_figure(df)
 
@@ -172,30 +184,12 @@ def unique_domains_graph(repolist, num, start_date, end_date, bot_switch):
     return fig
 
 
-def process_data(df: pd.DataFrame, num, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
+def process_data(df: pd.DataFrame, df_domains: pd.DataFrame, num):
     # order values chronologically by COLUMN_TO_SORT_BY date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
 
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created_at >= start_date]
-    if end_date is not None:
-        df = df[df.created_at <= end_date]
-
-    # creates list of unique emails and flattens list result
-    emails = df.email_list.str.split(" , ").explode("email_list").unique().tolist()
-
-    # remove any entries not in email format and put all emails in lowercase
-    emails = [x.lower() for x in emails if "@" in x]
-
-    # creates list of email domains from the emails list
-    email_domains = [x[x.rindex("@") + 1 :] for x in emails]
-
-    # creates df of domains and counts
-    df = pd.DataFrame(email_domains, columns=["domains"]).value_counts().to_frame().reset_index()
+    # creates df of domains and counts of the unique emails in them
+    df = preproc_utils.domain_counts(df_domains, df.email_list, unique_emails=True)
 
     df = df.rename(columns={"count": "occurences"})
 
@@ -17,6 +17,7 @@ import numpy as np
 import app
 import pages.utils.preprocessing_utils as preproc_utils
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 
 PAGE = "chaoss"
@@ -259,6 +260,7 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[ctq.__name__])
 def project_velocity_graph(
     repolist,
     log,
@@ -272,9 +274,7 @@ def project_velocity_graph(
     bot_switch,
 ):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=ctq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=ctq.__name__, repolist=repolist)
 
     logging.warning(f"{VIZ_ID} - START")
     start = time.perf_counter()
@@ -283,6 +283,10 @@ def project_velocity_graph(
     df = cf.retrieve_from_cache(
         tablename=ctq.__name__,
         repolist=repolist,
+        columns=["repo_name", "cntrb_id", "created_at", "action"],
+        time_column="created_at",
+        start=start_date,
+        end=end_date,
     )
 
     df = preproc_utils.contributors_df_action_naming(df)
@@ -299,8 +303,6 @@ def project_velocity_graph(
     # function for all data pre processing
     df = process_data(
         df,
-        start_date,
-        end_date,
         i_o_weight,
         i_c_weight,
         pr_o_weight,
@@ -316,26 +318,16 @@ def project_velocity_graph(
 
 def process_data(
     df: pd.DataFrame,
-    start_date,
-    end_date,
     i_o_weight,
     i_c_weight,
     pr_o_weight,
     pr_m_weight,
     pr_c_weight,
 ):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
 
     # order values chronologically by COLUMN_TO_SORT_BY date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
 
-    # filter values based on date picker
-    if start_date is not None:
-        df = df[df.created_at >= start_date]
-    if end_date is not None:
-        df = df[df.created_at <= end_date]
-
     # df to hold value of unique contributors for each repo
     df_cntrbs = pd.DataFrame(df.groupby("repo_name")["cntrb_id"].nunique()).rename(
         columns={"cntrb_id": "num_unique_contributors"}
@@ -5,6 +5,7 @@ import dash_mantine_components as dmc
 from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
@@ -18,6 +19,8 @@ import time
 from dash.exceptions import PreventUpdate
 import app
 import cache_manager.cache_facade as cf
+from cache_manager.frame_cache import retrieve_preprocessed
+import pages.utils.file_tree_utils as tree_utils
 
 PAGE = "codebase"
 VIZ_ID = "contribution-file-heatmap"
@@ -177,60 +180,23 @@ def repo_dropdown(repo_ids):
 )
 def directory_dropdown(repo_id):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=rfq.__name__, repolist=[repo_id]):
-        logging.warning(f"DIRECTORY DROPDOWN - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=rfq.__name__, repolist=[repo_id])
 
     logging.warning(f"DIRECTORY DROPDOWN - RETRIEVING FROM CACHE")
-    df = cf.retrieve_from_cache(
+    tree = retrieve_preprocessed(
         tablename=rfq.__name__,
         repolist=[repo_id],
+        preprocess=tree_utils.file_tree,
     )
 
     logging.warning(f"DIRECTORY DROPDOWN - CACHE READ")
 
     # test if there is data
-    if df.empty:
+    if tree.empty:
         logging.warning(f"{VIZ_ID} DROPDOWN- NO DATA AVAILABLE")
-        return ["Top Level Directory"], "Top Level Directory"
-
-    # strings to hold the values for each column (always the same for every row of this query)
-    repo_name = df["repo_name"].iloc[0]
-    repo_path = df["repo_path"].iloc[0]
-    repo_id = str(df["repo_id"].iloc[0])
-
-    # pattern found in each file path, used to slice to get only the root file path
-    path_slice = repo_id + "-" + repo_path + "/" + repo_name + "/"
-    df["file_path"] = df["file_path"].str.rsplit(path_slice, n=1).str[1]
-
-    # drop unneccessary columns not needed after preprocessing steps
-    df = df.reset_index()
-    df.drop(
-        ["index", "repo_id", "repo_name", "repo_path", "rl_analysis_date"],
-        axis=1,
-        inplace=True,
-    )
-
-    # split file path by directory
-    df = df.join(df["file_path"].str.split("/", expand=True))
-
-    # take all of the files, split on the last instance of a / to get directories and top level files
-    directories = df["file_path"].str.rsplit("/", n=1).str[0].tolist()
-    directories = list(set(directories))
-
-    # get all of the file names to filter out of the directory set
-    top_level_files = df["file_name"][df[1].isnull()].tolist()
-    # applies another rsplit to make sure directories that only have folders are included
-    folder_only_directories = [x.rsplit("/", 1)[0] for x in directories]
-    directories = list(set(directories + folder_only_directories))
-
-    # sort alphabetically
-    directories = sorted(directories)
+        return [tree_utils.TOP_LEVEL_DIRECTORY], tree_utils.TOP_LEVEL_DIRECTORY
 
-    # add top level directory to the list of directories
-    directories.insert(0, "Top Level Directory")
-
-    return directories, "Top Level Directory"
+    return tree_utils.directory_options(tree), tree_utils.TOP_LEVEL_DIRECTORY
 
 
 # callback for contributor file heatmap graph
@@ -248,15 +214,15 @@ def cntrb_file_heatmap_graph(repo_id, directory, graph_view):
     logging.warning(f"{VIZ_ID}- START")
 
     # get dataframes of data from cache
-    df_file, df_file_pr, df_pr = multi_query_helper([repo_id])
+    tree, df_file_pr, df_pr = multi_query_helper([repo_id])
 
     # test if there is data
-    if df_file.empty or df_file_pr.empty or df_pr.empty:
+    if tree.empty or df_file_pr.empty or df_pr.empty:
         logging.warning(f"{VIZ_ID} - NO DATA AVAILABLE")
         return nodata_graph
 
     # function for all data pre processing
-    df = process_data(df_file, df_file_pr, df_pr, directory, graph_view)
+    df = process_data(tree, df_file_pr, df_pr, directory, graph_view)
 
     # if there are no pull request on a directory plot no data graph
     if df.empty:
@@ -276,24 +242,19 @@ def multi_query_helper(repos):
     """
 
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=rfq.__name__, repolist=repos):
-        logging.warning(f"CONTRIBUTION FILE HEATMAP - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
-
-    # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=prfq.__name__, repolist=repos):
-        logging.warning(f"CONTRIBUTION FILE HEATMAP - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
-
-    # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=prq.__name__, repolist=repos):
-        logging.warning(f"CONTRIBUTION FILE HEATMAP - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached_many(
+        {
+            rfq.__name__: repos,
+            prfq.__name__: repos,
+            prq.__name__: repos,
+        }
+    )
 
     # GET ALL DATA FROM POSTGRES CACHE
-    df_file = cf.retrieve_from_cache(
+    tree = retrieve_preprocessed(
         tablename=rfq.__name__,
         repolist=repos,
+        preprocess=tree_utils.file_tree,
     )
     df_file_pr = cf.retrieve_from_cache(
         tablename=prfq.__name__,
@@ -304,11 +265,11 @@ def multi_query_helper(repos):
         repolist=repos,
     )
 
-    return df_file, df_file_pr, df_pr
+    return tree, df_file_pr, df_pr
 
 
 def process_data(
-    df_file: pd.DataFrame,
+    tree: pd.DataFrame,
     df_file_pr: pd.DataFrame,
     df_pr: pd.DataFrame,
     directory,
@@ -317,25 +278,32 @@ def process_data(
     """
     Processing steps
 
-        1 - Cleans up file data to only include current files and relate files in the repository to the prs that impact them.
-        2 - For a given level in the directory tree, aggregate the list of prs for sub-directories and for individual files at the level.
+        1 - Relates the files currently in the repository to the prs that impact them.
+        2 - For a given level in the directory tree, relates each sub-directory and individual file at the level to the prs of the files in it.
         3 - For each pr, identify their open and merged.
         4 - Transforms dataframe where columns are months with counts of pr open/merge dates in that month and the rows are the file/subdirectory
     """
 
-    df_file = df_file_clean(df_file, df_file_pr)
+    # file or subdirectory of the directory that each file is in
+    entry_of = tree_utils.directory_entries(tree, directory)
+    entries = np.flatnonzero(entry_of == np.arange(len(tree)))
 
-    df_dynamic_directory = pr_per_directory_value(directory, df_file)
+    # distinct prs of each file and subdirectory
+    df_entry_pr = tree_utils.entry_edges(tree, entry_of, df_file_pr["file_path"], df_file_pr["pull_request_id"])
 
-    # work around for using functions, will clean later
-    if df_dynamic_directory.empty:
-        return df_dynamic_directory
+    # test if there is any pull requests in the directory
+    if df_entry_pr.empty:
+        return pd.DataFrame()
 
-    df_dynamic_directory = pr_to_dates(df_pr, df_dynamic_directory, graph_view)
+    # open or merge date of each pr of each file and subdirectory
+    pr_dates = df_pr.drop_duplicates(subset="pull_request_id").set_index("pull_request_id")[graph_view]
+    dates = pd.Series(pr_dates.reindex(df_entry_pr["value"]).to_numpy(), index=df_entry_pr["entry"])
 
-    final = file_pr_activity_by_month(df_dynamic_directory, df_pr, graph_view)
+    # dates based on creation and closed dates so it represents the length of the project
+    min_date = df_pr.created_at.min()
+    max_date = max(df_pr["created_at"].max(), df_pr["merged_at"].max())
 
-    return final
+    return tree_utils.entry_counts_by_month(tree, entries, dates, min_date, max_date, graph_view)
 
 
 def create_figure(df: pd.DataFrame, graph_view):
@@ -355,203 +323,3 @@ def create_figure(df: pd.DataFrame, graph_view):
     fig["layout"]["yaxis"]["side"] = "right"
 
     return fig
-
-
-def df_file_clean(df_file: pd.DataFrame, df_file_pr: pd.DataFrame):
-    """
-    This function cleans the df_file data and combines it with the related pull request ids
-
-    Args:
-    -----
-        df_file : Pandas Dataframe
-            Dataframe with the output of the repo_files_query
-
-        df_file_prs : Pandas Dataframe
-            Dataframe with the output of the pr_file_query
-
-    Returns:
-    --------
-        df_file: df with file and pull_request_ids of prs with that file in it
-    """
-    # strings to hold the values for each column (always the same for every row of this query)
-    repo_name = df_file["repo_name"].iloc[0]
-    repo_path = df_file["repo_path"].iloc[0]
-    repo_id = str(df_file["repo_id"].iloc[0])
-
-    # pattern found in each file path, used to slice to get only the root file path
-    path_slice = repo_id + "-" + repo_path + "/" + repo_name + "/"
-    df_file["file_path"] = df_file["file_path"].str.rsplit(path_slice, n=1).str[1]
-
-    # drop unneccessary columns not needed after preprocessing steps
-    df_file = df_file.reset_index()
-    df_file.drop(["index", "repo_name", "repo_path", "rl_analysis_date"], axis=1, inplace=True)
-
-    # split file path by directory
-    df_file = df_file.join(df_file["file_path"].str.split("/", expand=True))
-
-    # drop unnecessary columns
-    df_file.drop(["repo_id"], axis=1, inplace=True)
-    df_file_pr.drop(["repo_id"], axis=1, inplace=True)
-
-    # create column with list of prs per file path
-    df_file_pr = df_file_pr.groupby("file_path")["pull_request_id"].apply(list)
-
-    # Left join on df_files to only get the files that are currently in the repository
-    # and the prs that included edits on the file
-    df_file = pd.merge(df_file, df_file_pr, on="file_path", how="left")
-
-    return df_file
-
-
-def pr_per_directory_value(directory, df_file):
-    """
-    This function gets the files in the specified directory, groups together any files in
-    subdirectories, and creates a list of pull_request_ids that touched those files
-
-    Args:
-    -----
-        directory : string
-            Output from the directory drop down
-
-        df_file : Pandas Dataframe
-            Dataframe with file and related pull_request_id information
-
-    Returns:
-    --------
-        df_dynamic_directory: df with the file and subdirectories and their prs pull_request_ids
-    """
-    # determine directory level to use in later step
-    level = directory.count("/")
-    if directory == "Top Level Directory":
-        level = -1
-        directory = ""
-
-    # get all of the files in the directory or nested in folders in the directory
-    df_dynamic_directory = df_file[df_file["file_path"].str.startswith(directory)]
-
-    # test if there is any pull requests in the directory
-    if df_dynamic_directory.pull_request_id.isnull().all():
-        return pd.DataFrame()
-
-    # get one level up from the directory level
-    group_column = level + 1
-
-    # Groupby the level above the selected directory for all files nested in folders are together.
-    # For each, create a list of all of the contributors who have contributed
-    df_dynamic_directory = (
-        df_dynamic_directory.groupby(group_column)["pull_request_id"]
-        .sum()
-        .reset_index()
-        .rename(columns={group_column: "directory_value"})
-    )
-
-    # reformat 0 to "" for later processing
-    df_dynamic_directory.loc[df_dynamic_directory.pull_request_id == 0, "pull_request_id"] = ""
-
-    # Set of pull_request to confirm there are no duplicate pull requests
-    df_dynamic_directory["pull_request_id"] = df_dynamic_directory.apply(
-        lambda row: set(row.pull_request_id),
-        axis=1,
-    )
-    return df_dynamic_directory
-
-
-def pr_to_dates(df_pr: pd.DataFrame, df_dynamic_directory: pd.DataFrame, graph_view):
-    """
-    This function creates a df with the files and the the open and merge dates of the prs that
-    touch each file or subdirectory.
-
-    Args:
-    -----
-        df_pr : Pandas Dataframe
-            Dataframe with pull request data
-
-        df_dynamic_directory : Pandas Dataframe
-            Dataframe with file and related pull_request_id information
-
-    Returns:
-    --------
-        df_dynamic_directory: df with the file and subdirectories and the dates of open and merge dates
-        of the prs that touch each file or subdirectory.
-    """
-
-    # date reformating
-    df_pr["created_at"] = pd.to_datetime(df_pr["created_at"], utc=True)
-    df_pr["merged_at"] = pd.to_datetime(df_pr["merged_at"], utc=True)
-
-    # drop unneccessary columns not needed after preprocessing steps
-    df_pr.drop(
-        ["repo_id", "repo_name", "pr_src_number", "cntrb_id", "closed_at"],
-        axis=1,
-        inplace=True,
-    )
-
-    # dictionaries of pull_requests and their open and merge dates
-    pr_open = df_pr.set_index("pull_request_id")["created_at"].to_dict()
-    pr_merged = df_pr.set_index("pull_request_id")["merged_at"].to_dict()
-
-    # get list of pr created and merged dates for each pr
-    df_dynamic_directory["created_at"], df_dynamic_directory["merged_at"] = zip(
-        *df_dynamic_directory.apply(
-            lambda row: [
-                [pr_open[x] for x in row.pull_request_id],
-                [pr_merged[x] for x in row.pull_request_id if (not pd.isnull(pr_merged[x]))],
-            ],
-            axis=1,
-        )
-    )
-
-    # reformat into each row being a directory value and a date of one of the pull request dates
-    df_dynamic_directory = df_dynamic_directory.explode(graph_view)
-
-    return df_dynamic_directory
-
-
-def file_pr_activity_by_month(df_dynamic_directory: pd.DataFrame, df_pr: pd.DataFrame, graph_view):
-    """
-    This function transforms the df_dynamic_directory to be counts of open or merged prs by month.
-
-    Args:
-    -----
-        df_dynamic_directory : Pandas Dataframe
-            Dataframe with file and related reviewer_id information
-
-        df_pr : Pandas Dataframe
-            Dataframe with pull request data
-
-    Returns:
-    --------
-        df_final: df with files and subdirectories as rows and the months as columns
-    """
-
-    # get files that have no pull requests and remove from set to prevent errors in grouper function
-    no_contribs = df_dynamic_directory["directory_value"][df_dynamic_directory[graph_view].isnull()].tolist()
-
-    df_dynamic_directory = df_dynamic_directory[~df_dynamic_directory[graph_view].isnull()]
-
-    """Creates df with a column for each month between start and end date. This will be used to confirm that
-    there will be a column for every month even if there is no pull request date in it. This greatly
-    improves the heatmap ploting"""
-
-    # dates based on creation and closed dates so it represents the length of the project
-    min_date = df_pr.created_at.min()
-    max_date = max(df_pr["created_at"].max(), df_pr["merged_at"].max())
-    dates = pd.date_range(start=min_date, end=max_date, freq="M", inclusive="both")
-    df_fill = dates.to_frame(index=False, name=graph_view)
-
-    # combine df with data and filler dates together
-    final = pd.concat([df_dynamic_directory, df_fill], axis=0)
-    final["directory_value"] = final["directory_value"].astype(str)
-
-    # grouping dates by every month and counting the number of pr opened or merged with the last activity at that date
-    final = final.groupby(pd.Grouper(key=graph_view, freq="1M"))["directory_value"].value_counts().unstack(0)
-
-    # removing the None row that was used for column formating if exists
-    if "nan" in final.index:
-        final.drop("nan", inplace=True)
-
-    # add back the files that had no pull requests
-    for files in no_contribs:
-        final.loc[files] = None
-
-    return final
@@ -10,10 +10,12 @@ import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from queries.pr_assignee_query import pr_assignee_query as praq
 from pages.utils.job_utils import nodata_graph
+from pages.utils.assignment_utils import assignments_by_assignee
 import time
 import datetime as dt
 import app
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributions"
 VIZ_ID = "cntrib-pr-assignment"
@@ -182,11 +184,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[praq.__name__])
 def cntrib_pr_assignment_graph(repolist, interval, assign_req, start_date, end_date, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=praq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID} - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=praq.__name__, repolist=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -224,11 +225,6 @@ def cntrib_pr_assignment_graph(repolist, interval, assign_req, start_date, end_d
 
 
 def process_data(df: pd.DataFrame, interval, assign_req, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-    df["closed_at"] = pd.to_datetime(df["closed_at"], utc=True)
-    df["assign_date"] = pd.to_datetime(df["assign_date"], utc=True)
-
     # order values chronologically by created date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
 
@@ -278,12 +274,8 @@ def process_data(df: pd.DataFrame, interval, assign_req, start_date, end_date):
     else:
         df_assign["end_date"] = df_assign.start_date + pd.DateOffset(years=1)
 
-    # iterates through contributors and dates for assignment values
-    for contrib in contributors:
-        df_assign[contrib] = df_assign.apply(
-            lambda row: pr_assignment(df, row.start_date, row.end_date, contrib),
-            axis=1,
-        )
+    # number of pull request reviews assigned to each contributor in each time interval
+    df_assign[contributors] = assignments_by_assignee(df, contributors, df_assign.start_date, df_assign.end_date)
 
     # formatting for graph generation
     if interval == "M":
@@ -343,56 +335,3 @@ def create_figure(df: pd.DataFrame, interval):
     )
 
     return fig
-
-
-def pr_assignment(df, start_date, end_date, contrib):
-    """
-    This function takes a start and an end date and determines how many
-    prs that are open during that time interval and are currently assigned
-    to the contributor.
-
-    Args:
-    -----
-        df : Pandas Dataframe
-            Dataframe with issue assignment actions of the assignees
-
-        start_date : Datetime Timestamp
-            Timestamp of the start time of the time interval
-
-        end_date : Datetime Timestamp
-            Timestamp of the end time of the time interval
-
-        contrib : str
-            contrb_id for the contributor
-
-    Returns:
-    --------
-        int: Number of assignments to the contributor in the time window
-    """
-
-    # drop rows not by contrib
-    df = df[df["assignee"] == contrib]
-
-    # drop rows that are more recent than the end date
-    df_created = df[df["created_at"] <= end_date]
-
-    # Keep issues that were either still open after the 'start_date' or that have not been closed.
-    df_in_range = df_created[(df_created["closed_at"] > start_date) | (df_created["closed_at"].isnull())]
-
-    # get all issue unassignments and drop rows that have been unassigned more recent than the end date
-    df_unassign = df_in_range[
-        (df_in_range["assignment_action"] == "unassigned") & (df_in_range["assign_date"] <= end_date)
-    ]
-
-    # get all issue assignments and drop rows that have been assigned more recent than the end date
-    df_assigned = df_in_range[
-        (df_in_range["assignment_action"] == "assigned") & (df_in_range["assign_date"] <= end_date)
-    ]
-
-    # the different of assignments and unassignments
-    assign_value = df_assigned.shape[0] - df_unassign.shape[0]
-
-    # prevent negative assignments
-    assign_value = 0 if assign_value < 0 else assign_value
-
-    return assign_value
@@ -11,6 +11,7 @@ from queries.commits_query import commits_query as cmq
 from pages.utils.job_utils import nodata_graph
 import time
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributions"
 VIZ_ID = "commits-over-time"
@@ -129,20 +130,20 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[cmq.__name__])
 def commits_over_time_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=cmq.__name__, repolist=repolist):
-        logging.warning(f"COMMITS_OVER_TIME_VIZ - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=cmq.__name__, repolist=repolist)
 
     # data ready.
     start = time.perf_counter()
     logging.warning("COMMITS_OVER_TIME_VIZ - START")
 
-    # GET ALL DATA FROM POSTGRES CACHE
+    # GET DAILY COMMIT COUNTS FROM POSTGRES CACHE
     df = cf.retrieve_from_cache(
-        tablename=cmq.__name__,
+        tablename="commits_daily_rollup",
         repolist=repolist,
+        columns=["day", "commits"],
     )
 
     # test if there is data
@@ -161,9 +162,9 @@ def commits_over_time_graph(repolist, interval):
 
 def process_data(df: pd.DataFrame, interval):
     # convert to datetime objects with consistent column name
-    # incoming value should be a posix integer.
-    df["author_date"] = pd.to_datetime(df["author_date"], utc=True)
-    df.rename(columns={"author_date": "created_at"}, inplace=True)
+    # incoming rows are the number of distinct commits per repo per day.
+    df["day"] = pd.to_datetime(df["day"])
+    df.rename(columns={"day": "created_at"}, inplace=True)
 
     # variable to slice on to handle weekly period edge case
     period_slice = None
@@ -173,8 +174,8 @@ def process_data(df: pd.DataFrame, interval):
 
     # get the count of commits in the desired interval in pandas period format, sort index to order entries
     df_created = (
-        df.groupby(by=df.created_at.dt.to_period(interval))["commit_hash"]
-        .nunique()
+        df.groupby(by=df.created_at.dt.to_period(interval))["commits"]
+        .sum()
         .reset_index()
         .rename(columns={"created_at": "Date"})
     )
@@ -194,7 +195,7 @@ def create_figure(df_created: pd.DataFrame, interval):
     fig = px.bar(
         df_created,
         x="Date",
-        y="commit_hash",
+        y="commits",
         range_x=x_r,
         labels={"x": x_name, "y": "Commits"},
         color_discrete_sequence=[baby_blue[3]],
@@ -10,12 +10,14 @@ import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from queries.issue_assignee_query import issue_assignee_query as iaq
 from pages.utils.job_utils import nodata_graph
+from pages.utils.assignment_utils import assigned_unassigned_in_bins
 import time
 import datetime as dt
 import app
 import numpy as np
 import app
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributions"
 VIZ_ID = "issue_assignment"
@@ -135,11 +137,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[iaq.__name__])
 def cntrib_issue_assignment_graph(repolist, interval, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=iaq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID} - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=iaq.__name__, repolist=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -172,11 +173,6 @@ def cntrib_issue_assignment_graph(repolist, interval, bot_switch):
 
 
 def process_data(df: pd.DataFrame, interval):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-    df["closed_at"] = pd.to_datetime(df["closed_at"], utc=True)
-    df["assign_date"] = pd.to_datetime(df["assign_date"], utc=True)
-
     # order values chronologically by created date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
 
@@ -201,12 +197,9 @@ def process_data(df: pd.DataFrame, interval):
     else:
         df_assign["end_date"] = df_assign.start_date + pd.DateOffset(years=1)
 
-    # dynamically apply the function to all dates defined in the date_range to create df_status
-    df_assign["Assigned"], df_assign["Unassigned"] = zip(
-        *df_assign.apply(
-            lambda row: issue_assignment(df, row.start_date, row.end_date),
-            axis=1,
-        )
+    # number of assigned and unassigned issues in each time interval
+    df_assign["Assigned"], df_assign["Unassigned"] = assigned_unassigned_in_bins(
+        df, "issue_id", df_assign.start_date, df_assign.end_date
     )
 
     # formatting for graph generation
@@ -274,53 +267,3 @@ def create_figure(df: pd.DataFrame, interval):
     )
 
     return fig
-
-
-def issue_assignment(df, start_date, end_date):
-    """
-    This function takes a start and a end date and determines how many
-    issues in that time interval are assigned and unassigned.
-
-    Args:
-    -----
-        df : Pandas Dataframe
-            Dataframe with issue assignment actions of the assignees
-
-        start_date : Datetime Timestamp
-            Timestamp of the start time of the time interval
-
-        end_date : Datetime Timestamp
-            Timestamp of the end time of the time interval
-
-    Returns:
-    --------
-        int, int: Number of assigned and unassigned issues in the time window
-    """
-
-    # drop rows that are more recent than the end date
-    df_created = df[df["created_at"] <= end_date]
-
-    # Keep issues that were either still open after the 'start_date' or that have not been closed.
-    df_in_range = df_created[(df_created["closed_at"] > start_date) | (df_created["closed_at"].isnull())]
-
-    # number of issues open in time interval
-    num_issues_open = df_in_range["issue_id"].nunique()
-
-    # get all issue unassignments and drop rows that have been unassigned more recent than the end date
-    num_unassigned_actions = df_in_range[
-        (df_in_range["assignment_action"] == "unassigned") & (df_in_range["assign_date"] <= end_date)
-    ].shape[0]
-
-    # get all issue assignments and drop rows that have been assigned more recent than the end date
-    num_assigned_actions = df_in_range[
-        (df_in_range["assignment_action"] == "assigned") & (df_in_range["assign_date"] <= end_date)
-    ].shape[0]
-
-    # number of assigned issues during the time interval
-    num_issues_assigned = num_assigned_actions - num_unassigned_actions
-
-    # number of unassigned issues during the time interval
-    num_issues_unassigned = num_issues_open - num_issues_assigned
-
-    # return the number of assigned and unassigned issues
-    return num_issues_assigned, num_issues_unassigned
@@ -8,9 +8,11 @@ import pandas as pd
 import logging
 from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from pages.utils.job_utils import nodata_graph
+from pages.utils.sweep_utils import open_at
 from queries.issues_query import issues_query as iq
 import time
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 import datetime as dt
 from dateutil.relativedelta import relativedelta
 
@@ -151,11 +153,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[iq.__name__])
 def issues_over_time_graph(repolist, interval, start_date, end_date):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=iq.__name__, repolist=repolist):
-        logging.warning(f"ISSUES OVER TIME - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=iq.__name__, repolist=repolist)
 
     # data ready.
     start = time.perf_counter()
@@ -183,9 +184,9 @@ def issues_over_time_graph(repolist, interval, start_date, end_date):
 
 
 def process_data(df: pd.DataFrame, interval, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=False)
-    df["closed_at"] = pd.to_datetime(df["closed_at"], utc=False)
+    # cache returns UTC datetimes; this graph compares against naive date-picker values
+    df["created_at"] = df["created_at"].dt.tz_localize(None)
+    df["closed_at"] = df["closed_at"].dt.tz_localize(None)
 
     # order values chronologically by creation date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
@@ -235,8 +236,8 @@ def process_data(df: pd.DataFrame, interval, start_date, end_date):
     # df for open issues for time interval
     df_open = dates.to_frame(index=False, name="Date")
 
-    # aplies function to get the amount of open issues for each day
-    df_open["Open"] = df_open.apply(lambda row: get_open(df, row.Date), axis=1)
+    # amount of open issues on each day
+    df_open["Open"] = open_at(df_open["Date"], df["created_at"], df["closed_at"])
 
     # formatting for graph generation
     if interval == "M":
@@ -294,19 +295,3 @@ def create_figure(df_created: pd.DataFrame, df_closed: pd.DataFrame, df_open: pd
     )
 
     return fig
-
-
-# for each day, this function calculates the amount of open issues
-def get_open(df, date):
-    # drop rows that are more recent than the date limit
-    df_lim = df[df["created_at"] <= date]
-
-    # drops rows that have been closed after date
-    df_open = df_lim[df_lim["closed_at"] > date]
-
-    # include issues that have not been close yet
-    df_open = pd.concat([df_open, df_lim[df_lim.closed_at.isnull()]])
-
-    # generates number of columns ie open issues
-    num_open = df_open.shape[0]
-    return num_open
@@ -12,7 +12,9 @@ from queries.pr_response_query import pr_response_query as prr
 import io
 from cache_manager.cache_manager import CacheManager as cm
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
+from pages.utils.sweep_utils import open_ranges, count_active
 import time
 import app
 
@@ -126,10 +128,9 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[prr.__name__])
 def pr_first_response_graph(repolist, num_days, bot_switch):
-    while not_cached := cf.get_uncached(func_name=prr.__name__, repolist=repolist):
-        logging.warning(f"PR_FIRST_RESPONSE - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=prr.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -158,11 +159,6 @@ def pr_first_response_graph(repolist, num_days, bot_switch):
 
 
 def process_data(df: pd.DataFrame, num_days):
-    # convert to datetime objects rather than strings
-    df["msg_timestamp"] = pd.to_datetime(df["msg_timestamp"], utc=True)
-    df["pr_created_at"] = pd.to_datetime(df["pr_created_at"], utc=True)
-    df["pr_closed_at"] = pd.to_datetime(df["pr_closed_at"], utc=True)
-
     # drop messages from the pr creator
     df = df[df["cntrb_id"] != df["msg_cntrb_id"]]
 
@@ -181,14 +177,16 @@ def process_data(df: pd.DataFrame, num_days):
     # df for open prs and responded to prs in time interval
     df_pr_responses = dates.to_frame(index=False, name="Date")
 
+    # the days each pr is open on, and how long after its opening it was first responded to.
+    # these don't depend on num_days.
+    d, enter, leave = open_ranges(dates, df["pr_created_at"], df["pr_closed_at"])
+    response_delay = df["msg_timestamp"] - df["pr_created_at"]
+
     # every day, count the number of PRs that are open on that day and the number of
     # those that were responded to within num_days of their opening
-    df_pr_responses["Open"], df_pr_responses["Response"] = zip(
-        *df_pr_responses.apply(
-            lambda row: get_open_response(df, row.Date, num_days),
-            axis=1,
-        )
-    )
+    responded = (response_delay < pd.Timedelta(days=num_days)).to_numpy()
+    df_pr_responses["Open"] = count_active(len(d), enter, leave)
+    df_pr_responses["Response"] = count_active(len(d), enter[responded], leave[responded])
 
     df_pr_responses["Date"] = df_pr_responses["Date"].dt.strftime("%Y-%m-%d")
 
@@ -225,47 +223,3 @@ def create_figure(df: pd.DataFrame, num_days):
     )
 
     return fig
-
-
-def get_open_response(df, date, num_days):
-    """
-    This function takes a date and determines how many
-    prs in that time interval are opened and if they have a response within num_days.
-
-    Args:
-    -----
-        df : Pandas Dataframe
-            Dataframe with pr assignment actions of the assignees
-
-        date : Datetime Timestamp
-            Timestamp of the date
-
-        num_days : int
-            number of days that a response should be within
-
-    Returns:
-    --------
-        int, int: Number of opened and responded to prs within num_days on the day
-    """
-    # drop rows that are more recent than the date limit
-    df_created = df[df["pr_created_at"] <= date]
-
-    # drops rows that have been closed after date
-    df_open = df_created[df_created["pr_closed_at"] > date]
-
-    # include prs that have not been close yet
-    df_open = pd.concat([df_open, df_created[df_created.pr_closed_at.isnull()]])
-
-    # column to hold date num_days after the pr_creation date for comparision
-    df_open["response_by"] = df_open["pr_created_at"] + pd.DateOffset(days=num_days)
-
-    # Inlcude only the prs that msg timestamp is before the responded by time
-    df_response = df_open[df_open["msg_timestamp"] < df_open["response_by"]]
-
-    # generates number of columns ie open prs
-    num_open = df_open.shape[0]
-
-    # number of prs that had response in time interval
-    num_response = df_response.shape[0]
-
-    return num_open, num_response
@@ -4,15 +4,18 @@ import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 import logging
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from queries.pr_response_query import pr_response_query as prr
 from pages.utils.job_utils import nodata_graph
+from pages.utils.sweep_utils import open_ranges, count_active, first_date_index, to_ns
 import time
 import app
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributions"
 VIZ_ID = "pr-review-response"
@@ -125,10 +128,9 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[prr.__name__])
 def pr_review_response_graph(repolist, num_days, bot_switch):
-    while not_cached := cf.get_uncached(func_name=prr.__name__, repolist=repolist):
-        logging.warning(f"PR_FIRST_RESPONSE - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=prr.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -157,11 +159,6 @@ def pr_review_response_graph(repolist, num_days, bot_switch):
 
 
 def process_data(df: pd.DataFrame, num_days):
-    # convert to datetime objects rather than strings
-    df["msg_timestamp"] = pd.to_datetime(df["msg_timestamp"], utc=True)
-    df["pr_created_at"] = pd.to_datetime(df["pr_created_at"], utc=True)
-    df["pr_closed_at"] = pd.to_datetime(df["pr_closed_at"], utc=True)
-
     # sort in ascending earlier and only get ealiest value
     df = df.sort_values(by="msg_timestamp", axis=0, ascending=True)
 
@@ -179,15 +176,26 @@ def process_data(df: pd.DataFrame, num_days):
     # df for open prs and responded to prs in time interval
     df_pr_responses = dates.to_frame(index=False, name="Date")
 
-    # every day, count the number of PRs that are open on that day and the number of
-    # those that were responded to within num_days of their opening
-    df_pr_responses["Open"], df_pr_responses["Response"] = zip(
-        *df_pr_responses.apply(
-            lambda row: get_open_response(df, row.Date, num_days),
-            axis=1,
-        )
+    # the days each pr is open on, and the first day after its most recent message.
+    # these don't depend on num_days.
+    d, enter, leave = open_ranges(dates, df["pr_created_at"], df["pr_closed_at"])
+    msg, msg_missing = to_ns(df["msg_timestamp"])
+    after_msg = np.where(msg_missing, len(d), first_date_index(d, msg, inclusive=False))
+
+    # a message from someone other than the pr opener counts as a response until the pr closes,
+    # a message from the pr opener only until num_days after it was sent.
+    waiting_on_opener = (df["msg_cntrb_id"] == df["cntrb_id"]).to_numpy() & ~msg_missing
+    response_until = np.where(
+        waiting_on_opener,
+        first_date_index(d, msg + pd.Timedelta(days=num_days).value, inclusive=True),
+        len(d),
     )
 
+    # every day, count the number of PRs that are open on that day and the number of
+    # those that were responded to within num_days or are waiting on the pr opener
+    df_pr_responses["Open"] = count_active(len(d), enter, leave)
+    df_pr_responses["Response"] = count_active(len(d), np.maximum(enter, after_msg), np.minimum(leave, response_until))
+
     df_pr_responses["Date"] = df_pr_responses["Date"].dt.strftime("%Y-%m-%d")
 
     return df_pr_responses
@@ -223,65 +231,3 @@ def create_figure(df: pd.DataFrame, num_days):
     )
 
     return fig
-
-
-def get_open_response(df, date, num_days):
-    """
-    This function takes a date and determines how many prs in that time interval are
-    open and if they have a response within num_days or waiting on pr openers response.
-
-    Args:
-    -----
-        df : Pandas Dataframe
-            Dataframe with pr assignment actions of the assignees
-
-        date : Datetime Timestamp
-            Timestamp of the date
-
-        num_days : int
-            number of days that a response should be within
-
-    Returns:
-    --------
-        int, int: number of open prs, and number of prs responded to within num_days or waiting on pr openers response
-    """
-
-    # drop rows with prs that have been created after the date
-    df_created = df[df["pr_created_at"] <= date]
-
-    # drops rows that have been closed before date
-    df_open_at_date = df_created[df_created["pr_closed_at"] > date]
-
-    # include prs that have not been close yet
-    df_open_at_date = pd.concat([df_open_at_date, df_created[df_created.pr_closed_at.isnull()]])
-
-    # number of columns in df ie number of open prs
-    num_open = df_open_at_date.shape[0]
-
-    # get all prs that have atleast one response
-    df_response = df_open_at_date[df_open_at_date["msg_timestamp"].notnull()]
-
-    # if no messages for any of the open prs, return num_open and 0
-    if len(df_response.index) == 0:
-        return num_open, 0
-
-    # drop messages that happen after date considered
-    df_messages_in_range = df_open_at_date[df_open_at_date["msg_timestamp"] < date]
-
-    # order messages from earliest to latest by timestamp
-    df_messages_in_range = df_messages_in_range.sort_values(by="msg_timestamp", axis=0, ascending=True)
-
-    # threshold of when the last response would need to be by
-    before_date_by_num_days = date - pd.DateOffset(days=num_days)
-
-    # checks if the most recent message was within the date requirement or by someone other than
-    # the pr creator
-    df_responded_to_by_deadline = df_messages_in_range[
-        (df_messages_in_range["msg_timestamp"] > before_date_by_num_days)
-        | (df_messages_in_range["msg_cntrb_id"] != df_messages_in_range["cntrb_id"])
-    ]
-
-    # generates number of columns ie prs with a response within num_days or waiting on pr openers response
-    n_met_response_criteria = df_responded_to_by_deadline.shape[0]
-
-    return num_open, n_met_response_criteria
@@ -10,9 +10,11 @@ from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from pages.utils.job_utils import nodata_graph
+from pages.utils.sweep_utils import new_staling_stale_at
 from queries.prs_query import prs_query as prq
 import time
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributions"
 VIZ_ID = "pr-staleness"
@@ -177,6 +179,7 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[prq.__name__])
 def new_staling_prs_graph(repolist, interval, staling_interval, stale_interval):
     # conditional for the intervals to be valid options
     if staling_interval > stale_interval:
@@ -186,9 +189,7 @@ def new_staling_prs_graph(repolist, interval, staling_interval, stale_interval):
         return dash.no_update, dash.no_update
 
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=prq.__name__, repolist=repolist):
-        logging.warning(f"PULL REQUESTS STALENESS - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=prq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning("PULL REQUEST STALENESS - START")
@@ -214,11 +215,6 @@ def new_staling_prs_graph(repolist, interval, staling_interval, stale_interval):
 
 
 def process_data(df: pd.DataFrame, interval, staling_interval, stale_interval):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-    df["merged_at"] = pd.to_datetime(df["merged_at"], utc=True)
-    df["closed_at"] = pd.to_datetime(df["closed_at"], utc=True)
-
     # order values chronologically by creation date
     df = df.sort_values(by="created_at", axis=0, ascending=True)
 
@@ -233,12 +229,9 @@ def process_data(df: pd.DataFrame, interval, staling_interval, stale_interval):
     # df for new, staling, and stale prs for time interval
     df_status = dates.to_frame(index=False, name="Date")
 
-    # dynamically apply the function to all dates defined in the date_range to create df_status
-    df_status["New"], df_status["Staling"], df_status["Stale"] = zip(
-        *df_status.apply(
-            lambda row: get_new_staling_stale_up_to(df, row.Date, staling_interval, stale_interval),
-            axis=1,
-        )
+    # count the new, staling, and stale prs at all dates defined in the date_range at once
+    df_status["New"], df_status["Staling"], df_status["Stale"] = new_staling_stale_at(
+        df_status["Date"], df["created_at"], df["closed_at"], staling_interval, stale_interval
     )
 
     # formatting for graph generation
@@ -306,33 +299,3 @@ def create_figure(df_status: pd.DataFrame, interval):
     )
 
     return fig
-
-
-def get_new_staling_stale_up_to(df, date, staling_interval, stale_interval):
-    # drop rows that are more recent than the date limit
-    df_created = df[df["created_at"] <= date]
-
-    # drop rows that have been closed before date
-    df_in_range = df_created[df_created["closed_at"] > date]
-
-    # include rows that have a null closed value
-    df_in_range = pd.concat([df_in_range, df_created[df_created.closed_at.isnull()]])
-
-    # time difference for the amount of days before the threshold date
-    staling_days = date - relativedelta(days=+staling_interval)
-
-    # time difference for the amount of days before the threshold date
-    stale_days = date - relativedelta(days=+stale_interval)
-
-    # PRs still open at the specified date
-    numTotal = df_in_range.shape[0]
-
-    # num of currently open PRs that have been create in the last staling_value amount of days
-    numNew = df_in_range[df_in_range["created_at"] >= staling_days].shape[0]
-
-    staling = df_in_range[df_in_range["created_at"] > stale_days]
-    numStaling = staling[staling["created_at"] < staling_days].shape[0]
-
-    numStale = numTotal - (numNew + numStaling)
-
-    return [numNew, numStaling, numStale]
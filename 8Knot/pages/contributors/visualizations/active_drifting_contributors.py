@@ -9,11 +9,14 @@ from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from pages.utils.job_utils import nodata_graph
+from pages.utils.sweep_utils import active_drifting_away_at
 import time
 import app
 from queries.contributors_query import contributors_query as ctq
 import pages.utils.preprocessing_utils as preproc_utils
 import cache_manager.cache_facade as cf
+from cache_manager.frame_cache import retrieve_preprocessed
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "active-drifting-contributors"
@@ -181,6 +184,7 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[ctq.__name__])
 def active_drifting_contributors_graph(repolist, interval, drift_interval, away_interval, bot_switch):
     # conditional for the intervals to be valid options
     if drift_interval is None or away_interval is None:
@@ -190,21 +194,18 @@ def active_drifting_contributors_graph(repolist, interval, drift_interval, away_
         return dash.no_update, True
 
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=ctq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=ctq.__name__, repolist=repolist)
 
     logging.warning(f"{VIZ_ID} - START")
     start = time.perf_counter()
 
     # GET ALL DATA FROM POSTGRES CACHE
-    df = cf.retrieve_from_cache(
+    df = retrieve_preprocessed(
         tablename=ctq.__name__,
         repolist=repolist,
+        preprocess=preproc_utils.contributors_df_action_naming,
     )
 
-    df = preproc_utils.contributors_df_action_naming(df)
-
     # test if there is data
     if df.empty:
         logging.warning("ACTIVE_DRIFTING_CONTRIBUTOR_GROWTH - NO DATA AVAILABLE")
@@ -224,8 +225,6 @@ def active_drifting_contributors_graph(repolist, interval, drift_interval, away_
 
 
 def process_data(df: pd.DataFrame, interval, drift_interval, away_interval):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
     # df.rename(columns={"created_at": "created"}, inplace=True)
 
     # order from beginning of time to most recent
@@ -241,12 +240,9 @@ def process_data(df: pd.DataFrame, interval, drift_interval, away_interval):
     # df for active, driving, and away contributors for time interval
     df_status = dates.to_frame(index=False, name="Date")
 
-    # dynamically apply the function to all dates defined in the date_range to create df_status
-    df_status["Active"], df_status["Drifting"], df_status["Away"] = zip(
-        *df_status.apply(
-            lambda row: get_active_drifting_away_up_to(df, row.Date, drift_interval, away_interval),
-            axis=1,
-        )
+    # classify the contributors at all dates defined in the date_range at once
+    df_status["Active"], df_status["Drifting"], df_status["Away"] = active_drifting_away_at(
+        df_status["Date"], df["cntrb_id"], df["created_at"], drift_interval, away_interval
     )
 
     # formatting for graph generation
@@ -314,34 +310,3 @@ def create_figure(df_status: pd.DataFrame, interval):
     )
 
     return fig
-
-
-def get_active_drifting_away_up_to(df, date, drift_interval, away_interval):
-    # drop rows that are more recent than the date limit
-    df_lim = df[df["created_at"] <= date]
-
-    # keep more recent contribution per ID
-    df_lim = df_lim.drop_duplicates(subset="cntrb_id", keep="last")
-
-    # time difference, drifting_months before the threshold date
-    drift_mos = date - relativedelta(months=+drift_interval)
-
-    # time difference, away_months before the threshold date
-    away_mos = date - relativedelta(months=+away_interval)
-
-    # number of total contributors up until date
-    numTotal = df_lim.shape[0]
-
-    # number of 'active' contributors, people with contributions before the drift time
-    numActive = df_lim[df_lim["created_at"] >= drift_mos].shape[0]
-
-    # set of contributions that are before the away time
-    drifting = df_lim[df_lim["created_at"] > away_mos]
-
-    # number of the set of contributions that are after the drift time, but before away
-    numDrifting = drifting[drifting["created_at"] < drift_mos].shape[0]
-
-    # difference of the total to get the away value
-    numAway = numTotal - (numActive + numDrifting)
-
-    return [numActive, numDrifting, numAway]
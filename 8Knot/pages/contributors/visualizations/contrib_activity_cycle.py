@@ -5,11 +5,13 @@ from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
 import logging
+import calendar
 from dateutil.relativedelta import *  # type: ignore
 import plotly.express as px
 from pages.utils.graph_utils import baby_blue
 from queries.commits_query import commits_query as cmq
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 
@@ -126,19 +128,19 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[cmq.__name__])
 def contrib_activity_cycle_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=cmq.__name__, repolist=repolist):
-        logging.warning(f"COMMITS_OVER_TIME_VIZ - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=cmq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
 
-    # GET ALL DATA FROM POSTGRES CACHE
+    # GET EVENT COUNTS BY WEEKDAY AND HOUR FROM POSTGRES CACHE
     df = cf.retrieve_from_cache(
-        tablename=cmq.__name__,
+        tablename="commits_activity_rollup",
         repolist=repolist,
+        columns=["weekday", "hour", "events"],
     )
 
     # test if there is data
@@ -156,34 +158,18 @@ def contrib_activity_cycle_graph(repolist, interval):
 
 
 def process_data(df: pd.DataFrame, interval):
-    # for this usecase we want the datetimes to be in their local values
-    # tricking pandas to keep local values when UTC conversion is required for to_datetime
-    df["author_timestamp"] = df["author_timestamp"].astype("str").str[:-6]
-    df["committer_timestamp"] = df["committer_timestamp"].astype("str").str[:-6]
-
-    # convert to datetime objects rather than strings
-    df["author_timestamp"] = pd.to_datetime(df["author_timestamp"], utc=True)
-    df["committer_timestamp"] = pd.to_datetime(df["committer_timestamp"], utc=True)
-    # removes duplicate values when the author and committer is the same
-    df.loc[df["author_timestamp"] == df["committer_timestamp"], "author_timestamp"] = None
+    # incoming rows count authoring and committing events per repo per UTC weekday and hour.
+    # authoring isn't counted separately when the author and committer timestamps are the same.
 
     df_final = pd.DataFrame()
 
     if interval == "H":
-        # combine the hour values for author and committer
-        hour = pd.concat([df["author_timestamp"].dt.hour, df["committer_timestamp"].dt.hour])
-        df_hour = pd.DataFrame(hour, columns=["Hour"])
-        df_final = df_hour.groupby(["Hour"])["Hour"].count()
+        # combine the hour counts of all repos
+        df_final = df.groupby("hour")["events"].sum().rename_axis("Hour").rename("Hour")
     else:
-        # combine the weekday values for author and committer
-        weekday = pd.concat(
-            [
-                df["author_timestamp"].dt.day_name(),
-                df["committer_timestamp"].dt.day_name(),
-            ]
-        )
-        df_weekday = pd.DataFrame(weekday, columns=["Weekday"])
-        df_final = df_weekday.groupby(["Weekday"])["Weekday"].count()
+        # combine the weekday counts of all repos, ISO weekday 1 is Monday
+        weekday = df["weekday"].map(dict(enumerate(calendar.day_name, start=1)))
+        df_final = df.groupby(weekday)["events"].sum().rename_axis("Weekday").rename("Weekday")
 
     return df_final
 
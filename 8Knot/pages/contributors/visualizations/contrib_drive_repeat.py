@@ -15,6 +15,8 @@ from cache_manager.cache_manager import CacheManager as cm
 import app
 import pages.utils.preprocessing_utils as preproc_utils
 import cache_manager.cache_facade as cf
+from cache_manager.frame_cache import retrieve_preprocessed
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "contrib-drive-repeat"
@@ -168,23 +170,21 @@ def graph_title(view):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[ctq.__name__])
 def repeat_drive_by_graph(repolist, contribs, view, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=ctq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=ctq.__name__, repolist=repolist)
 
     logging.warning(f"{VIZ_ID} - START")
     start = time.perf_counter()
 
     # GET ALL DATA FROM POSTGRES CACHE
-    df = cf.retrieve_from_cache(
+    df = retrieve_preprocessed(
         tablename=ctq.__name__,
         repolist=repolist,
+        preprocess=preproc_utils.contributors_df_action_naming,
     )
 
-    df = preproc_utils.contributors_df_action_naming(df)
-
     # test if there is data
     if df.empty:
         logging.warning("CONTRIB DRIVE REPEAT - NO DATA AVAILABLE")
@@ -210,8 +210,6 @@ def repeat_drive_by_graph(repolist, contribs, view, bot_switch):
 
 
 def process_data(df, view, contribs):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
     # df.rename(columns={"created_at": "created"}, inplace=True)
 
     # graph on contribution subset
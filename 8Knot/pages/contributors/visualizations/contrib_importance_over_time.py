@@ -13,11 +13,14 @@ from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from queries.contributors_query import contributors_query as ctq
 import io
 from pages.utils.job_utils import nodata_graph
+from pages.utils.importance_utils import ACTIONS, contributor_counts, lottery_factors
 import time
 import datetime as dt
 import app
 import pages.utils.preprocessing_utils as preproc_utils
 import cache_manager.cache_facade as cf
+from cache_manager.frame_cache import retrieve_preprocessed
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "lottery-factor-over-time"
@@ -206,23 +209,21 @@ def graph_title(window_width):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[ctq.__name__])
 def create_contrib_prolificacy_over_time_graph(repolist, threshold, window_width, step_size, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=ctq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=ctq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID} - START")
 
     # GET ALL DATA FROM POSTGRES CACHE
-    df = cf.retrieve_from_cache(
+    df = retrieve_preprocessed(
         tablename=ctq.__name__,
         repolist=repolist,
+        preprocess=preproc_utils.contributors_df_action_naming,
     )
 
-    df = preproc_utils.contributors_df_action_naming(df)
-
     # remove bot data
     if bot_switch:
         df = df[~df["cntrb_id"].isin(app.bots_list)]
@@ -245,9 +246,6 @@ def create_contrib_prolificacy_over_time_graph(repolist, threshold, window_width
 
 
 def process_data(df, threshold, window_width, step_size):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
     # order values chronologically by created_at date
     df = df.sort_values(by="created_at", ascending=True)
 
@@ -265,21 +263,12 @@ def process_data(df, threshold, window_width, step_size):
     # calculate the end of each interval and store the values in a column named period_from
     df_final["period_to"] = df_final["period_from"] + pd.DateOffset(months=window_width)
 
-    # dynamically calculate the contributor prolificacy over time for each of the action times and store results in df_final
-    (
-        df_final["Commit"],
-        df_final["Issue Opened"],
-        df_final["Issue Comment"],
-        df_final["Issue Closed"],
-        df_final["PR Opened"],
-        df_final["PR Comment"],
-        df_final["PR Review"],
-    ) = zip(
-        *df_final.apply(
-            lambda row: cntrb_prolificacy_over_time(df, row.period_from, row.period_to, window_width, threshold),
-            axis=1,
-        )
-    )
+    # count the contributions of each contributor and action in every window at once,
+    # then the lottery factor of each action in each window. None where an action has no contributions.
+    counts = contributor_counts(df, df_final["period_from"], df_final["period_to"])
+    df_lottery = lottery_factors(counts, threshold).reindex(index=range(len(df_final)), columns=ACTIONS)
+    for action in ACTIONS:
+        df_final[action] = [None if pd.isna(v) else int(v) for v in df_lottery[action]]
 
     return df_final
 
@@ -407,72 +396,3 @@ def create_figure(df_final, threshold, step_size):
     )
 
     return fig
-
-
-def cntrb_prolificacy_over_time(df, period_from, period_to, window_width, threshold):
-    # subset df such that the rows correspond to the window of time defined by period from and period to
-    time_mask = (df["created_at"] >= period_from) & (df["created_at"] <= period_to)
-    df_in_range = df.loc[time_mask]
-
-    # initialize varibles to store contributor prolificacy accoding to action type
-    commit, issueOpened, issueComment, issueClosed, prOpened, prReview, prComment = (
-        None,
-        None,
-        None,
-        None,
-        None,
-        None,
-        None,
-    )
-
-    # count the number of contributions each contributor has made according each action type
-    df_count_cntrbs = df_in_range.groupby(["Action", "cntrb_id"])["cntrb_id"].count().to_frame()
-    df_count_cntrbs = df_count_cntrbs.rename(columns={"cntrb_id": "count"}).reset_index()
-
-    # pivot df such that the column names correspond to the different action types, index is the cntrb_ids, and the values are the number of contributions of each contributor
-    df_count_cntrbs = df_count_cntrbs.pivot(index="cntrb_id", columns="Action", values="count")
-
-    commit = calc_lottery_factor(df_count_cntrbs, "Commit", threshold)
-    issueOpened = calc_lottery_factor(df_count_cntrbs, "Issue Opened", threshold)
-    issueComment = calc_lottery_factor(df_count_cntrbs, "Issue Comment", threshold)
-    issueClosed = calc_lottery_factor(df_count_cntrbs, "Issue Closed", threshold)
-    prOpened = calc_lottery_factor(df_count_cntrbs, "PR Opened", threshold)
-    prReview = calc_lottery_factor(df_count_cntrbs, "PR Review", threshold)
-    prComment = calc_lottery_factor(df_count_cntrbs, "PR Comment", threshold)
-
-    return commit, issueOpened, issueComment, issueClosed, prOpened, prReview, prComment
-
-
-def calc_lottery_factor(df, action_type, threshold):
-    # if the df is empty return None
-    if df.empty:
-        return None
-
-    # if the specified action type is not in the dfs' cols return None
-    if action_type not in df.columns:
-        return None
-
-    # sort rows in df based on number of contributions from greatest to least
-    df = df.sort_values(by=action_type, ascending=False)
-
-    # calculate the threshold amount of contributions
-    thresh_cntrbs = df[action_type].sum() * threshold
-
-    # drop rows where the cntrb_id is None
-    mask = df.index.get_level_values("cntrb_id") == None
-    df = df[~mask]
-
-    # initilize running sum of contributors who make up contributor prolificacy
-    lottery_factor = 0
-
-    # initialize running sum of contributions
-    running_sum = 0
-
-    for _, row in df.iterrows():
-        running_sum += row[action_type]  # update the running sum by the number of contributions a contributor has made
-        lottery_factor += 1  # update contributor prolificacy
-        # if the running sum of contributions is greater than or equal to the threshold amount, break
-        if running_sum >= thresh_cntrbs:
-            break
-
-    return lottery_factor
@@ -12,11 +12,14 @@ import plotly.express as px
 from pages.utils.graph_utils import get_graph_time_values, baby_blue
 from queries.contributors_query import contributors_query as ctq
 from pages.utils.job_utils import nodata_graph
+from pages.utils.importance_utils import contributor_counts, top_contributors
 import time
 import datetime as dt
 import app
 import pages.utils.preprocessing_utils as preproc_utils
 import cache_manager.cache_facade as cf
+from cache_manager.frame_cache import retrieve_preprocessed
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "contrib-importance-pie"
@@ -212,23 +215,21 @@ def graph_title(k, action_type):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[ctq.__name__])
 def create_top_k_cntrbs_graph(repolist, action_type, top_k, start_date, end_date, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=ctq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=ctq.__name__, repolist=repolist)
 
     logging.warning(f"{VIZ_ID} - START")
     start = time.perf_counter()
 
     # GET ALL DATA FROM POSTGRES CACHE
-    df = cf.retrieve_from_cache(
+    df = retrieve_preprocessed(
         tablename=ctq.__name__,
         repolist=repolist,
+        preprocess=preproc_utils.contributors_df_action_naming,
     )
 
-    df = preproc_utils.contributors_df_action_naming(df)
-
     # test if there is data
     if df.empty:
         logging.warning(f"{VIZ_ID} - NO DATA AVAILABLE")
@@ -253,9 +254,6 @@ def create_top_k_cntrbs_graph(repolist, action_type, top_k, start_date, end_date
 
 
 def process_data(df: pd.DataFrame, action_type, top_k, start_date, end_date):
-    # convert to datetime objects rather than strings
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
-
     # order values chronologically by created_at date
     df = df.sort_values(by="created_at", ascending=True)
 
@@ -265,37 +263,8 @@ def process_data(df: pd.DataFrame, action_type, top_k, start_date, end_date):
     if end_date is not None:
         df = df[df.created_at <= end_date]
 
-    # subset the df such that it only contains rows where the Action column value is the action type
-    df = df[df["Action"].str.contains(action_type)]
-
-    # get the number of total contributions of the specific action type
-    t_sum = df.shape[0]
-
-    # count the number of contributions for each contributor
-    df = (df.groupby("cntrb_id")["Action"].count()).to_frame()
-
-    # sort rows according to amount of contributions from greatest to least
-    df.sort_values(by="Action", ascending=False, inplace=True)
-
-    df = df.reset_index()
-
-    # rename Action column to action_type
-    df = df.rename(columns={"Action": action_type})
-
-    # get the number of total contributions
-    t_sum = df[action_type].sum()
-
-    # index df to get first k rows
-    df = df.head(top_k)
-
-    # get the number of total top k contributions
-    df_sum = df[action_type].sum()
-
-    # calculate the remaining contributions by taking the the difference of t_sum and df_sum
-    # dataframes no longer implement above 'append' interface as of Pandas 1.4.4
-    # create a single-entry dataframe that we can concatenate onto existing df
-    df_concat = pd.DataFrame(data={"cntrb_id": ["Other"], action_type: [t_sum - df_sum]})
-    df = pd.concat([df, df_concat], ignore_index=True)
+    # count the contributions of each contributor, keeping the top k and grouping the rest as "Other"
+    df = top_contributors(contributor_counts(df), action_type, top_k)
 
     return df
 
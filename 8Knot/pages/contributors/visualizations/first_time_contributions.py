@@ -13,6 +13,7 @@ from pages.utils.job_utils import nodata_graph
 import app
 import pages.utils.preprocessing_utils as preproc_utils
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "first-time-contribution"
@@ -91,11 +92,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[ctq.__name__])
 def create_first_time_contributors_graph(repolist, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=ctq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=ctq.__name__, repolist=repolist)
 
     logging.warning(f"{VIZ_ID} - START")
     start = time.perf_counter()
@@ -104,6 +104,8 @@ def create_first_time_contributors_graph(repolist, bot_switch):
     df = cf.retrieve_from_cache(
         tablename=ctq.__name__,
         repolist=repolist,
+        columns=["cntrb_id", "created_at", "action"],
+        filters={"rank": 1},
     )
 
     df = preproc_utils.contributors_df_action_naming(df)
@@ -127,13 +129,8 @@ def create_first_time_contributors_graph(repolist, bot_switch):
 
 
 def process_data(df):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
     # df.rename(columns={"created_at": "created"}, inplace=True)
 
-    # selection for 1st contribution only
-    df = df[df["rank"] == 1]
-
     # reset index to be ready for plotly
     df = df.reset_index()
 
@@ -13,6 +13,7 @@ import time
 import app
 import pages.utils.preprocessing_utils as preproc_utils
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "contributors"
 VIZ_ID = "new-contributor"
@@ -122,11 +123,10 @@ def toggle_popover_1(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[ctq.__name__])
 def new_contributor_graph(repolist, interval, bot_switch):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=ctq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=ctq.__name__, repolist=repolist)
 
     logging.warning(f"{VIZ_ID} - START")
     start = time.perf_counter()
@@ -135,6 +135,8 @@ def new_contributor_graph(repolist, interval, bot_switch):
     df = cf.retrieve_from_cache(
         tablename=ctq.__name__,
         repolist=repolist,
+        columns=["cntrb_id", "created_at", "action"],
+        filters={"rank": 1},
     )
 
     df = preproc_utils.contributors_df_action_naming(df)
@@ -158,8 +160,6 @@ def new_contributor_graph(repolist, interval, bot_switch):
 
 
 def process_data(df, interval):
-    # convert to datetime objects with consistent column name
-    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
     # df.rename(columns={"created_at": "created"}, inplace=True)
 
     # order from beginning of time to most recent
@@ -168,12 +168,9 @@ def process_data(df, interval):
     """
         Assume that the cntrb_id values are unique to individual contributors.
         Find the first rank-1 contribution of the contributors, saving the created
-        date.
+        date. Only rank-1 contributions are read from the cache.
     """
 
-    # keep only first contributions
-    df = df[df["rank"] == 1]
-
     # get all of the unique entries by contributor ID
     df.drop_duplicates(subset=["cntrb_id"], inplace=True)
     df.reset_index(inplace=True)
@@ -2,9 +2,7 @@ from dash import html, dcc
 import dash_bootstrap_components as dbc
 from dash import callback
 from dash.dependencies import Input, Output, State
-from db_manager.augur_manager import AugurManager
-import numpy as np
-import pandas as pd
+from pages.utils.home_metrics import home_metrics, format_age
 
 
 # card for number of open issues in the selected repo set
@@ -111,176 +109,29 @@ gc_issue_metrics = dbc.Card(
     ],
 )
 
-# callbacks below are for the specific queries for these cards
-
-
-@callback(
-    Output("avg-closed-issue-age", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def avg_closed_issue_age(repolist):
-    """Queries Augur for the avg age of closed issues for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(now() - i.created_at) as difference
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is not null
-        """
-    )
-
-    # timedelta object
-    diff = df.iat[0, 0]
-
-    # days component
-    diff_days = diff.days
-
-    # timedelta representation of # of days to get hours
-    days_delta = pd.Timedelta(days=diff_days)
-
-    # gives remaining hours
-    diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
-
-    return f"{diff_days} days, {round(diff_hours, 1)} hours"
-
-
-@callback(
-    Output("avg-open-issue-age", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def avg_open_issue_age(repolist):
-    """Queries Augur for the avg age of open issues for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(now() - i.created_at) as difference
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is null
-        """
-    )
-
-    # timedelta object
-    diff = df.iat[0, 0]
-
-    # days component
-    diff_days = diff.days
-
-    # timedelta representation of # of days to get hours
-    days_delta = pd.Timedelta(days=diff_days)
-
-    # gives remaining hours
-    diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
-
-    return f"{diff_days} days, {round(diff_hours, 1)} hours"
-
-
-@callback(
-    Output("closed-issue-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def closed_issue_count(repolist):
-    """Queries Augur for the count of closed issues for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct i.issue_id) as num_open_issues
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is not null
-        """
-    )
-
-    return df.iat[0, 0]
+# callback below fills all of these cards from the home page metrics of the repos
 
 
 @callback(
     Output("open-issue-count", "children"),
+    Output("closed-issue-count", "children"),
+    Output("avg-open-issue-age", "children"),
+    Output("avg-closed-issue-age", "children"),
     [
         Input("repo-choices", "data"),
     ],
     background=True,
 )
-def open_issue_count(repolist):
-    """Queries Augur for the count of open issues for repos in repolist
+def issue_metrics(repolist):
+    """Gets the count of open and closed issues, and their average age, for repos in repolist
     Args:
         repolist ([int]): list of the repos queried
     """
+    metrics = home_metrics(repolist)
 
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct i.issue_id) as num_open_issues
-        from
-            augur_data.issues i,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and i.repo_id = r.repo_id
-            and i.closed_at is null
-        """
+    return (
+        metrics["num_open_issues"],
+        metrics["num_closed_issues"],
+        format_age(metrics["avg_open_issue_age"]),
+        format_age(metrics["avg_closed_issue_age"]),
     )
-
-    return df.iat[0, 0]
@@ -2,10 +2,8 @@ from dash import html, dcc
 import dash_bootstrap_components as dbc
 from dash import callback
 from dash.dependencies import Input, Output, State
-import pandas as pd
-import numpy as np
 import logging
-from db_manager.augur_manager import AugurManager
+from pages.utils.home_metrics import home_metrics, format_age, format_average
 
 # card for number of open prs in the selected repo set
 pr_open = dbc.Card(
@@ -164,259 +162,32 @@ gc_pr_metrics = dbc.Card(
     ],
 )
 
-# callbacks below are for the specific queries for these cards
+# callback below fills all of these cards from the home page metrics of the repos
 @callback(
     Output("open-pr-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def pr_count(repolist):
-    """Queries Augur for the count of open prs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct pr.pull_request_id) as num_open_prs
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_closed_at is null
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
     Output("merged-pr-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def merged_pr_count(repolist):
-    """Queries Augur for the count of merged prs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct pr.pull_request_id) as num_open_prs
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_merged_at is not null
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
     Output("rejected-pr-count", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def rejected_pr_count(repolist):
-    """Queries Augur for the count of unmerged but closed prs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            count(distinct pr.pull_request_id) as num_open_prs
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_merged_at is null
-            and pr.pr_closed_at is not null
-        """
-    )
-
-    return df.iat[0, 0]
-
-
-@callback(
     Output("avg-open-pr-age", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def avg_open_pr_age(repolist):
-    """Queries Augur for the average age of open PRs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(now() - pr.pr_created_at) as difference
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_closed_at is null
-        """
-    )
-
-    # timedelta object
-    diff = df.iat[0, 0]
-
-    # days component
-    diff_days = diff.days
-
-    # timedelta representation of # of days to get hours
-    days_delta = pd.Timedelta(days=diff_days)
-
-    # gives remaining hours
-    diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
-
-    return f"{diff_days} days, {round(diff_hours, 1)} hours"
-
-
-@callback(
     Output("avg-merged-pr-age", "children"),
-    [
-        Input("repo-choices", "data"),
-    ],
-    background=True,
-)
-def avg_merged_pr_age(repolist):
-    """Queries Augur for the average age of merged PRs for repos in repolist
-    Args:
-        repolist ([int]): list of the repos queried
-    """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(pr.pr_merged_at - pr.pr_created_at) as difference
-        from
-            augur_data.pull_requests pr,
-            augur_data.repo r
-        where
-            r.repo_id in ({str(repolist)[1:-1]})
-            and pr.repo_id = r.repo_id
-            and pr.pr_closed_at is not null
-            and pr.pr_merged_at is not null
-        """
-    )
-
-    # timedelta object
-    diff = df.iat[0, 0]
-
-    # days component
-    diff_days = diff.days
-
-    # timedelta representation of # of days to get hours
-    days_delta = pd.Timedelta(days=diff_days)
-
-    # gives remaining hours
-    diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
-
-    return f"{diff_days} days, {round(diff_hours, 1)} hours"
-
-
-@callback(
     Output("avg-pr-messages", "children"),
     [
         Input("repo-choices", "data"),
     ],
     background=True,
 )
-def rejected_pr_count(repolist):
-    """Queries Augur for the average # of messages on all PRs for repos in repolist
+def pr_metrics(repolist):
+    """Gets the count of open, merged, and unmerged but closed prs, the average age of
+    open and merged prs, and the average # of messages on all prs for repos in repolist
     Args:
         repolist ([int]): list of the repos queried
     """
-
-    # create augurmanager, should get creds from environment
-    db = AugurManager()
-
-    # create engine object from creds
-    db.get_engine()
-
-    # run query
-    df = db.run_query(
-        f"""
-        select
-            avg(prmc.message_count) as avg_message_count
-        from
-            /*
-            * count the number of unique message ID's for each PR
-            * */
-            (select
-                count(distinct prmr.msg_id) message_count
-            from
-                augur_data.pull_requests pr,
-                augur_data.pull_request_message_ref prmr,
-                augur_data.repo r
-            where
-                r.repo_id in ({str(repolist)[1:-1]})
-                and pr.repo_id = r.repo_id
-                and prmr.pull_request_id = pr.pull_request_id
-            group by pr.pull_request_id
-            ) as prmc
-        """
+    metrics = home_metrics(repolist)
+
+    return (
+        metrics["num_open_prs"],
+        metrics["num_merged_prs"],
+        metrics["num_rejected_prs"],
+        format_age(metrics["avg_open_pr_age"]),
+        format_age(metrics["avg_merged_pr_age"]),
+        format_average(metrics["avg_pr_messages"]),
     )
-
-    return round(df.iat[0, 0], 2)
@@ -11,7 +11,6 @@ from dash import callback, html
 from dash.dependencies import Input, Output, State, MATCH
 from app import augur
 from flask_login import current_user
-from cache_manager.cache_manager import CacheManager as cm
 import cache_manager.cache_facade as cf
 from queries.issues_query import issues_query as iq
 from queries.commits_query import commits_query as cq
@@ -36,11 +35,17 @@ import redis
 import flask
 from .search_utils import fuzzy_search
 from .search_utils import clean_repo_name
+from .search_index import SearchIndex
 
 # list of queries to be run
 # QUERIES = [iq, cq, cnq, prq, aq, iaq, praq, prr, cpfq, rfq, prfq, rlq, pvq, rrq, osq, riq] - codebase page disabled
 QUERIES = [iq, cq, cnq, prq, aq, iaq, praq, prr, rlq, pvq, rrq, osq, riq]
 
+# n-gram index of the searchbar's repo and org options, which are only loaded at startup,
+# so searches don't scan every option on each keystroke.
+search_index = SearchIndex(augur.get_multiselect_options())
+logging.warning(f"SEARCH INDEX BUILT - {len(search_index)} OPTIONS")
+
 
 # check if login has been enabled in config
 login_enabled = os.getenv("AUGUR_LOGIN_ENABLED", "False") == "True"
@@ -254,13 +259,13 @@ def dynamic_multiselect_options(user_in: str, selections, cached_options):
 
         # First, the search goes through the client-side cache if available
         if cached_options:
-            cache_matches = fuzzy_search(search_query, cached_options, threshold=search_threshold)
+            cache_matches = search_index.search_among(search_query, cached_options, threshold=search_threshold)
             logging.info(f"Cache search found {len(cache_matches)} matches (threshold={search_threshold})")
 
         # Always also search server for comprehensive results (especially for longer queries)
         if len(search_query) >= 3:
             try:
-                server_options = augur.get_multiselect_options().copy()
+                user_options = []
                 if current_user.is_authenticated:
                     try:
                         users_cache = redis.StrictRedis(
@@ -272,11 +277,13 @@ def dynamic_multiselect_options(user_in: str, selections, cached_options):
                         users_cache.ping()
                         if users_cache.exists(f"{current_user.get_id()}_group_options"):
                             user_options = json.loads(users_cache.get(f"{current_user.get_id()}_group_options"))
-                            server_options = server_options + user_options
                     except redis.exceptions.ConnectionError as e:
                         logging.error(f"SERVER SEARCH: Could not connect to users-cache. Error: {str(e)}")
 
-                server_matches = fuzzy_search(search_query, server_options, threshold=search_threshold)
+                # all of augur's options are in the index, the user's groups are searched after them.
+                server_matches = search_index.search(search_query, threshold=search_threshold) + fuzzy_search(
+                    search_query, user_options, threshold=search_threshold
+                )
                 logging.info(f"Server search found {len(server_matches)} matches (threshold={search_threshold})")
 
             except Exception as e:
@@ -621,18 +628,19 @@ def run_queries(repos):
         repos ([int]): repositories we collect data for.
     """
 
-    # cache manager object
-    cache = cm()
-
     # list of queries to process
     funcs = QUERIES
 
     # list of job promises
     jobs = []
 
+    # only download repos that aren't currently in cache,
+    # or that are cached but due for a delta refresh.
+    # one lookup for all of the queries.
+    uncached = cf.get_uncached_many({f.__name__: repos for f in funcs}, include_stale=True)
+
     for f in funcs:
-        # only download repos that aren't currently in cache
-        not_ready = cf.get_uncached(f.__name__, repos)
+        not_ready = uncached[f.__name__]
         if len(not_ready) == 0:
             logging.warning(f"{f.__name__} - NO DISPATCH - ALL REPOS IN CACHE")
             continue
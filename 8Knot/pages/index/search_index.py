@@ -0,0 +1,322 @@
+"""
+Server-side index of the searchbar's options, so that a search only
+scores the options that could match instead of every option.
+
+fuzzy_search (see search_utils) scans every option for the query as a
+substring and then scores every other option with rapidfuzz, on each
+keystroke. With tens of thousands of repos that's noticeable latency.
+
+The index is built once, when the options are loaded. It has:
+
+    - an inverted index from each 1-, 2-, and 3-character n-gram of the
+      lowercased labels to the options whose label contains it, and
+    - a prefix table: the lowercased labels in sorted order.
+
+Options that contain the query are found by intersecting the postings
+of the query's trigrams (or looking up the query itself, if it's at
+most 3 characters) and checking only those options. Options that start
+with a short query are a range of the prefix table. Fuzzy matches are
+scored only among the MAX_FUZZY_CANDIDATES options whose bigrams are
+most similar to the query's.
+
+Only the leading results match fuzzy_search's. Options that contain the
+query, and the results of queries of up to SHORT_QUERY characters, are
+the same and in the same order. The fuzzy matches after them are cut
+short: options that fuzzy_search would rank low, or that don't share a
+bigram with the query, aren't returned. On a synthetic catalog of
+50,000 repos (see scripts/benchmark_search.py), about 99% of
+fuzzy_search's first 10 results and 96-97% of its first 50 are in the
+index's, but only about 27% of all of its results for substring queries
+and 9% for misspelled ones, in exchange for searches that are about 30
+times faster.
+"""
+from bisect import bisect_left
+from typing import List, Dict, Any
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from .search_utils import fuzzy_search
+
+# n-gram lengths that are indexed. Queries of up to this many characters are looked up directly.
+MAX_GRAM = 3
+
+# options that are scored with rapidfuzz per search, those whose n-grams of FUZZY_GRAM characters are
+# most similar to the query's. Bigrams, unlike trigrams, are mostly kept by a typo in a short word.
+MAX_FUZZY_CANDIDATES = 1000
+FUZZY_GRAM = 2
+
+# n-grams are encoded as integers in base CODE_BASE, with digits one more than their characters' code points,
+# so that n-grams of n characters have codes in [CODE_BASE ** (n - 1), CODE_BASE ** n) and codes of every
+# length up to MAX_GRAM are distinct int64s.
+CODE_BASE = 0x110001
+
+# labels whose n-grams are encoded at once when the index is built. Labels are encoded in order of length,
+# as a fixed-width array of code points per batch, so long labels only widen the array of their own batch.
+BUILD_BATCH = 4096
+
+# prefix and substring matches returned for queries of up to SHORT_QUERY characters, as in search_short_query.
+SHORT_QUERY = 2
+SHORT_QUERY_LIMIT = 50
+
+
+class SearchIndex:
+    """
+    N-gram and prefix index of searchbar options, built once per set of options.
+
+    Attributes:
+    -----------
+        options : [{label, value}]
+            Indexed options, in the order results are returned in.
+
+        labels : [str]
+            Lowercased label of each option.
+
+    Methods:
+    --------
+        search(query, threshold, values):
+            Options matching {query}, like search_utils.fuzzy_search.
+
+        search_among(query, options, threshold):
+            Options of {options} matching {query}, whether they're indexed or not.
+    """
+
+    def __init__(self, options: List[Dict[str, Any]]):
+        self.options = list(options)
+        self.labels = [opt["label"].lower() for opt in self.options]
+        self._values = pd.Index([opt["value"] for opt in self.options])
+
+        # ids of each (label, value) option. Values alone aren't unique, e.g. orgs whose names only differ in case.
+        self._option_ids = {}
+        for i, opt in enumerate(self.options):
+            self._option_ids.setdefault((opt["label"], opt["value"]), []).append(i)
+
+        # prefix table
+        order = sorted(range(len(self.labels)), key=self.labels.__getitem__)
+        self._sorted_labels = [self.labels[i] for i in order]
+        self._sorted_ids = np.array(order, dtype=np.int64)
+
+        # inverted index, as the ascending option ids of each n-gram's postings, stored back to back
+        # in one array in order of the n-grams' codes. Each n-gram length is built separately, and
+        # their codes don't overlap, so the postings of each length are appended in order.
+        keys, starts, postings = [], [], []
+        n_postings = 0
+        for n in range(1, MAX_GRAM + 1):
+            gram_codes, ids = self._encode_grams(n)
+
+            # each (n-gram, option) pair once
+            order = np.lexsort((ids, gram_codes))
+            gram_codes, ids = gram_codes[order], ids[order]
+            distinct = np.r_[True, (gram_codes[1:] != gram_codes[:-1]) | (ids[1:] != ids[:-1])]
+            gram_codes, ids = gram_codes[distinct], ids[distinct]
+
+            if n == FUZZY_GRAM:
+                # distinct FUZZY_GRAM n-grams of each label, to normalize the number it shares with a query by.
+                self._fuzzy_gram_counts = np.bincount(ids, minlength=len(self.labels))
+
+            # only the first code of each n-gram's postings is kept
+            gram_starts = np.flatnonzero(np.r_[True, gram_codes[1:] != gram_codes[:-1]]) if len(ids) else []
+            keys.append(gram_codes[gram_starts])
+            starts.append(np.asarray(gram_starts, dtype=np.int64) + n_postings)
+            postings.append(ids)
+            n_postings += len(ids)
+
+        self._gram_keys = np.concatenate(keys)
+        self._offsets = np.r_[np.concatenate(starts), n_postings]
+        self._postings = np.concatenate(postings)
+
+    def __len__(self):
+        return len(self.options)
+
+    def search(self, query: str, threshold: float = 0.2, values=None) -> List[Dict[str, Any]]:
+        """
+        Options matching {query}, case-insensitive: for short queries, those that
+        start with it then those that contain it; otherwise those that contain it,
+        then the most similar of the rest by token sort ratio.
+
+        Args:
+            query (str): search query
+            threshold (float, optional): minimum similarity, between 0 and 1, of fuzzy matches. Defaults to 0.2.
+            values (set, optional): only return options with these values. Defaults to every option.
+
+        Returns:
+            [{label, value}]: matching options, most relevant first
+        """
+        allowed = None if values is None else self._values.isin(list(values))
+        return self._search(query, threshold, allowed)
+
+    def __contains__(self, option: Dict[str, Any]) -> bool:
+        return (option["label"], option["value"]) in self._option_ids
+
+    def search_among(self, query: str, options: List[Dict[str, Any]], threshold: float = 0.2) -> List[Dict[str, Any]]:
+        """
+        Options of {options} matching {query}. Options that are in the index, with the same label
+        and value, are searched with it, and the others, e.g. a user's groups, with
+        search_utils.fuzzy_search after them.
+
+        Args:
+            query (str): search query
+            options ([{label, value}]): options to search, e.g. the client-side cache of options
+            threshold (float, optional): minimum similarity, between 0 and 1, of fuzzy matches. Defaults to 0.2.
+
+        Returns:
+            [{label, value}]: matching options, most relevant first
+        """
+        allowed = np.zeros(len(self.options), dtype=bool)
+        others = []
+        for opt in options:
+            ids = self._option_ids.get((opt["label"], opt["value"]))
+            if ids is None:
+                others.append(opt)
+            else:
+                allowed[ids] = True
+
+        return self._search(query, threshold, allowed) + fuzzy_search(query, others, threshold)
+
+    def _search(self, query: str, threshold: float, allowed: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        (private)
+        Options matching {query}, only among those that are {allowed} if it isn't None.
+        """
+        if not query:
+            ids = np.arange(len(self.options)) if allowed is None else np.flatnonzero(allowed)
+            return self._to_options(ids)
+
+        query = query.lower()
+        if len(query) <= SHORT_QUERY:
+            return self._search_short(query, allowed)
+
+        contains = self._containing(query)
+        if allowed is not None:
+            contains = contains[allowed[contains]]
+
+        return self._to_options(contains) + self._fuzzy(query, threshold, contains, allowed)
+
+    def _postings_of(self, gram: str) -> np.ndarray:
+        """
+        (private)
+        Ascending ids of the options whose label contains {gram}, of at most MAX_GRAM characters.
+        """
+        key = 0
+        for char in gram:
+            key = key * CODE_BASE + ord(char) + 1
+
+        code = np.searchsorted(self._gram_keys, key)
+        if code == len(self._gram_keys) or self._gram_keys[code] != key:
+            return np.empty(0, dtype=np.int32)
+        return self._postings[self._offsets[code] : self._offsets[code + 1]]
+
+    def _encode_grams(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (private)
+        Code of every n-gram of {n} characters of every label, and the id of its option.
+        """
+        lengths = np.fromiter((len(label) for label in self.labels), dtype=np.int64, count=len(self.labels))
+        by_length = np.argsort(lengths, kind="stable")
+
+        codes, ids = [], []
+        for start in range(0, len(by_length), BUILD_BATCH):
+            batch = by_length[start : start + BUILD_BATCH]
+            width = int(lengths[batch[-1]])
+            if width < n:
+                continue
+
+            # code points of each label, padded to the longest label of the batch
+            chars = np.array([self.labels[i] for i in batch], dtype=f"<U{width}").view(np.uint32)
+            chars = chars.reshape(len(batch), width).astype(np.int64) + 1
+
+            batch_codes = chars[:, : width - n + 1]
+            for k in range(1, n):
+                batch_codes = batch_codes * CODE_BASE + chars[:, k : width - n + 1 + k]
+
+            # n-grams that start within n characters of the end of a label include padding
+            in_label = np.arange(width - n + 1) < (lengths[batch] - n + 1)[:, None]
+            codes.append(batch_codes[in_label])
+            ids.append(np.repeat(batch.astype(np.int32), in_label.sum(axis=1)))
+
+        if not codes:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+        return np.concatenate(codes), np.concatenate(ids)
+
+    @staticmethod
+    def _grams(text: str, n: int) -> set:
+        """
+        (private)
+        Distinct n-grams of {text} of {n} characters. None if {text} is shorter.
+        """
+        return {text[j : j + n] for j in range(len(text) - n + 1)}
+
+    def _containing(self, query: str) -> np.ndarray:
+        """
+        (private)
+        Ascending ids of the options whose label contains {query}.
+        """
+        grams = [query] if len(query) <= MAX_GRAM else self._grams(query, MAX_GRAM)
+        postings = sorted((self._postings_of(gram) for gram in grams), key=len)
+
+        # every trigram of the query is in a label that contains it, so the
+        # intersection, starting from the shortest postings, has every match.
+        candidates = postings[0]
+        for p in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, p, assume_unique=True)
+
+        if len(query) <= MAX_GRAM:
+            return candidates
+        return np.array([i for i in candidates if query in self.labels[i]], dtype=np.int64)
+
+    def _search_short(self, query: str, allowed: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        (private)
+        Options that start with {query}, then options that contain it, at most SHORT_QUERY_LIMIT of each.
+        """
+        lo = bisect_left(self._sorted_labels, query)
+        hi = bisect_left(self._sorted_labels, query + "\U0010ffff", lo)
+        starts_with = np.sort(self._sorted_ids[lo:hi])
+
+        contains = np.setdiff1d(self._postings_of(query), starts_with, assume_unique=True)
+
+        if allowed is not None:
+            starts_with = starts_with[allowed[starts_with]]
+            contains = contains[allowed[contains]]
+
+        return self._to_options(starts_with[:SHORT_QUERY_LIMIT]) + self._to_options(contains[:SHORT_QUERY_LIMIT])
+
+    def _fuzzy(self, query: str, threshold: float, exclude: np.ndarray, allowed: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        (private)
+        Options not in {exclude} whose token sort ratio with {query} is at least {threshold},
+        among the MAX_FUZZY_CANDIDATES whose n-grams are most similar to its. Most similar first.
+        """
+        query_grams = self._grams(query, FUZZY_GRAM)
+        shared = np.bincount(
+            np.concatenate([self._postings_of(gram) for gram in query_grams]), minlength=len(self.options)
+        )
+        shared[exclude] = 0
+        if allowed is not None:
+            shared[~allowed] = 0
+
+        candidates = np.flatnonzero(shared)
+        if len(candidates) > MAX_FUZZY_CANDIDATES:
+            # Dice coefficient of the n-gram sets, which like the token sort ratio
+            # favors labels of about the query's length over longer labels that contain more of it.
+            dice = shared[candidates] / (len(query_grams) + self._fuzzy_gram_counts[candidates])
+            most_similar = np.argpartition(-dice, MAX_FUZZY_CANDIDATES - 1)[:MAX_FUZZY_CANDIDATES]
+            candidates = np.sort(candidates[most_similar])
+
+        # ordered by score, then by position in the options, like process.extract over all options.
+        matches = process.extract(
+            query,
+            [self.labels[i] for i in candidates],
+            scorer=fuzz.token_sort_ratio,
+            limit=None,
+            score_cutoff=int(threshold * 100),
+        )
+        return self._to_options(candidates[[index for _, _, index in matches]])
+
+    def _to_options(self, ids: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        (private)
+        Options with the given ids.
+        """
+        return [self.options[i] for i in ids]
@@ -13,6 +13,7 @@ from pages.utils.job_utils import nodata_graph
 import time
 import datetime as dt
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 
 PAGE = "repo_info"
 VIZ_ID = "code-languages"
@@ -137,11 +138,10 @@ def graph_title(view):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[rlq.__name__])
 def code_languages_graph(repolist, view):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=rlq.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=rlq.__name__, repolist=repolist)
 
     start = time.perf_counter()
     logging.warning(f"{VIZ_ID}- START")
@@ -113,9 +113,6 @@ def process_data(df_repo_files, df_repo_info, df_releases):
 
     updated_date = pd.to_datetime(str(unique_updated_times[-1])).strftime("%d/%m/%Y")
 
-    # convert to datetime objects rather than strings
-    df_releases["release_published_at"] = pd.to_datetime(df_releases["release_published_at"], utc=True)
-
     # release information preprocessing
     # get date of previous row/previous release
     df_releases["previous_release"] = df_releases["release_published_at"].shift()
@@ -207,19 +204,15 @@ def multi_query_helper(repos: list[int]):
     """
 
     # wait for data to asynchronously download and become available.
-    """while not_cached := cf.get_uncached(func_name=rfq.__name__, repolist=repos):
-        logging.warning(f"REPO GENERAL INFO - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)"""  # comment out until query is fixed
-
-    # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=riq.__name__, repolist=repos):
-        logging.warning(f"REPO GENERAL INFO - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    """cf.wait_for_cached(func_name=rfq.__name__, repolist=repos)"""  # comment out until query is fixed
 
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=rrq.__name__, repolist=repos):
-        logging.warning(f"REPO GENERAL INFO - WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached_many(
+        {
+            riq.__name__: repos,
+            rrq.__name__: repos,
+        }
+    )
 
     # GET ALL DATA FROM POSTGRES CACHE
     """df_file = cf.retrieve_from_cache(
@@ -0,0 +1,111 @@
+"""
+Counts of assigned and unassigned items (issues, PRs) in each of a
+sequence of time bins, shared by the assignment visualizations.
+
+An item is in a bin if it was created before the bin ends and wasn't
+closed before the bin starts. Each assignment or unassignment event of
+an item counts in every bin the item is in, from the first bin that ends
+after the event. Since bins are ordered, every event therefore counts in
+a consecutive range of bins, found with a binary search over the bin
+starts and ends, and the number of assignments in each bin is a
+cumulative sum of the events entering and leaving it (see sweep_utils).
+This is O((events + bins) * log(bins)) instead of O(events * bins),
+and doesn't loop over assignees.
+"""
+import numpy as np
+import pandas as pd
+
+from pages.utils.sweep_utils import count_active, first_date_index, to_ns
+
+
+def assigned_unassigned_in_bins(df: pd.DataFrame, item_col: str, start_dates, end_dates) -> tuple:
+    """
+    Number of items in each bin that are assigned (assignments less
+    unassignments up to the end of the bin) and unassigned (the rest).
+
+    Args:
+        df (pd.DataFrame): assignment events with {item_col}, 'created_at', 'closed_at',
+            'assign_date', and 'assignment_action' columns
+        item_col (str): column identifying the item of each event
+        start_dates (pd.Series): non-decreasing start of each bin
+        end_dates (pd.Series): non-decreasing end of each bin
+
+    Returns:
+        tuple(np.ndarray): assigned and unassigned counts per bin
+    """
+    n_bins = len(start_dates)
+
+    # created_at and closed_at are attributes of the item, so any one event of an item gives its range.
+    items = df[df[item_col].notna()].drop_duplicates(subset=item_col)
+    enter, leave = _item_ranges(items, start_dates, end_dates)
+    num_open = count_active(n_bins, enter, leave)
+
+    net = _net_assignments(df, start_dates, end_dates, np.zeros(len(df), dtype=np.int64), 1)[0]
+    return net, num_open - net
+
+
+def assignments_by_assignee(df: pd.DataFrame, assignees: list, start_dates, end_dates) -> pd.DataFrame:
+    """
+    Number of items assigned to each of {assignees} in each bin:
+    their assignments less their unassignments up to the end of the bin,
+    and at least 0.
+
+    Args:
+        df (pd.DataFrame): assignment events with 'assignee', 'created_at', 'closed_at',
+            'assign_date', and 'assignment_action' columns
+        assignees (list): assignees to count, in column order
+        start_dates (pd.Series): non-decreasing start of each bin
+        end_dates (pd.Series): non-decreasing end of each bin
+
+    Returns:
+        pd.DataFrame: a column of counts per assignee, a row per bin
+    """
+    group = pd.Index(assignees).get_indexer(df["assignee"])
+    in_assignees = group >= 0
+
+    net = _net_assignments(df[in_assignees], start_dates, end_dates, group[in_assignees], len(assignees))
+    return pd.DataFrame(np.maximum(net, 0).T, columns=assignees)
+
+
+def _item_ranges(df: pd.DataFrame, start_dates, end_dates) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (private)
+    First bin each row's item is in, and first bin after that it isn't.
+    Items without a creation time are never in a bin.
+    """
+    start, _ = to_ns(start_dates)
+    end, _ = to_ns(end_dates)
+    c, c_missing = to_ns(df["created_at"])
+    cl, cl_missing = to_ns(df["closed_at"])
+    never = len(start)
+
+    # in bin while created_at <= end and closed_at > start.
+    enter = np.where(c_missing, never, first_date_index(end, c, inclusive=True))
+    leave = np.where(cl_missing, never, first_date_index(start, cl, inclusive=True))
+    return enter, leave
+
+
+def _net_assignments(df: pd.DataFrame, start_dates, end_dates, group: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    (private)
+    Assignment events less unassignment events of each group in each bin,
+    as an array of shape (n_groups, bins). {group} is the group of each row of {df}.
+    """
+    n_bins = len(start_dates)
+    enter, leave = _item_ranges(df, start_dates, end_dates)
+
+    # an event counts from the first bin that ends at or after both it and the item's creation.
+    end, _ = to_ns(end_dates)
+    a, a_missing = to_ns(df["assign_date"])
+    enter = np.where(a_missing, n_bins, np.maximum(enter, first_date_index(end, a, inclusive=True)))
+    leave = np.maximum(leave, enter)
+
+    action = df["assignment_action"].to_numpy()
+    weight = np.select([action == "assigned", action == "unassigned"], [1, -1], 0)
+
+    # per-group cumulative sum of the events entering less those leaving, one row of bins per group.
+    size = n_groups * (n_bins + 1)
+    delta = np.bincount(group * (n_bins + 1) + enter, weights=weight, minlength=size) - np.bincount(
+        group * (n_bins + 1) + leave, weights=weight, minlength=size
+    )
+    return np.cumsum(delta.reshape(n_groups, n_bins + 1), axis=1)[:, :n_bins].astype(np.int64)
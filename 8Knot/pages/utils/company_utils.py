@@ -0,0 +1,109 @@
+"""
+Clustering of the free-text company names on contributors' profiles,
+so that spellings of the same company ("Red Hat", "RedHat Inc.",
+"@redhat") are counted together.
+
+Names are clustered around representatives, in order from the most to
+the least common name. A name joins the representative it matches best,
+if their token set ratio (after lowercasing and removing punctuation)
+is at least a score cutoff, and is otherwise the representative of a
+new cluster. Matches aren't chained: a name that only matches another
+member of a cluster doesn't join it. Unlike the partial ratio, the
+token set ratio doesn't score a short name like "AMD" highly against
+every name that contains a few of its characters.
+
+The scores against the more common names are computed with
+rapidfuzz.process.cdist on all cores, and the clusters are memoized in
+Redis by the list of names, because the same names are clustered every
+time the affiliation page is rendered.
+"""
+import hashlib
+import logging
+import redis
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process, utils
+from cache_manager.cx_common import env_company_clusters_ttl, redis_cache
+
+# token set ratio at or above which a company name is the same company as a representative.
+SCORE_CUTOFF = 90
+
+# names compared against all others per cdist call, which bounds the size of the score matrix.
+BLOCK_SIZE = 2048
+
+
+def company_clusters(names, score_cutoff: int = SCORE_CUTOFF, ttl: int = env_company_clusters_ttl) -> pd.Series:
+    """
+    Representative of each of {names}: the most common name of its cluster.
+
+    Args:
+        names (list[str] | pd.Series): distinct company names, from the most to the least common
+        score_cutoff (int, optional): token set ratio, out of 100, at which a name matches a representative.
+            Defaults to SCORE_CUTOFF.
+        ttl (int, optional): seconds that the clusters are memoized for. Defaults to COMPANY_CLUSTERS_TTL,
+            0 disables the memo.
+
+    Returns:
+        pd.Series: representative name, indexed by {names}
+    """
+    names = list(dict.fromkeys(names))
+    if ttl <= 0:
+        return pd.Series(np.array(names, dtype=object)[_cluster(names, score_cutoff)], index=names)
+
+    # the representatives depend on the order of the names, so it's part of the key.
+    names_key = hashlib.md5("\n".join(names).encode("utf-8")).hexdigest()
+    key = f"company_representatives:{score_cutoff}:{names_key}"
+
+    try:
+        cached = redis_cache.get(key)
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"COMPANY CLUSTERS - CACHE UNAVAILABLE: {e}")
+        cached = None
+
+    if cached is not None:
+        representatives = np.frombuffer(cached, dtype=np.int32)
+    else:
+        representatives = _cluster(names, score_cutoff)
+        try:
+            redis_cache.set(key, representatives.tobytes(), ex=ttl)
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"COMPANY CLUSTERS - NOT STORED: {e}")
+
+    return pd.Series(np.array(names, dtype=object)[representatives], index=names)
+
+
+def _cluster(names: list[str], score_cutoff: int) -> np.ndarray:
+    """
+    (private)
+    Index of the representative of each of {names}, which are ordered from the most to the least
+    common. A name's representative is the earlier representative with the highest token set ratio
+    with it, the most common of those that tie, if that's at least {score_cutoff}. Otherwise it's
+    its own representative.
+    """
+    representative = np.arange(len(names), dtype=np.int32)
+    is_representative = np.zeros(len(names), dtype=bool)
+
+    for block_start in range(0, len(names), BLOCK_SIZE):
+        block_end = min(block_start + BLOCK_SIZE, len(names))
+
+        # each name is only scored against the names before it. Scores below the cutoff are 0.
+        scores = process.cdist(
+            names[block_start:block_end],
+            names[:block_end],
+            scorer=fuzz.token_set_ratio,
+            processor=utils.default_process,
+            score_cutoff=score_cutoff,
+            dtype=np.uint8,
+            workers=-1,
+        )
+
+        # whether a name is a representative depends on the names before it, so names are assigned in order.
+        for row, i in enumerate(range(block_start, block_end)):
+            candidates = np.where(is_representative[:i], scores[row, :i], 0)
+            best = int(np.argmax(candidates)) if i > 0 else 0
+            if i > 0 and candidates[best] > 0:
+                representative[i] = best
+            else:
+                is_representative[i] = True
+
+    return representative
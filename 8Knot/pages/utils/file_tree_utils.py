@@ -0,0 +1,209 @@
+"""
+Directory tree of a repository's current files, shared by the codebase
+page's directory dropdowns and heatmaps.
+
+The tree is built from a repo's repo_files_query rows with
+frame_cache.retrieve_preprocessed, so it's parsed once per version of the
+cached rows rather than on every callback. It has a row per node, i.e.
+per file or directory, with integer parent and depth columns. Activity
+on files (PRs, contributors, ...) is then attributed to the entries of a
+selected directory by mapping file paths to node ids, and each node to
+its ancestor among the directory's children, with array lookups instead
+of splitting paths and grouping Python lists per callback.
+"""
+import numpy as np
+import pandas as pd
+
+# dropdown value of the root of the repository
+TOP_LEVEL_DIRECTORY = "Top Level Directory"
+
+
+def file_tree(df_file: pd.DataFrame) -> pd.DataFrame:
+    """
+    Directory tree of the files of a single repo. Paths are relative to the
+    root of the repository.
+
+    Args:
+        df_file (pd.DataFrame): output of the repo_files_query for one repo
+
+    Returns:
+        pd.DataFrame: a row per file and directory, sorted by path, with 'path', 'name',
+            'parent' (row of the parent directory, -1 at the top level), 'depth'
+            (0 at the top level), and 'is_file' columns
+    """
+    if df_file.empty:
+        return pd.DataFrame(
+            {
+                "path": pd.Series(dtype=object),
+                "name": pd.Series(dtype=object),
+                "parent": pd.Series(dtype=np.int64),
+                "depth": pd.Series(dtype=np.int64),
+                "is_file": pd.Series(dtype=bool),
+            }
+        )
+
+    # strings to hold the values for each column (always the same for every row of this query)
+    repo_name = df_file["repo_name"].iloc[0]
+    repo_path = df_file["repo_path"].iloc[0]
+    repo_id = str(df_file["repo_id"].iloc[0])
+
+    # pattern found in each file path, used to slice to get only the root file path
+    path_slice = repo_id + "-" + repo_path + "/" + repo_name + "/"
+    files = df_file["file_path"].str.rsplit(path_slice, n=1).str[1].dropna().drop_duplicates()
+    parts = files.str.split("/")
+    file_depth = parts.str.len() - 1
+
+    # every proper prefix of a file path is a directory
+    directories = [parts[file_depth > d].str[: d + 1].str.join("/") for d in range(int(file_depth.max()))]
+    directories = pd.concat(directories).drop_duplicates() if directories else pd.Series(dtype=object)
+
+    tree = pd.concat(
+        [
+            pd.DataFrame({"path": directories, "is_file": False}),
+            pd.DataFrame({"path": files, "is_file": True}),
+        ],
+        ignore_index=True,
+    )
+    tree = tree.sort_values(by="path", ignore_index=True)
+
+    split = tree["path"].str.rsplit("/", n=1)
+    tree["depth"] = tree["path"].str.count("/")
+    tree["name"] = split.str[-1]
+    tree["parent"] = pd.Index(tree["path"]).get_indexer(split.str[0].where(tree["depth"] > 0))
+    return tree[["path", "name", "parent", "depth", "is_file"]]
+
+
+def directory_options(tree: pd.DataFrame) -> list[str]:
+    """
+    Values of a directory dropdown: the top level, then every directory in alphabetical order.
+
+    Args:
+        tree (pd.DataFrame): output of file_tree
+
+    Returns:
+        list[str]: directory paths
+    """
+    return [TOP_LEVEL_DIRECTORY] + sorted(tree.loc[~tree["is_file"], "path"])
+
+
+def directory_entries(tree: pd.DataFrame, directory: str) -> np.ndarray:
+    """
+    The entry (file or subdirectory) of {directory} that each node is, or is in.
+
+    Args:
+        tree (pd.DataFrame): output of file_tree
+        directory (str): directory path, or TOP_LEVEL_DIRECTORY
+
+    Returns:
+        np.ndarray: row of the entry in {tree} for each row of {tree}, -1 for nodes not in {directory}
+    """
+    parent = tree["parent"].to_numpy()
+    depth = tree["depth"].to_numpy()
+
+    if directory == TOP_LEVEL_DIRECTORY:
+        directory_row, level = -1, 0
+    else:
+        matches = np.flatnonzero((tree["path"] == directory).to_numpy() & ~tree["is_file"].to_numpy())
+        if len(matches) == 0:
+            return np.full(len(tree), -1)
+        directory_row, level = matches[0], depth[matches[0]] + 1
+
+    # walk each node up to its ancestor at the level of the directory's entries
+    entry = np.arange(len(tree))
+    for _ in range(int(depth.max(initial=0)) - level):
+        entry = np.where(depth[entry] > level, parent[entry], entry)
+
+    in_directory = (depth >= level) & (parent[entry] == directory_row)
+    return np.where(in_directory, entry, -1)
+
+
+def entry_edges(tree: pd.DataFrame, entry_of: np.ndarray, file_paths: pd.Series, values: pd.Series) -> pd.DataFrame:
+    """
+    Distinct pairs of a directory entry and a value (PR, contributor, ...) of a file in it.
+
+    The (file, value) pairs are the nonzero cells of a sparse file x value
+    matrix, and the (entry, value) pairs those of its product with the
+    entry x file membership matrix. The product is computed on integer
+    codes of the entries and values rather than with a sparse matrix library.
+
+    Args:
+        tree (pd.DataFrame): output of file_tree
+        entry_of (np.ndarray): output of directory_entries
+        file_paths (pd.Series): path of each file, relative to the root of the repository
+        values (pd.Series): value of each file, aligned with {file_paths}. Missing values are left out.
+
+    Returns:
+        pd.DataFrame: 'entry' (row in {tree}) and 'value' columns. Files that aren't
+            currently in the repository, or aren't in the directory, are left out.
+    """
+    rows = pd.Index(tree["path"]).get_indexer(file_paths)
+    is_file = tree["is_file"].to_numpy()
+    entry = np.where((rows >= 0) & is_file[rows], entry_of[rows], -1)
+
+    value_codes, value_uniques = pd.factorize(values)
+    keep = (entry >= 0) & (value_codes >= 0)
+
+    # each (entry, value) pair once, as a single integer key
+    n_values = max(len(value_uniques), 1)
+    keys = np.unique(entry[keep].astype(np.int64) * n_values + value_codes[keep])
+    return pd.DataFrame({"entry": keys // n_values, "value": value_uniques.take(keys % n_values)})
+
+
+def entry_counts_by_month(
+    tree: pd.DataFrame, entries: np.ndarray, dates: pd.Series, fill_start, fill_end, dates_name: str
+) -> pd.DataFrame:
+    """
+    Number of items of each directory entry in each month.
+
+    Args:
+        tree (pd.DataFrame): output of file_tree
+        entries (np.ndarray): rows in {tree} of every entry of the directory
+        dates (pd.Series): date of each item, indexed by the row in {tree} of the item's entry.
+            Items without a date aren't counted.
+        fill_start (datetime): start of the range of month ends that are columns even without items
+        fill_end (datetime): end of the range of month ends that are columns even without items
+        dates_name (str): name of the columns index
+
+    Returns:
+        pd.DataFrame: a row per entry name and a column per month-end date. Entries with items
+            come first, in alphabetical order, and are NaN in months without any.
+            Entries without items come last, and are NaN in every month.
+    """
+    dates = dates.dropna()
+    item_entries = dates.index.to_numpy()
+    dates = pd.DatetimeIndex(dates)
+
+    # same months as grouping the dates, and the month ends of the fill range, by month:
+    # the months that have at least one of either.
+    fill = pd.date_range(start=fill_start, end=fill_end, freq="M", inclusive="both")
+    span = dates.append(fill)
+    if len(span) == 0:
+        return pd.DataFrame()
+
+    first = span.min()
+    span_months = np.unique(span.year * 12 + span.month - 1)
+    months = pd.date_range(
+        start=first.normalize().replace(day=1),
+        periods=span_months[-1] - span_months[0] + 1,
+        freq="M",
+        name=dates_name,
+    )[span_months - span_months[0]]
+
+    # items per (entry, month), as integer codes of the entries with items and of the months
+    has_items, entry_codes = np.unique(item_entries, return_inverse=True)
+    month_codes = np.searchsorted(span_months, dates.year * 12 + dates.month - 1)
+    counts = np.zeros((len(has_items), len(months)))
+    np.add.at(counts, (entry_codes, month_codes), 1)
+    counts[counts == 0] = np.nan
+
+    names = tree["name"].to_numpy()
+    order = np.argsort(names[has_items], kind="stable")
+    final = pd.DataFrame(counts[order], index=pd.Index(names[has_items][order], name="directory_value"), columns=months)
+
+    # add back the entries without items
+    no_items = np.setdiff1d(entries, has_items)
+    no_items = no_items[np.argsort(names[no_items], kind="stable")]
+    for name in names[no_items]:
+        final.loc[name] = None
+
+    return final
@@ -0,0 +1,221 @@
+"""
+Values of the metric cards of the home page, e.g. the number of open
+issues or the average number of files per commit of a repo set.
+
+The cards are aggregates that are read from Augur directly rather than
+from the cache, and used to be queried by a callback each, with a new
+engine each. Every value is instead computed by a single parameterized
+query per repo set, through the process's shared engine (see
+augur_manager.shared_augur), and the values are stored in Redis for
+HOME_METRICS_TTL seconds. Since the cards' callbacks all run when the
+page is loaded, only one process queries Augur for a repo set while the
+others wait for its values to be stored.
+"""
+import os
+import time
+import pickle
+import logging
+import redis
+import numpy as np
+import pandas as pd
+from db_manager.augur_manager import shared_augur
+from cache_manager.cx_common import env_home_metrics_ttl, redis_cache
+from cache_manager.figure_cache import repo_set_key
+
+# seconds that a callback waits for another process that's already
+# querying the same repo set before querying it itself.
+QUERY_WAIT_SECONDS = 60
+QUERY_POLL_SECONDS = 0.1
+
+
+# each CTE aggregates one table to a single row, so the cross join is a single row of every metric.
+HOME_METRICS_QUERY = """
+    with
+    commit_totals as (
+        /*
+        * For each commit, get the total number of lines added/removed and files changed across all files in commit.
+        * */
+        select
+            c.cmt_commit_hash,
+            sum(c.cmt_added) as lines_added,
+            sum(c.cmt_removed) as lines_removed,
+            count(*) as num_files
+        from
+            augur_data.commits c
+        where
+            c.repo_id = any(:repo_ids)
+        group by c.cmt_commit_hash
+    ),
+    commit_metrics as (
+        select
+            /*commit_hash'es are unique per commit*/
+            count(ct.cmt_commit_hash) as num_commits,
+            round(avg(ct.lines_added), 2) as avg_lines_added,
+            round(avg(ct.lines_removed), 2) as avg_lines_removed,
+            avg(ct.num_files) as avg_files
+        from
+            commit_totals ct
+    ),
+    issue_metrics as (
+        select
+            count(distinct i.issue_id) filter (where i.closed_at is null) as num_open_issues,
+            count(distinct i.issue_id) filter (where i.closed_at is not null) as num_closed_issues,
+            avg(now() - i.created_at) filter (where i.closed_at is null) as avg_open_issue_age,
+            avg(now() - i.created_at) filter (where i.closed_at is not null) as avg_closed_issue_age
+        from
+            augur_data.issues i
+        where
+            i.repo_id = any(:repo_ids)
+    ),
+    pr_metrics as (
+        select
+            count(distinct pr.pull_request_id) filter (where pr.pr_closed_at is null) as num_open_prs,
+            count(distinct pr.pull_request_id) filter (where pr.pr_merged_at is not null) as num_merged_prs,
+            count(distinct pr.pull_request_id) filter (
+                where pr.pr_merged_at is null and pr.pr_closed_at is not null
+            ) as num_rejected_prs,
+            avg(now() - pr.pr_created_at) filter (where pr.pr_closed_at is null) as avg_open_pr_age,
+            avg(pr.pr_merged_at - pr.pr_created_at) filter (
+                where pr.pr_closed_at is not null and pr.pr_merged_at is not null
+            ) as avg_merged_pr_age
+        from
+            augur_data.pull_requests pr
+        where
+            pr.repo_id = any(:repo_ids)
+    ),
+    pr_message_metrics as (
+        select
+            avg(prmc.message_count) as avg_pr_messages
+        from
+            /*
+            * count the number of unique message ID's for each PR
+            * */
+            (select
+                count(distinct prmr.msg_id) as message_count
+            from
+                augur_data.pull_requests pr,
+                augur_data.pull_request_message_ref prmr
+            where
+                pr.repo_id = any(:repo_ids)
+                and prmr.pull_request_id = pr.pull_request_id
+            group by pr.pull_request_id
+            ) as prmc
+    )
+    select
+        *
+    from
+        commit_metrics,
+        issue_metrics,
+        pr_metrics,
+        pr_message_metrics
+"""
+
+
+def home_metrics(repolist: list[int], ttl: int = env_home_metrics_ttl) -> dict:
+    """
+    Every metric of the home page's cards for the repos in {repolist}.
+
+    If Redis is unavailable, the metrics are queried as if they weren't cached.
+
+    Args:
+        repolist (list[int]): repo_ids
+        ttl (int, optional): seconds before the metrics expire. Defaults to HOME_METRICS_TTL, 0 disables caching.
+
+    Returns:
+        dict: value of each column of HOME_METRICS_QUERY
+    """
+    if ttl <= 0 or not repolist:
+        return _query(repolist)
+
+    key = f"home_metrics:{repo_set_key(repolist)}"
+    lock_key = f"{key}:querying"
+
+    owns_lock = False
+    try:
+        deadline = time.monotonic() + QUERY_WAIT_SECONDS
+        while True:
+            cached = redis_cache.get(key)
+            if cached is not None:
+                logging.warning("HOME METRICS - CACHE HIT")
+                return pickle.loads(cached)
+
+            # only one process queries Augur, the others wait for the metrics to be stored.
+            owns_lock = bool(redis_cache.set(lock_key, os.getpid(), nx=True, ex=QUERY_WAIT_SECONDS))
+            if owns_lock:
+                break
+            if time.monotonic() > deadline:
+                logging.warning("HOME METRICS - QUERY WAIT TIMED OUT")
+                break
+            time.sleep(QUERY_POLL_SECONDS)
+    except redis.exceptions.RedisError as e:
+        logging.warning(f"HOME METRICS - CACHE UNAVAILABLE: {e}")
+        return _query(repolist)
+
+    logging.warning("HOME METRICS - CACHE MISS")
+    try:
+        metrics = _query(repolist)
+        try:
+            redis_cache.set(key, pickle.dumps(metrics), ex=ttl)
+        except redis.exceptions.RedisError as e:
+            logging.warning(f"HOME METRICS - NOT STORED: {e}")
+    finally:
+        # waiting processes stop waiting and query Augur themselves if this one failed.
+        if owns_lock:
+            try:
+                redis_cache.delete(lock_key)
+            except redis.exceptions.RedisError:
+                pass
+
+    return metrics
+
+
+def _query(repolist: list[int]) -> dict:
+    """
+    (private)
+    Runs HOME_METRICS_QUERY for {repolist} against Augur.
+    """
+    df = shared_augur().run_query(HOME_METRICS_QUERY, params={"repo_ids": [int(r) for r in repolist]})
+    return df.iloc[0].to_dict()
+
+
+def format_average(value, digits: int = 2):
+    """
+    Average rounded to {digits} decimal places.
+
+    Args:
+        value (float | Decimal): average, None/NaN if there's nothing to average
+
+    Returns:
+        float | str: rounded average, or "N/A"
+    """
+    if pd.isna(value):
+        return "N/A"
+
+    return round(float(value), digits)
+
+
+def format_age(diff) -> str:
+    """
+    Human readable length of time, in days and hours.
+
+    Args:
+        diff (pd.Timedelta): length of time, NaT if there's nothing to average
+
+    Returns:
+        str: e.g. "12 days, 3.5 hours"
+    """
+    if pd.isna(diff):
+        return "N/A"
+
+    diff = pd.Timedelta(diff)
+
+    # days component
+    diff_days = diff.days
+
+    # timedelta representation of # of days to get hours
+    days_delta = pd.Timedelta(days=diff_days)
+
+    # gives remaining hours
+    diff_hours = (diff - days_delta) / np.timedelta64(1, "h")
+
+    return f"{diff_days} days, {round(diff_hours, 1)} hours"
@@ -0,0 +1,150 @@
+"""
+Contributor importance (lottery factor) computations shared by the
+contributor importance visualizations.
+
+Contributions are counted per (window, action, contributor) without
+copying them into every window that they're in when windows overlap:
+the count of each (action, contributor) only changes at the windows
+where one of its contributions enters or leaves, and is rolled forward
+from those changes into the windows in between.
+The lottery factor of each (window, action), the fewest contributors
+whose contributions make up a threshold share of the total, is then read
+off the cumulative sums of the counts sorted from greatest to least.
+"""
+import numpy as np
+import pandas as pd
+
+from pages.utils.sweep_utils import first_date_index, to_ns
+
+ACTIONS = ["Commit", "Issue Opened", "Issue Comment", "Issue Closed", "PR Opened", "PR Comment", "PR Review"]
+
+
+def contributor_counts(df: pd.DataFrame, period_from=None, period_to=None) -> pd.DataFrame:
+    """
+    Number of contributions of each contributor of each action in each window.
+    Contributions are in a window if period_from <= created_at <= period_to.
+
+    Args:
+        df (pd.DataFrame): contributions with 'created_at', 'Action', and 'cntrb_id' columns
+        period_from (pd.Series, optional): non-decreasing start of each window.
+            Defaults to a single window containing all contributions.
+        period_to (pd.Series, optional): non-decreasing end of each window.
+
+    Returns:
+        pd.DataFrame: 'window' (index into the windows), 'Action', 'cntrb_id', and 'count' columns
+    """
+    if period_from is None:
+        lo = np.zeros(len(df), dtype=np.int64)
+        n_windows = np.ones(len(df), dtype=np.int64)
+    else:
+        c, c_missing = to_ns(df["created_at"])
+        start, _ = to_ns(period_from)
+        end, _ = to_ns(period_to)
+
+        # each contribution is in the consecutive windows from the first that ends
+        # at or after it, up to the first that starts after it.
+        lo = first_date_index(end, c, inclusive=True)
+        hi = first_date_index(start, c, inclusive=False)
+        n_windows = np.where(c_missing, 0, np.maximum(hi - lo, 0))
+
+    # contributors and actions are numbered in sorted order, so that sorting by
+    # their numbers is sorting by them. contributions missing either aren't counted.
+    action_codes, actions = pd.factorize(df["Action"].to_numpy(), sort=True)
+    cntrb_codes, cntrbs = pd.factorize(df["cntrb_id"].to_numpy(), sort=True)
+    counted = (n_windows > 0) & (action_codes >= 0) & (cntrb_codes >= 0)
+    key = action_codes[counted].astype(np.int64) * len(cntrbs) + cntrb_codes[counted]
+    enter = lo[counted]
+
+    # each contribution adds 1 to the count of its (action, contributor) from the first window
+    # that it's in, and removes it from the window after its last. Those changes are summed
+    # per (action, contributor, window), so there are at most two per step of the windows.
+    event_key = np.concatenate([key, key])
+    event_window = np.concatenate([enter, enter + n_windows[counted]])
+    change = np.concatenate([np.ones(len(key), dtype=np.int64), -np.ones(len(key), dtype=np.int64)])
+
+    order = np.lexsort((event_window, event_key))
+    event_key, event_window, change = event_key[order], event_window[order], change[order]
+    first = np.ones(len(event_key), dtype=bool)
+    first[1:] = (event_key[1:] != event_key[:-1]) | (event_window[1:] != event_window[:-1])
+    firsts = np.flatnonzero(first)
+    change = np.add.reduceat(change, firsts) if len(firsts) else change
+    event_key, event_window = event_key[firsts], event_window[firsts]
+
+    # the changes of every (action, contributor) sum to 0, so a running sum over all of them is
+    # the count of each from its window up to its next change, which is always of the same one.
+    running = np.cumsum(change)
+    runs = np.flatnonzero(running > 0)
+    run_windows = event_window[runs + 1] - event_window[runs]
+
+    rows = np.repeat(runs, run_windows)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(run_windows) - run_windows, run_windows)
+    window = event_window[rows] + offsets
+    key = event_key[rows]
+
+    order = np.lexsort((key, window))
+    return pd.DataFrame(
+        {
+            "window": window[order],
+            "Action": actions[key[order] // len(cntrbs)],
+            "cntrb_id": cntrbs[key[order] % len(cntrbs)],
+            "count": running[rows][order],
+        }
+    )
+
+
+def lottery_factors(counts: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """
+    Fewest contributors whose contributions make up at least {threshold}
+    of all contributions of each action in each window.
+
+    Args:
+        counts (pd.DataFrame): output of contributor_counts
+        threshold (float): share of contributions, between 0 and 1
+
+    Returns:
+        pd.DataFrame: lottery factor, indexed by window, with a column per action
+            that has contributions in any window. NaN where an action has none in a window.
+    """
+    counts = counts.sort_values(["window", "Action", "count"], ascending=[True, True, False])
+    groups = [counts["window"], counts["Action"]]
+
+    running_sum = counts.groupby(groups)["count"].cumsum()
+    thresh_cntrbs = counts.groupby(groups)["count"].transform("sum") * threshold
+
+    # the running sum is strictly increasing, so the contributors before the
+    # threshold is reached, plus the one that reaches it, make up the lottery factor.
+    below = (running_sum < thresh_cntrbs).groupby(groups).sum()
+    n_cntrbs = counts.groupby(groups).size()
+    return np.minimum(below + 1, n_cntrbs).unstack("Action")
+
+
+def top_contributors(counts: pd.DataFrame, action_type: str, top_k: int) -> pd.DataFrame:
+    """
+    The {top_k} contributors with the most contributions of {action_type},
+    and the contributions of everyone else as a single "Other" contributor.
+
+    Args:
+        counts (pd.DataFrame): output of contributor_counts, with a single window
+        action_type (str): pattern of the actions to count
+        top_k (int): number of contributors to keep
+
+    Returns:
+        pd.DataFrame: 'cntrb_id' and {action_type} columns, greatest first, then "Other"
+    """
+    counts = counts[counts["Action"].str.contains(action_type)]
+
+    # count the number of contributions for each contributor
+    df = counts.groupby("cntrb_id")["count"].sum().to_frame(action_type)
+
+    # sort rows according to amount of contributions from greatest to least
+    df.sort_values(by=action_type, ascending=False, inplace=True)
+    df = df.reset_index()
+
+    # get the number of total contributions, and of the top k
+    t_sum = df[action_type].sum()
+    df = df.head(top_k)
+    df_sum = df[action_type].sum()
+
+    # the remaining contributions are the difference of t_sum and df_sum
+    df_concat = pd.DataFrame(data={"cntrb_id": ["Other"], action_type: [t_sum - df_sum]})
+    return pd.concat([df, df_concat], ignore_index=True)
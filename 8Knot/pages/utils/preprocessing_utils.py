@@ -1,3 +1,6 @@
+import pandas as pd
+
+
 def contributors_df_action_naming(df):
     """Renames verbs in 'Action' column
 
@@ -26,10 +29,55 @@ def contributors_df_action_naming(df):
     return df
 
 
-def cntrb_per_file(df):
-    # pandas column and format updates
-    df["cntrb_ids"] = df["cntrb_ids"].str.split(",")
-    df["reviewer_ids"] = df["reviewer_ids"].str.split(",")
-    df = df.reset_index()
-    df.drop("index", axis=1, inplace=True)
+def email_domains(email_lists):
+    """Email addresses, and their lowercase domains, in each distinct list of {email_lists}.
+    Entries that aren't email addresses are left out.
+
+    Args:
+        email_lists (pd.Series): ' , '-separated email addresses
+
+    Returns:
+        pd.DataFrame: 'email_list', 'email', and categorical 'domain' columns, a row per address
+    """
+    df = pd.DataFrame({"email_list": email_lists.dropna().unique()})
+    df["email"] = df["email_list"].str.split(" , ")
+    df = df.explode("email", ignore_index=True)
+    df = df[df["email"].str.contains("@", regex=False)].reset_index(drop=True)
+    df["domain"] = df["email"].str.lower().str.rsplit("@", n=1).str[-1].astype("category")
     return df
+
+
+def affiliation_email_domains(df):
+    """email_domains of the contributors in the affiliation table
+
+    Args:
+        df (pd.DataFrame): affiliation table
+
+    Returns:
+        pd.DataFrame: email_domains of its 'email_list' column
+    """
+    return email_domains(df["email_list"])
+
+
+def domain_counts(domains, email_lists, unique_emails=False):
+    """Number of email addresses of each domain in {email_lists}
+
+    Args:
+        domains (pd.DataFrame): email_domains of at least the lists in {email_lists}
+        email_lists (pd.Series): email list of each contribution or contributor. Each
+            of its addresses is counted once per occurrence of the list.
+        unique_emails (bool, optional): count each distinct address once instead. Defaults to False.
+
+    Returns:
+        pd.DataFrame: 'domains' and 'count' columns, greatest count first
+    """
+    weights = email_lists.value_counts()
+    df = domains[domains["email_list"].isin(weights.index)]
+    if unique_emails:
+        counts = df.drop_duplicates(subset="email").groupby("domain", observed=True).size()
+    else:
+        counts = df["email_list"].map(weights).groupby(df["domain"], observed=True).sum()
+
+    # plain strings, so that callers can rename domains
+    counts.index = counts.index.astype(str)
+    return counts.sort_values(ascending=False).rename_axis("domains").rename("count").reset_index()
@@ -0,0 +1,210 @@
+"""
+Counts of items (issues, PRs, ...) in a state at each of a sequence of dates.
+
+Each item is in a state over a range of dates, e.g. an issue is open from
+its creation until it's closed. Rather than masking the whole frame once
+per date, the first date at which each item enters and leaves the state
+is found with a binary search over the sorted dates, and the number of
+items in the state at every date is a cumulative sum of the entries less
+the exits. This is O((items + dates) * log(dates)) instead of O(items * dates).
+"""
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+
+def to_ns(values) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Nanosecond integers of datetime {values}, and a mask of which are missing.
+    Timezone-aware values are converted to UTC.
+
+    Args:
+        values (pd.Series | pd.DatetimeIndex | list): datetimes
+
+    Returns:
+        tuple(np.ndarray): int64 nanoseconds, and bool mask of NaT values
+    """
+    index = pd.DatetimeIndex(values).as_unit("ns")
+    return index.asi8, np.asarray(index.isna())
+
+
+def first_date_index(dates: np.ndarray, thresholds: np.ndarray, inclusive: bool = True) -> np.ndarray:
+    """
+    For each threshold, the index of the first date that's at or after it (inclusive)
+    or strictly after it (not inclusive). len(dates) if there's no such date.
+
+    Args:
+        dates (np.ndarray): ascending nanosecond timestamps
+        thresholds (np.ndarray): nanosecond timestamps
+        inclusive (bool, optional): whether a date equal to a threshold counts. Defaults to True.
+
+    Returns:
+        np.ndarray: indices into {dates}
+    """
+    return np.searchsorted(dates, thresholds, side="left" if inclusive else "right")
+
+
+def count_active(n_dates: int, enter: np.ndarray, leave: np.ndarray) -> np.ndarray:
+    """
+    Number of items active at each date, where each item is active from
+    date index {enter} up to, but not including, date index {leave}.
+    Items that leave at or before they enter are never active.
+
+    Args:
+        n_dates (int): number of dates
+        enter (np.ndarray): first date index at which each item is active
+        leave (np.ndarray): first date index at which each item is no longer active
+
+    Returns:
+        np.ndarray: count per date
+    """
+    leave = np.maximum(leave, enter)
+    delta = np.bincount(enter, minlength=n_dates + 1) - np.bincount(leave, minlength=n_dates + 1)
+    return np.cumsum(delta)[:n_dates]
+
+
+def open_ranges(dates, created, closed) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Dates, and the first date index at which each item is open and at which it's closed,
+    for counting the items that are open and meet other conditions with count_active.
+    Items without a creation time are never open.
+
+    Args:
+        dates (pd.DatetimeIndex | pd.Series): ascending dates
+        created (pd.Series): creation time of each item
+        closed (pd.Series): closing time of each item, NaT if still open
+
+    Returns:
+        tuple(np.ndarray): nanosecond dates, enter date indices, and leave date indices
+    """
+    d, _ = to_ns(dates)
+    c, c_missing = to_ns(created)
+    cl, cl_missing = to_ns(closed)
+    never = len(d)
+
+    enter = np.where(c_missing, never, first_date_index(d, c, inclusive=True))
+    leave = np.where(cl_missing, never, first_date_index(d, cl, inclusive=True))
+    return d, enter, leave
+
+
+def open_at(dates, created, closed) -> np.ndarray:
+    """
+    Number of items open at each date: created at or before it,
+    and either not closed or closed after it.
+
+    Args:
+        dates (pd.DatetimeIndex | pd.Series): ascending dates
+        created (pd.Series): creation time of each item
+        closed (pd.Series): closing time of each item, NaT if still open
+
+    Returns:
+        np.ndarray: count per date
+    """
+    d, enter, leave = open_ranges(dates, created, closed)
+    return count_active(len(d), enter, leave)
+
+
+def new_staling_stale_at(dates, created, closed, staling_interval: int, stale_interval: int) -> tuple:
+    """
+    Number of items open at each date that are new (created within the last
+    {staling_interval} days), staling (created more than {staling_interval}
+    but less than {stale_interval} days before), and stale (the rest).
+
+    Args:
+        dates (pd.DatetimeIndex | pd.Series): ascending dates
+        created (pd.Series): creation time of each item
+        closed (pd.Series): closing time of each item, NaT if still open
+        staling_interval (int): days after which an open item is staling
+        stale_interval (int): days after which an open item is stale
+
+    Returns:
+        tuple(np.ndarray): new, staling, and stale counts per date
+    """
+    d, enter, leave = open_ranges(dates, created, closed)
+    c, c_missing = to_ns(created)
+
+    staling_ns = pd.Timedelta(days=staling_interval).value
+    stale_ns = pd.Timedelta(days=stale_interval).value
+    never = len(d)
+
+    # new while date - staling_interval <= created,
+    # then staling while date - stale_interval < created < date - staling_interval.
+    staling_from = np.where(c_missing, never, first_date_index(d, c + staling_ns, inclusive=False))
+    stale_from = np.where(c_missing, never, first_date_index(d, c + stale_ns, inclusive=True))
+
+    n_open = count_active(never, enter, leave)
+    n_new = count_active(never, enter, np.minimum(leave, staling_from))
+    n_staling = count_active(never, np.maximum(enter, staling_from), np.minimum(leave, stale_from))
+
+    return n_new, n_staling, n_open - n_new - n_staling
+
+
+def active_drifting_away_at(dates, cntrb_ids, created, drift_interval: int, away_interval: int) -> tuple:
+    """
+    Number of contributors at each date whose last contribution up to that
+    date is active (less than {drift_interval} months before), drifting
+    (between {drift_interval} and {away_interval} months before), or away
+    (more than {away_interval} months before). Contributors whose first
+    contribution is after a date aren't counted at that date.
+
+    Each contribution keeps its contributor active from the first date at or
+    after it until the first date that's more than {drift_interval} months
+    after it. A contributor is active when any of their contributions does, so
+    each contribution's range starts where the previous one's ended, and the
+    counts are of contributors rather than of contributions.
+
+    Args:
+        dates (pd.DatetimeIndex | pd.Series): ascending dates
+        cntrb_ids (pd.Series): contributor of each contribution
+        created (pd.Series): time of each contribution
+        drift_interval (int): months after which a contributor is drifting
+        away_interval (int): months after which a contributor is away
+
+    Returns:
+        tuple(np.ndarray): active, drifting, and away counts per date
+    """
+    dates = pd.DatetimeIndex(dates)
+    d, _ = to_ns(dates)
+    never = len(d)
+
+    # calendar months before each date, which are non-decreasing like the dates.
+    drift_cutoff, _ = to_ns([date - relativedelta(months=+drift_interval) for date in dates])
+    away_cutoff, _ = to_ns([date - relativedelta(months=+away_interval) for date in dates])
+
+    c, c_missing = to_ns(created)
+    cntrb, _ = pd.factorize(pd.Series(cntrb_ids).to_numpy(), use_na_sentinel=False)
+    cntrb, c = cntrb[~c_missing], c[~c_missing]
+
+    # contributions of each contributor in chronological order.
+    order = np.lexsort((c, cntrb))
+    cntrb, c = cntrb[order], c[order]
+    first_of_cntrb = np.ones(len(cntrb), dtype=bool)
+    first_of_cntrb[1:] = cntrb[1:] != cntrb[:-1]
+
+    enter = first_date_index(d, c, inclusive=True)
+    # active while created >= date - drift_interval, not away while created > date - away_interval.
+    active_until = np.searchsorted(drift_cutoff, c, side="right")
+    present_until = np.searchsorted(away_cutoff, c, side="left")
+
+    n_total = count_active(never, enter[first_of_cntrb], np.full(first_of_cntrb.sum(), never))
+    n_active = count_active(never, _after_previous(enter, active_until, first_of_cntrb), active_until)
+    n_present = count_active(never, _after_previous(enter, present_until, first_of_cntrb), present_until)
+
+    if drift_interval >= away_interval:
+        # nobody's last contribution can be both before the drift cutoff and after the away cutoff.
+        n_drifting = np.zeros(never, dtype=n_active.dtype)
+    else:
+        n_drifting = n_present - n_active
+
+    return n_active, n_drifting, n_total - n_active - n_drifting
+
+
+def _after_previous(enter: np.ndarray, leave: np.ndarray, first_of_group: np.ndarray) -> np.ndarray:
+    """
+    (private)
+    Delays the start of each range to the end of the previous range of
+    the same group, so that overlapping ranges of a group are only counted
+    once. {leave} must be non-decreasing within each group.
+    """
+    previous_leave = np.r_[0, leave[:-1]]
+    return np.where(first_of_group, enter, np.maximum(enter, previous_leave))
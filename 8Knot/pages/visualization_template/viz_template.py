@@ -11,6 +11,7 @@ from pages.utils.graph_utils import get_graph_time_values, color_seq
 from queries.QUERY_NAME import QUERY_NAME as QUERY_INITIALS
 import io
 import cache_manager.cache_facade as cf
+from cache_manager.figure_cache import cached_figure
 from pages.utils.job_utils import nodata_graph
 import time
 import app
@@ -193,11 +194,10 @@ def toggle_popover(n, is_open):
     ],
     background=True,
 )
+@cached_figure(f"{PAGE}-{VIZ_ID}", tables=[QUERY_INITIALS.__name__])
 def NAME_OF_VISUALIZATION_graph(repolist, interval):
     # wait for data to asynchronously download and become available.
-    while not_cached := cf.get_uncached(func_name=QUERY_INITIALS.__name__, repolist=repolist):
-        logging.warning(f"{VIZ_ID}- WAITING ON DATA TO BECOME AVAILABLE")
-        time.sleep(0.5)
+    cf.wait_for_cached(func_name=QUERY_INITIALS.__name__, repolist=repolist)
 
     logging.warning(f"{VIZ_ID} - START")
     start = time.perf_counter()
@@ -234,8 +234,8 @@ def process_data(df: pd.DataFrame, interval):
     The output of this function is the data you intend to create a visualization with,
     requiring no further processing."""
 
-    # convert to datetime objects rather than strings
-    # ADD ANY OTHER COLUMNS WITH DATETIME
+    # 'timestamptz' columns in the cache are already datetime64[ns, UTC].
+    # ONLY CONVERT DATETIME COLUMNS THAT ARE STORED AS TEXT IN cache_manager/db_init.py
     df["COLUMN_WITH_DATETIME"] = pd.to_datetime(df["COLUMN_WITH_DATETIME"], utc=True)
 
     # order values chronologically by COLUMN_TO_SORT_BY date
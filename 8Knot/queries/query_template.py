@@ -14,8 +14,10 @@ TODO:
 (4) Create a table in 8Knot/8Knot/cache_manager/db_init.py for the new data you're retrieving from augur. Name the table identically to
     your custom "NAME_query". e.g. if your query is "num_stars_query" the table should have the same name. Detailed instructions regarding
     creating a table are in the db_init.py file.
-(5) Update the docstring of the query to reflect the intention of the data being collected.
-(6) Delete this list when completed
+(5) Add the table to CACHE_WATERMARKS in 8Knot/8Knot/cache_manager/cache_facade.py so that cached repos are delta-refreshed.
+    Map it to the timestamp column that new rows are keyed on, or to None if each repo's rows are a snapshot.
+(6) Update the docstring of the query to reflect the intention of the data being collected.
+(7) Delete this list when completed
 
 NOTE: Querying data from Augur is a Postgres->Postgres transaction. Any data transformations that will always
     apply to visualization using the same data should either:
@@ -0,0 +1,11 @@
+"""
+Tests import the app's modules the way the app does, from the 8Knot directory.
+Modules that read the Augur credentials at import only need them to be set.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+for var in ["AUGUR_USERNAME", "AUGUR_PASSWORD", "AUGUR_HOST", "AUGUR_PORT", "AUGUR_DATABASE", "AUGUR_SCHEMA"]:
+    os.environ.setdefault(var, "test")
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from pages.utils.assignment_utils import assigned_unassigned_in_bins, assignments_by_assignee
+
+# issue 1 is assigned to x, then unassigned in the second bin. Issue 2 is assigned to y
+# and closed in the first bin. Issue 3 is opened in the second bin and never assigned.
+EVENTS = pd.DataFrame(
+    {
+        "issue_id": [1, 1, 2, 3],
+        "created_at": pd.to_datetime(["2023-01-02", "2023-01-02", "2023-01-05", "2023-01-10"]),
+        "closed_at": pd.to_datetime([None, None, "2023-01-06", None]),
+        "assign_date": pd.to_datetime(["2023-01-03", "2023-01-09", "2023-01-05", None]),
+        "assignment_action": ["assigned", "unassigned", "assigned", None],
+        "assignee": ["x", "x", "y", None],
+    }
+)
+
+START = pd.Series(pd.to_datetime(["2023-01-01", "2023-01-08"]))
+END = pd.Series(pd.to_datetime(["2023-01-07", "2023-01-14"]))
+
+
+def test_items_in_each_bin_are_assigned_or_unassigned():
+    assigned, unassigned = assigned_unassigned_in_bins(EVENTS, "issue_id", START, END)
+
+    assert assigned.tolist() == [2, 0]
+    assert unassigned.tolist() == [0, 2]
+
+
+def test_assignments_are_counted_per_assignee():
+    counts = assignments_by_assignee(EVENTS, ["x", "y"], START, END)
+
+    # y's issue is closed before the second bin, so it no longer counts there.
+    assert counts.to_dict("list") == {"x": [1, 0], "y": [1, 0]}
+
+
+def test_unassignments_alone_dont_make_negative_counts():
+    unassigned = pd.DataFrame({**EVENTS.iloc[[1]].to_dict("list"), "assignee": ["z"]})
+
+    assert assignments_by_assignee(unassigned, ["z"], START, END).to_dict("list") == {"z": [0, 0]}
+
+
+def test_no_events_are_counted_as_zeros():
+    assigned, unassigned = assigned_unassigned_in_bins(EVENTS.iloc[:0], "issue_id", START, END)
+
+    assert (assigned.tolist(), unassigned.tolist()) == ([0, 0], [0, 0])
+    assert assignments_by_assignee(EVENTS.iloc[:0], ["x"], START, END).to_dict("list") == {"x": [0, 0]}
+
+
+def test_single_bin():
+    assigned, unassigned = assigned_unassigned_in_bins(EVENTS, "issue_id", START[:1], END[:1])
+
+    assert (assigned.tolist(), unassigned.tolist()) == ([2], [0])
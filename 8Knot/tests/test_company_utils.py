@@ -0,0 +1,27 @@
+from pages.utils.company_utils import company_clusters
+
+
+def test_spellings_of_a_company_are_clustered():
+    clusters = company_clusters(["Red Hat", "Red Hat, Inc.", "@redhat", "Samsung", "Samsung Electronics"], ttl=0)
+
+    assert clusters["Red Hat, Inc."] == "Red Hat"
+    assert clusters["Samsung Electronics"] == "Samsung"
+
+
+def test_short_names_dont_absorb_other_companies():
+    # short names partially match many others. They must not pull unrelated companies
+    # into their cluster, either directly or through a chain of matches.
+    names = ["AMD", "SAP", "Arm", "@arm", "Red Hat", "Samsung", "Red Hat, Inc.", "Samsung Electronics", "ARM Ltd"]
+    clusters = company_clusters(names, ttl=0)
+
+    assert clusters["Red Hat"] == "Red Hat"
+    assert clusters["Samsung"] == "Samsung"
+    assert clusters["Red Hat, Inc."] == "Red Hat"
+    assert clusters["Samsung Electronics"] == "Samsung"
+    assert clusters[["AMD", "SAP", "Arm"]].tolist() == ["AMD", "SAP", "Arm"]
+
+
+def test_each_name_joins_the_most_common_matching_name():
+    clusters = company_clusters(["Google", "Google LLC", "google"], ttl=0)
+
+    assert clusters.tolist() == ["Google", "Google", "Google"]
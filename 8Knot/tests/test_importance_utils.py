@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from pages.utils.importance_utils import contributor_counts, lottery_factors, top_contributors
+
+CONTRIBUTIONS = pd.DataFrame(
+    {
+        "created_at": pd.to_datetime(["2023-01-01", "2023-01-02", "2023-01-02", "2023-01-05", "2023-01-03"]),
+        "Action": ["Commit", "Commit", "Commit", "Commit", "PR Opened"],
+        "cntrb_id": ["a", "a", "b", "c", "a"],
+    }
+)
+
+# overlapping windows, which both contain the contributions of the 2nd.
+PERIOD_FROM = pd.Series(pd.to_datetime(["2023-01-01", "2023-01-02"]))
+PERIOD_TO = pd.Series(pd.to_datetime(["2023-01-02", "2023-01-05"]))
+
+
+def test_contributions_are_counted_in_every_window_they_are_in():
+    counts = contributor_counts(CONTRIBUTIONS, PERIOD_FROM, PERIOD_TO)
+
+    assert counts.values.tolist() == [
+        [0, "Commit", "a", 2],
+        [0, "Commit", "b", 1],
+        [1, "Commit", "a", 1],
+        [1, "Commit", "b", 1],
+        [1, "Commit", "c", 1],
+        [1, "PR Opened", "a", 1],
+    ]
+
+
+def test_lottery_factor_is_fewest_contributors_making_up_the_threshold():
+    factors = lottery_factors(contributor_counts(CONTRIBUTIONS, PERIOD_FROM, PERIOD_TO), threshold=0.5)
+
+    # a alone makes up half of the commits in the first window, but it takes two of the three in the second.
+    assert factors["Commit"].tolist() == [1, 2]
+    assert np.isnan(factors.loc[0, "PR Opened"]) and factors.loc[1, "PR Opened"] == 1
+
+
+def test_top_contributors_and_the_rest_as_other():
+    top = top_contributors(contributor_counts(CONTRIBUTIONS), "Commit", top_k=1)
+
+    assert top.values.tolist() == [["a", 2], ["Other", 2]]
+
+
+def test_no_contributions_are_counted_in_no_window():
+    counts = contributor_counts(CONTRIBUTIONS.iloc[:0], PERIOD_FROM, PERIOD_TO)
+
+    assert counts.empty
+    assert top_contributors(counts, "Commit", top_k=1).values.tolist() == [["Other", 0]]
+
+
+def test_single_window():
+    day = pd.Series(pd.to_datetime(["2023-01-02"]))
+
+    counts = contributor_counts(CONTRIBUTIONS, day, day)
+
+    assert counts.values.tolist() == [[0, "Commit", "a", 1], [0, "Commit", "b", 1]]
+    assert lottery_factors(counts, threshold=0.5)["Commit"].tolist() == [1]
@@ -0,0 +1,27 @@
+from pages.index.search_index import SearchIndex
+
+OPTIONS = [
+    {"label": "https://github.com/chaoss/augur", "value": "1"},
+    {"label": "https://github.com/redhat/osp", "value": "2"},
+    {"label": "RedHat", "value": "redhat"},
+    {"label": "redhat", "value": "redhat"},
+    {"label": "chaoss", "value": "chaoss"},
+]
+
+
+def test_options_sharing_a_value_are_searched():
+    # orgs whose names only differ in case have the same value.
+    index = SearchIndex(OPTIONS)
+
+    results = index.search_among("red", OPTIONS)
+
+    assert OPTIONS[2] in results and OPTIONS[3] in results
+    assert index.search("red", values={"redhat"}) == [OPTIONS[2], OPTIONS[3]]
+
+
+def test_unindexed_options_with_an_indexed_value_are_searched():
+    # a user's group can have the same value as an org.
+    group = {"label": "Chaoss (my group)", "value": "chaoss"}
+    index = SearchIndex(OPTIONS)
+
+    assert group in index.search_among("chaoss", [OPTIONS[4], group])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from pages.utils.sweep_utils import active_drifting_away_at, count_active, new_staling_stale_at, open_at, open_ranges
+
+DAYS = pd.date_range("2023-01-01", "2023-01-05")
+NONE = pd.Series([], dtype="datetime64[ns]")
+
+
+def times(*values) -> pd.Series:
+    return pd.Series([pd.Timestamp(value) for value in values], dtype="datetime64[ns]")
+
+
+def test_items_are_open_from_creation_until_closed():
+    created = times("2023-01-01", "2023-01-02 12:00", None, "2023-01-04", "2022-12-01")
+    closed = times("2023-01-03", None, None, "2023-01-04", "2023-01-04 12:00")
+
+    # the first item is closed on the third day, so it isn't open that day. The third
+    # has no creation time and the fourth is closed as it's created, so neither is ever open.
+    assert open_at(DAYS, created, closed).tolist() == [2, 2, 2, 2, 1]
+
+
+def test_open_items_can_be_counted_under_other_conditions():
+    # as the PR response graphs do, counting only the PRs that were responded to.
+    created = times("2023-01-01", "2023-01-02", "2023-01-03")
+    closed = times("2023-01-04", None, None)
+    responded = np.array([True, False, True])
+
+    d, enter, leave = open_ranges(DAYS, created, closed)
+
+    assert count_active(len(d), enter, leave).tolist() == [1, 2, 3, 2, 2]
+    assert count_active(len(d), enter[responded], leave[responded]).tolist() == [1, 1, 2, 1, 1]
+
+
+def test_open_items_are_new_then_staling_then_stale():
+    dates = pd.to_datetime(["2023-01-10", "2023-01-20", "2023-02-20"])
+    created = times("2023-01-05", "2023-01-13", "2022-12-01")
+    closed = times(None, "2023-01-25", None)
+
+    new, staling, stale = new_staling_stale_at(dates, created, closed, staling_interval=7, stale_interval=30)
+
+    # the second item is exactly 7 days old on the 20th, so it's still new.
+    assert new.tolist() == [1, 1, 0]
+    assert staling.tolist() == [0, 1, 0]
+    assert stale.tolist() == [1, 1, 2]
+
+
+def test_contributors_are_active_then_drifting_then_away():
+    dates = pd.to_datetime(["2023-01-01", "2023-02-01", "2023-03-01", "2023-04-01", "2023-05-01"])
+    cntrb_ids = pd.Series(["u1", "u1", "u2", "u3"])
+    created = times("2022-12-15", "2023-03-10", "2023-01-01", "2023-04-15")
+
+    active, drifting, away = active_drifting_away_at(dates, cntrb_ids, created, drift_interval=1, away_interval=3)
+
+    # u1 is active again after contributing in March. u3 isn't counted before their first contribution.
+    assert active.tolist() == [2, 1, 0, 1, 1]
+    assert drifting.tolist() == [0, 1, 2, 0, 1]
+    assert away.tolist() == [0, 0, 0, 1, 1]
+
+
+def test_no_items_are_counted_as_zeros():
+    assert open_at(DAYS, NONE, NONE).tolist() == [0] * 5
+    assert [n.tolist() for n in new_staling_stale_at(DAYS, NONE, NONE, 7, 30)] == [[0] * 5] * 3
+    assert [n.tolist() for n in active_drifting_away_at(DAYS, pd.Series([], dtype=object), NONE, 1, 3)] == [[0] * 5] * 3
+
+
+def test_single_date():
+    day = DAYS[:1]
+    created = times("2022-12-01", "2023-01-01", "2023-01-02")
+
+    assert open_at(day, created, times(None, None, None)).tolist() == [2]
+    assert [n.tolist() for n in new_staling_stale_at(day, created, times(None, None, None), 7, 30)] == [[1], [0], [1]]
+
+    # a's contribution a month before is still recent enough to be active, and the one after isn't counted yet.
+    active, drifting, away = active_drifting_away_at(day, pd.Series(["a", "b", "a"]), created, 1, 3)
+    assert (active.tolist(), drifting.tolist(), away.tolist()) == ([2], [0], [0])
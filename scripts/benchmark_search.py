@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+benchmark_search.py: Compares the searchbar's n-gram index (SearchIndex)
+with a linear fuzzy_search over the same options, on a synthetic catalog.
+
+Usage:
+    python scripts/benchmark_search.py [--repos N] [--queries N] [--seed N]
+
+- Builds a catalog of N repo options ("https://github.com/<org>/<repo>")
+  and their org options, sorted by label like AugurManager.multiselect_startup.
+- Runs the same queries through both: substrings and prefixes of labels,
+  misspelled repo names, and 1-2 character queries.
+- Prints, per kind of query, the latency of each and how closely the
+  index's results match fuzzy_search's:
+    exact  - share of queries whose substring matches are identical
+    top10  - share of fuzzy_search's first 10 results that the index also returns first 10
+    top50  - the same for the first 50
+    recall - share of all of fuzzy_search's results that the index returns
+
+Example:
+    python scripts/benchmark_search.py --repos 50000 --queries 200
+"""
+
+import os
+import sys
+import time
+import random
+import string
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "8Knot"))
+
+from pages.index.search_utils import fuzzy_search
+from pages.index.search_index import SearchIndex
+
+WORDS = """
+    augur aspen knot chaoss open source data cloud kube net core
+    api client server web ui test tools sdk cli operator docs
+    metrics graph stream pipeline cache auth config deploy build infra
+""".split()
+
+
+def make_catalog(n_repos: int, rng: random.Random) -> list:
+    """Repo and org options, as returned by AugurManager.get_multiselect_options."""
+    orgs = sorted({"-".join(rng.sample(WORDS, 2)) + str(rng.randint(0, 99)) for _ in range(max(n_repos // 20, 1))})
+    repos = set()
+    while len(repos) < n_repos:
+        name = "-".join(rng.sample(WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.5:
+            name += str(rng.randint(0, 999))
+        repos.add(f"https://github.com/{rng.choice(orgs)}/{name}")
+
+    options = [{"label": label, "value": str(i)} for i, label in enumerate(sorted(repos))]
+    options += [{"label": org, "value": org} for org in orgs]
+    return sorted(options, key=lambda i: i["label"])
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    """{word} with a character deleted, replaced, or two characters swapped."""
+    i = rng.randrange(len(word) - 1)
+    edit = rng.choice(["delete", "replace", "swap"])
+    if edit == "delete":
+        return word[:i] + word[i + 1 :]
+    if edit == "replace":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1 :]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+def make_queries(options: list, n_queries: int, rng: random.Random) -> dict:
+    """Queries of each kind, drawn from the catalog's labels."""
+    names = [opt["label"].rsplit("/", 1)[-1] for opt in options]
+    queries = {"short": [], "substring": [], "misspelled": []}
+    for _ in range(n_queries):
+        name = rng.choice(names)
+        queries["short"].append(name[: rng.randint(1, 2)])
+
+        start = rng.randrange(max(len(name) - 3, 1))
+        queries["substring"].append(name[start : start + rng.randint(3, 12)])
+
+        queries["misspelled"].append(misspell(name, rng) if len(name) > 3 else name)
+    return queries
+
+
+def overlap(expected: list, actual: list, k: int = None) -> float:
+    """Share of the first {k} of {expected} in the first {k} of {actual}."""
+    expected = [opt["value"] for opt in expected[:k]]
+    if not expected:
+        return 1.0
+    actual = {opt["value"] for opt in actual[:k]}
+    return sum(value in actual for value in expected) / len(expected)
+
+
+def exact_part(query: str, results: list) -> list:
+    """Leading results that contain {query}."""
+    return [opt["value"] for opt in results if query.lower() in opt["label"].lower()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=50000, help="number of repos in the catalog")
+    parser.add_argument("--queries", type=int, default=100, help="number of queries of each kind")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    options = make_catalog(args.repos, rng)
+
+    start = time.perf_counter()
+    index = SearchIndex(options)
+    print(f"{len(options)} options, index built in {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'queries':<12}{'linear ms':>18}{'index ms':>18}{'exact':>8}{'top10':>8}{'top50':>8}{'recall':>8}")
+    for kind, queries in make_queries(options, args.queries, rng).items():
+        linear_ms, index_ms, exact, top10, top50, recall = [], [], [], [], [], []
+        for query in queries:
+            # same threshold as dynamic_multiselect_options
+            threshold = 0.15 if len(query) >= 4 else 0.2
+
+            start = time.perf_counter()
+            expected = fuzzy_search(query, options, threshold=threshold)
+            linear_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            actual = index.search(query, threshold=threshold)
+            index_ms.append((time.perf_counter() - start) * 1000)
+
+            exact.append(exact_part(query, expected) == exact_part(query, actual))
+            top10.append(overlap(expected, actual, 10))
+            top50.append(overlap(expected, actual, 50))
+            recall.append(overlap(expected, actual))
+
+        print(
+            f"{kind:<12}"
+            f"{statistics.mean(linear_ms):>9.2f} (p95 {sorted(linear_ms)[int(len(linear_ms) * 0.95)]:>5.1f})"
+            f"{statistics.mean(index_ms):>9.2f} (p95 {sorted(index_ms)[int(len(index_ms) * 0.95)]:>5.1f})"
+            f"{statistics.mean(exact):>8.3f}{statistics.mean(top10):>8.3f}"
+            f"{statistics.mean(top50):>8.3f}{statistics.mean(recall):>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()